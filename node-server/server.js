@@ -372,6 +372,11 @@ app.all('/api/youtube/*', async (req, res, next) => {
       timeout: 15000 // 15 segundos de timeout
     };
 
+    // Pasar la petición del detalle de tiempos (campo _timing) al servicio Python
+    if (req.headers['x-debug-timing']) {
+      options.headers['X-Debug-Timing'] = req.headers['x-debug-timing'];
+    }
+
     // Si es POST, PUT, etc., agregar el cuerpo de la solicitud
     if (['POST', 'PUT', 'PATCH'].includes(req.method) && req.body) {
       options.data = req.body;
@@ -380,6 +385,11 @@ app.all('/api/youtube/*', async (req, res, next) => {
     // Realizar la solicitud al servicio Python
     const response = await axios(options);
 
+    // Reenviar el desglose de tiempos de Python para verlo en las devtools
+    if (response.headers['server-timing']) {
+      res.set('Server-Timing', response.headers['server-timing']);
+    }
+
     // Enviar la respuesta al cliente
     console.log(`[Proxy] Respuesta exitosa desde ${targetUrl} con estado ${response.status}`);
     res.status(response.status).json(response.data);
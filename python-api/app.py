@@ -4,6 +4,7 @@ Punto de entrada para la API de YouTube Music
 
 from flask import jsonify
 from youtube_music_api import app
+from metrics import reset_metrics_dir
 import traceback
 import os
 from dotenv import load_dotenv
@@ -102,6 +103,9 @@ if __name__ == "__main__":
         print(f"Modo depuración: {debug}")
         print("Presiona Ctrl+C para detener el servidor")
         
+        # Métricas de ejecuciones anteriores (con gunicorn lo hace gunicorn.conf.py)
+        reset_metrics_dir()
+
         # Iniciar servidor
         app.run(host=host, port=port, debug=debug)
     except KeyboardInterrupt:
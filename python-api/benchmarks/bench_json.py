@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la serialización JSON de las respuestas.
+
+Para cada payload guardado se mide una petición completa (cliente de pruebas
+de Flask) que responde con una entrada de caché:
+
+- antes: json.load del archivo de caché y jsonify con el encoder por defecto
+  de Flask (lo que hacía cada acierto de caché)
+- jsonify rápido: lo mismo con FastJSONEncoder (orjson si está instalado)
+- después: los bytes ya serializados de SerializedCache (get_cached_response)
+
+y qué parte del tiempo de la petición es decodificar/serializar.
+
+Uso: python benchmarks/bench_json.py [--iterations N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.insert(0, BASE_DIR)
+
+from flask import Flask, jsonify  # noqa: E402
+
+from json_provider import USE_ORJSON, FastJSONEncoder, SerializedCache, dumps_bytes, json_response  # noqa: E402
+
+
+def load_payloads():
+    with open(os.path.join(BASE_DIR, "artist_UCBDXpukZYpWw54QCbEGdsZw.json"), "r", encoding="utf-8") as f:
+        artist = json.load(f)
+    with open(os.path.join(FIXTURES_DIR, "search_songs.json"), "r", encoding="utf-8") as f:
+        songs = json.load(f)
+    return {"artista": artist, "búsqueda": songs}
+
+
+def build_app(cache_file, payload, fast_encoder):
+    app = Flask(__name__)
+    if fast_encoder:
+        app.json_encoder = FastJSONEncoder
+    serialized = SerializedCache(64 * 1024 * 1024)
+    serialized.put("entry", dumps_bytes(payload), float("inf"))
+
+    @app.route("/disk")
+    def from_disk():
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return jsonify(json.load(f)["content"])
+
+    @app.route("/serialized")
+    def from_memory():
+        return json_response(serialized.get("entry", float("inf")))
+
+    return app
+
+
+def best_per_call(func, iterations):
+    return min(timeit.Timer(func).repeat(repeat=5, number=iterations)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"backend rápido: {'orjson' if USE_ORJSON else 'json estándar (orjson no instalado)'}")
+    print(f"{'payload':<12} {'variante':<16} {'petición µs':>12} {'json µs':>14} {'% json':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, payload in load_payloads().items():
+            cache_file = os.path.join(tmp, "entry.json")
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"timestamp": "2024-01-01T00:00:00", "content": payload}, f, ensure_ascii=False)
+
+            variants = (("antes", False, "/disk"), ("jsonify rápido", True, "/disk"), ("después", True, "/serialized"))
+            for label, fast_encoder, path in variants:
+                app = build_app(cache_file, payload, fast_encoder)
+                client = app.test_client()
+                request_time = best_per_call(lambda: client.get(path), args.iterations)
+
+                with app.test_request_context(path):
+                    view = app.view_functions["from_disk" if path == "/disk" else "from_memory"]
+                    serialize_time = best_per_call(view, args.iterations)
+                share = 100 * serialize_time / request_time
+                print(
+                    f"{name:<12} {label:<16} {request_time * 1e6:>12.1f} {serialize_time * 1e6:>14.1f} {share:>12.1f}%"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la normalización de tracks (models.Track).
+
+- Rendimiento: tracks normalizados por segundo con el camino rápido (tracks
+  estándar de ytmusicapi de los payloads guardados) y con el camino lento
+  (las mismas pistas sin videoId/artists/thumbnails estándar).
+- Memoria: bytes por track guardado como Track (__slots__) frente al dict
+  equivalente, medidos con tracemalloc.
+
+Uso: python benchmarks/bench_models.py [--iterations N] [--tracks N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.insert(0, BASE_DIR)
+
+from models import Track  # noqa: E402
+
+
+def load_tracks():
+    with open(os.path.join(BASE_DIR, "artist_UCBDXpukZYpWw54QCbEGdsZw.json"), "r", encoding="utf-8") as f:
+        artist = json.load(f)
+    with open(os.path.join(FIXTURES_DIR, "search_songs.json"), "r", encoding="utf-8") as f:
+        songs = json.load(f)
+    return artist["songs"]["results"] + songs
+
+
+def as_irregular(track):
+    """La misma pista con campos no estándar, para forzar las heurísticas"""
+    return {
+        "id": track["videoId"] + "_x",
+        "title": track["title"],
+        "author": track["artists"][0]["name"],
+        "coverImage": track["thumbnails"][-1]["url"],
+        "length": track.get("duration", ""),
+    }
+
+
+def normalize_rate(tracks, iterations):
+    def run():
+        for track in tracks:
+            Track.from_ytmusic(track).to_dict()
+
+    best = min(timeit.Timer(run).repeat(repeat=5, number=iterations))
+    return iterations * len(tracks) / best
+
+
+def bytes_per_track(build, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # El tamaño de la lista que los retiene no cuenta
+    size -= sys.getsizeof(kept)
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--tracks", type=int, default=20000, help="tracks retenidos para medir memoria")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    tracks = load_tracks()
+    irregular = [as_irregular(track) for track in tracks]
+
+    print(f"{'normalización':<24} {'tracks/s':>12}")
+    print(f"{'camino rápido':<24} {normalize_rate(tracks, args.iterations):>12,.0f}")
+    print(f"{'camino lento':<24} {normalize_rate(irregular, args.iterations):>12,.0f}")
+
+    normalized = [Track.from_ytmusic(track) for track in tracks]
+
+    def as_model(i):
+        # Copias distintas de los valores para que no se compartan entre tracks
+        t = normalized[i % len(normalized)]
+        return Track(f"{t.id}{i}", f"{t.title}{i}", t.artist, t.thumbnail, t.duration, t.duration_text, t.source)
+
+    def as_dict(i):
+        return as_model(i).to_dict()
+
+    model_bytes = bytes_per_track(as_model, args.tracks)
+    dict_bytes = bytes_per_track(as_dict, args.tracks)
+    print()
+    print(f"{'memoria por track':<24} {'bytes':>12}")
+    print(f"{'Track (__slots__)':<24} {model_bytes:>12,.0f}")
+    print(f"{'dict':<24} {dict_bytes:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark de la transformación de resultados de búsqueda.
+
+Usa payloads de YTMusic.search guardados en benchmarks/fixtures (sin red) y
+mide el coste por resultado del transformador de /api/search, con la
+resolución de miniaturas real y con una trivial para aislar el coste propio
+del transformador.
+
+Uso: python benchmarks/bench_search_transform.py [--iterations N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.insert(0, BASE_DIR)
+
+from search_transform import SearchTransformer  # noqa: E402
+
+PAYLOADS = (("songs", "search_songs.json"), ("artists", "search_artists.json"), ("albums", "search_albums.json"))
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def per_item_us(transformer, items, filter_type, iterations):
+    timer = timeit.Timer(lambda: transformer.transform(items, filter_type, "US", "es"))
+    best = min(timer.repeat(repeat=5, number=iterations))
+    return best / (iterations * len(items)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # El módulo principal configura logging a INFO; no queremos medir la escritura de logs
+    from youtube_music_api import get_best_thumbnail
+
+    logging.disable(logging.CRITICAL)
+
+    transformers = (
+        ("get_best_thumbnail", SearchTransformer(get_best_thumbnail)),
+        ("sin miniaturas", SearchTransformer(lambda thumbnails: "")),
+    )
+
+    print(f"{'filtro':<10} {'items':>5}  {'miniaturas':<20} {'µs/item':>9}")
+    for filter_type, fixture in PAYLOADS:
+        items = load_fixture(fixture)
+        for label, transformer in transformers:
+            cost = per_item_us(transformer, items, filter_type, args.iterations)
+            print(f"{filter_type:<10} {len(items):>5}  {label:<20} {cost:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark de la resolución de miniaturas.
+
+Recoge todas las listas de thumbnails de los payloads guardados (get_artist y
+las búsquedas de benchmarks/fixtures) y mide el coste por lista de
+get_best_thumbnail en frío (memoización vacía) y en caliente.
+
+Uso: python benchmarks/bench_thumbnails.py [--iterations N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+sys.path.insert(0, BASE_DIR)
+
+from thumbnails import canonical_thumbnail_url, get_best_thumbnail  # noqa: E402
+
+PAYLOADS = (
+    os.path.join(BASE_DIR, "artist_UCBDXpukZYpWw54QCbEGdsZw.json"),
+    os.path.join(FIXTURES_DIR, "search_songs.json"),
+    os.path.join(FIXTURES_DIR, "search_artists.json"),
+    os.path.join(FIXTURES_DIR, "search_albums.json"),
+)
+
+
+def collect_items(data, found):
+    """Elementos (dicts) con lista de thumbnails dentro de un payload"""
+    if isinstance(data, dict):
+        if isinstance(data.get("thumbnails"), list) and data["thumbnails"]:
+            found.append(data)
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                collect_items(value, found)
+    elif isinstance(data, list):
+        for value in data:
+            collect_items(value, found)
+    return found
+
+
+def load_items():
+    items = []
+    for path in PAYLOADS:
+        with open(path, "r", encoding="utf-8") as f:
+            collect_items(json.load(f), items)
+    return items
+
+
+def per_item_us(func, count, iterations):
+    best = min(timeit.Timer(func).repeat(repeat=5, number=iterations))
+    return best / (iterations * count) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    items = load_items()
+    thumbnail_lists = [item["thumbnails"] for item in items]
+
+    def cold():
+        canonical_thumbnail_url.cache_clear()
+        for thumbnails in thumbnail_lists:
+            get_best_thumbnail(thumbnails)
+
+    def warm():
+        for thumbnails in thumbnail_lists:
+            get_best_thumbnail(thumbnails)
+
+    print(f"{len(thumbnail_lists)} listas de thumbnails, {len(set(map(get_best_thumbnail, thumbnail_lists)))} URLs distintas")
+    print(f"{'caso':<28} {'µs/lista':>9}")
+    for label, func in (("en frío (sin memoización)", cold), ("en caliente", warm)):
+        print(f"{label:<28} {per_item_us(func, len(thumbnail_lists), args.iterations):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
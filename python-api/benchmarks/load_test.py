@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Generador de carga para la API.
+
+Reproduce una mezcla de endpoints con pesos (benchmarks/load_mix.json) desde
+--concurrency clientes en bucle cerrado y al terminar muestra, por ruta y en
+total, peticiones, throughput, errores y latencias p50/p95/p99.
+
+Los valores de los parámetros salen de los payloads guardados: $query,
+$prefix (prefijos de consultas, como al escribir), $title, $artist y $videoId
+(de un mismo track en cada petición), $artistId y los pools de la mezcla
+("pools"). Se eligen con una distribución de Zipf, así que unos pocos valores
+se repiten mucho, como en el tráfico real. Una lista en la mezcla se resuelve
+eligiendo uno de sus valores.
+
+Pensado para usarse contra benchmarks/stub_upstream.py, y así comparar
+modelos de workers y ajustes de caché sin llamar a YouTube Music:
+
+    python benchmarks/stub_upstream.py &
+    YTMUSIC_BASE_URL=http://127.0.0.1:8765 gunicorn -w 4 -b 127.0.0.1:5000 app:app &
+    python benchmarks/load_test.py --base-url http://127.0.0.1:5000 --duration 60
+
+Uso: python benchmarks/load_test.py [--base-url URL] [--mix FILE] [--concurrency N]
+         [--duration S | --requests N] [--warmup S] [--seed N] [--json FILE]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+DEFAULT_MIX = os.path.join(BASE_DIR, "benchmarks", "load_mix.json")
+
+# Placeholders que salen del mismo track en cada petición
+TRACK_FIELDS = {"$title": "title", "$artist": "artist", "$videoId": "videoId"}
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_pools(mix):
+    """Valores para los placeholders a partir de los payloads guardados"""
+    artist = load_json(os.path.join(BASE_DIR, "artist_UCBDXpukZYpWw54QCbEGdsZw.json"))
+    songs = load_json(os.path.join(FIXTURES_DIR, "search_songs.json"))
+    watch = load_json(os.path.join(FIXTURES_DIR, "watch_playlist.json"))
+    artists = load_json(os.path.join(FIXTURES_DIR, "search_artists.json"))
+
+    tracks, seen = [], set()
+    for item in songs + artist["songs"]["results"] + watch["tracks"]:
+        if item.get("videoId") and item["videoId"] not in seen and item.get("artists"):
+            seen.add(item["videoId"])
+            tracks.append({"title": item["title"], "artist": item["artists"][0]["name"], "videoId": item["videoId"]})
+
+    artist_ids = [artist["channelId"]] + [item["browseId"] for item in artist["related"]["results"]]
+    artist_ids += [item["browseId"] for item in artists if item.get("browseId")]
+    queries = [track["title"] for track in tracks] + [f"{t['artist']} {t['title']}" for t in tracks]
+    queries += [item["artist"] for item in artists if item.get("artist")]
+    prefixes = [query[:size] for query in queries for size in range(2, min(len(query), 7))]
+
+    pools = {"$track": tracks, "$query": queries, "$prefix": prefixes, "$artistId": artist_ids}
+    for name, values in mix.get("pools", {}).items():
+        pools[f"${name}"] = values
+    return pools
+
+
+def zipf_choice(rng, values):
+    # Pesos 1/rango: el primer valor es el más popular
+    weights = [1.0 / (rank + 1) for rank in range(len(values))]
+    return rng.choices(values, weights=weights)[0]
+
+
+def resolve(value, pools, track, rng):
+    if isinstance(value, str) and value.startswith("$"):
+        if value in TRACK_FIELDS:
+            return track[TRACK_FIELDS[value]]
+        return zipf_choice(rng, pools[value])
+    if isinstance(value, list):
+        if all(isinstance(item, str) and item.startswith("$") for item in value):
+            return [resolve(item, pools, track, rng) for item in value]
+        return resolve(rng.choice(value), pools, track, rng)
+    if isinstance(value, dict):
+        return {key: resolve(item, pools, track, rng) for key, item in value.items()}
+    return value
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def add(self, route, status, seconds):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+            if status == "error" or status >= 500:
+                self.errors[route] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        everything = []
+        for route in sorted(self.latencies):
+            latencies = sorted(self.latencies[route])
+            everything.extend(latencies)
+            rows[route] = self._row(latencies, self.errors[route], elapsed)
+            rows[route]["statuses"] = {str(status): count for status, count in self.statuses[route].items()}
+        rows["total"] = self._row(sorted(everything), sum(self.errors.values()), elapsed)
+        return rows
+
+    @staticmethod
+    def _row(latencies, errors, elapsed):
+        return {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+
+def worker(base_url, routes, weights, pools, results, stop, budget, measure_from, seed):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while not stop.is_set():
+        if budget is not None:
+            with budget["lock"]:
+                if budget["left"] <= 0:
+                    return
+                budget["left"] -= 1
+        route = rng.choices(routes, weights=weights)[0]
+        track = zipf_choice(rng, pools["$track"])
+        kwargs = {"timeout": 60}
+        if "params" in route:
+            kwargs["params"] = resolve(route["params"], pools, track, rng)
+        if "json" in route:
+            kwargs["json"] = resolve(route["json"], pools, track, rng)
+
+        start = time.perf_counter()
+        try:
+            status = session.request(route.get("method", "GET"), base_url + route["path"], **kwargs).status_code
+        except requests.RequestException:
+            status = "error"
+        if start >= measure_from:
+            results.add(route["name"], status, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="mezcla de rutas con pesos (JSON)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de carga (tras el calentamiento)")
+    parser.add_argument("--requests", type=int, default=None, help="número total de peticiones (en vez de --duration)")
+    parser.add_argument("--warmup", type=float, default=0.0, help="segundos iniciales que no se miden")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="guarda los resultados en este archivo")
+    args = parser.parse_args()
+
+    mix = load_json(args.mix)
+    routes = mix["routes"]
+    weights = [route.get("weight", 1) for route in routes]
+    pools = build_pools(mix)
+    base_url = args.base_url.rstrip("/")
+
+    results = Results()
+    stop = threading.Event()
+    budget = {"left": args.requests, "lock": threading.Lock()} if args.requests is not None else None
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(base_url, routes, weights, pools, results, stop, budget, measure_from, args.seed + i),
+            daemon=True,
+        )
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    if budget is None:
+        time.sleep(args.warmup + args.duration)
+        stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - max(started, measure_from)
+
+    summary = results.summary(elapsed)
+    print(f"{args.concurrency} clientes, {elapsed:.1f}s medidos contra {base_url}")
+    print(f"{'ruta':<20} {'peticiones':>10} {'req/s':>8} {'errores':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    for route, row in summary.items():
+        print(
+            f"{route:<20} {row['requests']:>10} {row['rps']:>8.1f} {row['errors']:>8} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"base_url": base_url, "concurrency": args.concurrency, "elapsed": elapsed, "routes": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Suite de micro-benchmarks de los caminos calientes de CPU, sin red.
+
+Mide sobre los payloads guardados (artist_UCBDXpukZYpWw54QCbEGdsZw.json y
+benchmarks/fixtures: búsquedas, charts y watch playlist):
+
+- normalize_track_data: µs por track
+- get_best_thumbnail: µs por lista de thumbnails (en frío y memoizado)
+- transformación de /api/search: µs por resultado
+- caché: escritura (save_to_cache), lectura del disco (read_cache_entry) y
+  acierto en memoria (get_cached_response), µs por entrada
+- serialización JSON: dumps_bytes y jsonify, µs por payload
+
+y compara cada caso con benchmarks/baselines.json. Los casos más lentos que la
+referencia en más de --tolerance se marcan como regresión (con --check el
+script termina con código 1). Las referencias dependen de la máquina: se
+guardan con --save junto con el entorno en que se midieron.
+
+Cada caso se mide en --rounds rondas. En cada ronda se toma la mejor de
+varias tandas cortas del caso y de una carga fija de Python puro
+(calibración), medidas una detrás de otra, y se calcula el coste relativo a la
+calibración; así un cambio de velocidad de la máquina durante la ejecución
+afecta por igual a los dos. El resultado es la mediana de las rondas, y su
+dispersión (rango intercuartílico relativo) es el ruido del caso: se guarda
+con la referencia y la tolerancia de un caso nunca es menor que NOISE_FACTOR
+veces su ruido, ni que MIN_TOLERANCE_US µs por unidad en los casos de menos
+de un microsegundo.
+
+Uso: python benchmarks/run_suite.py [--filter TEXTO] [--iterations N] [--rounds N] [--save] [--check]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+BASELINES_FILE = os.path.join(BASE_DIR, "benchmarks", "baselines.json")
+sys.path.insert(0, BASE_DIR)
+
+# Rondas por caso, tandas por ronda y duración aproximada de cada tanda
+ROUNDS = 9
+REPEAT = 5
+BATCH_SECONDS = 0.02
+# Casos que tocan el disco: la calibración no corrige su ruido y el de una ronda
+# no refleja el de la caché de páginas entre ejecuciones, se les admite el triple
+IO_CASES = ("cache_write/", "cache_read_disk/")
+IO_TOLERANCE_FACTOR = 3
+# La tolerancia de un caso es al menos NOISE_FACTOR veces su ruido medido
+NOISE_FACTOR = 3
+# Empeoramiento absoluto (µs por unidad) por debajo del cual no hay regresión
+MIN_TOLERANCE_US = 0.25
+
+from json_provider import USE_ORJSON, dumps_bytes  # noqa: E402
+from search_transform import SearchTransformer  # noqa: E402
+from thumbnails import canonical_thumbnail_url, get_best_thumbnail  # noqa: E402
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_fixtures():
+    fixtures = {"artist": load_json(os.path.join(BASE_DIR, "artist_UCBDXpukZYpWw54QCbEGdsZw.json"))}
+    for name in ("search_songs", "search_artists", "search_albums", "charts", "watch_playlist"):
+        fixtures[name] = load_json(os.path.join(FIXTURES_DIR, f"{name}.json"))
+    return fixtures
+
+
+def thumbnail_lists(data, found):
+    """Listas de thumbnails (campo thumbnails o thumbnail) dentro de un payload"""
+    if isinstance(data, dict):
+        for field in ("thumbnails", "thumbnail"):
+            if isinstance(data.get(field), list) and data[field]:
+                found.append(data[field])
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                thumbnail_lists(value, found)
+    elif isinstance(data, list):
+        for value in data:
+            thumbnail_lists(value, found)
+    return found
+
+
+def build_cases(api, fixtures, cache_dir):
+    """Lista de (nombre, unidades por llamada, función)"""
+    cases = []
+
+    def each(func, items):
+        def run():
+            for item in items:
+                func(item)
+
+        return run
+
+    # Normalización de tracks
+    track_sets = (
+        ("search_songs", fixtures["search_songs"]),
+        ("artist_songs", fixtures["artist"]["songs"]["results"]),
+        ("watch_playlist", fixtures["watch_playlist"]["tracks"]),
+        ("charts_videos", fixtures["charts"]["videos"]["items"]),
+    )
+    for name, tracks in track_sets:
+        cases.append((f"normalize_track_data/{name}", len(tracks), each(api.normalize_track_data, tracks)))
+
+    # Miniaturas
+    lists = []
+    for name in ("artist", "search_songs", "search_artists", "search_albums", "charts", "watch_playlist"):
+        thumbnail_lists(fixtures[name], lists)
+
+    def thumbnails_cold():
+        canonical_thumbnail_url.cache_clear()
+        for thumbnails in lists:
+            get_best_thumbnail(thumbnails)
+
+    cases.append(("get_best_thumbnail/en_frio", len(lists), thumbnails_cold))
+    cases.append(("get_best_thumbnail/memoizado", len(lists), each(get_best_thumbnail, lists)))
+
+    # Transformación de búsqueda
+    transformer = SearchTransformer(get_best_thumbnail)
+    for filter_type in ("songs", "artists", "albums"):
+        items = fixtures[f"search_{filter_type}"]
+
+        def transform(items=items, filter_type=filter_type):
+            transformer.transform(items, filter_type, "US", "es")
+
+        cases.append((f"search_transform/{filter_type}", len(items), transform))
+
+    # Caché (en un directorio temporal)
+    api.CACHE_DIR = cache_dir
+    cache_payloads = (
+        ("artist", fixtures["artist"]),
+        ("search_songs", fixtures["search_songs"]),
+        ("watch_playlist", fixtures["watch_playlist"]),
+    )
+    for name, payload in cache_payloads:
+        key = f"bench_{name}"
+        api.save_to_cache(key, payload)
+        cases.append((f"cache_write/{name}", 1, lambda key=key, payload=payload: api.save_to_cache(key, payload)))
+        cases.append((f"cache_read_disk/{name}", 1, lambda key=key: api.read_cache_entry(key)))
+        cases.append((f"cache_read_memory/{name}", 1, lambda key=key: api.get_cached_response(key)))
+
+    # Serialización JSON
+    json_payloads = cache_payloads + (("charts", fixtures["charts"]),)
+    for name, payload in json_payloads:
+        cases.append((f"json_dumps_bytes/{name}", 1, lambda payload=payload: dumps_bytes(payload)))
+        cases.append((f"jsonify/{name}", 1, lambda payload=payload: api.jsonify(payload)))
+
+    return cases
+
+
+def batch_iterations(func):
+    """Llamadas por tanda para que dure unos BATCH_SECONDS"""
+    single = min(timeit.Timer(func).repeat(repeat=3, number=1))
+    return max(1, int(BATCH_SECONDS / max(single, 1e-7)))
+
+
+def per_unit_us(func, units, iterations, repeat=REPEAT):
+    best = min(timeit.Timer(func).repeat(repeat=repeat, number=iterations))
+    return best / (iterations * units) * 1e6
+
+
+def _calibration_workload():
+    items = [{"id": i, "title": f"track {i}", "artists": [{"name": "a"}]} for i in range(50)]
+    return sorted((item["title"].upper(), item["artists"][0]["name"]) for item in items)
+
+
+def measure(func, units, iterations, rounds):
+    """Mediana de las rondas: µs por unidad, µs de calibración, coste relativo y ruido"""
+    iterations = iterations or batch_iterations(func)
+    calibration_iterations = batch_iterations(_calibration_workload)
+    costs, calibrations, relatives = [], [], []
+    for _ in range(rounds):
+        calibration = per_unit_us(_calibration_workload, 1, calibration_iterations)
+        cost = per_unit_us(func, units, iterations)
+        costs.append(cost)
+        calibrations.append(calibration)
+        relatives.append(cost / calibration)
+    relative = statistics.median(relatives)
+    quartiles = statistics.quantiles(relatives, n=4) if rounds > 1 else (relative, relative, relative)
+    return {
+        "us": round(statistics.median(costs), 3),
+        "calibration_us": round(statistics.median(calibrations), 3),
+        "relative": round(relative, 5),
+        "noise": round((quartiles[2] - quartiles[0]) / relative, 3),
+    }
+
+
+def tolerance_for(name, result, base, tolerance):
+    """Empeoramiento relativo admitido para un caso frente a su referencia"""
+    tolerance *= IO_TOLERANCE_FACTOR if name.startswith(IO_CASES) else 1
+    noise = max(result["noise"], base.get("noise", 0.0))
+    return max(tolerance, NOISE_FACTOR * noise, MIN_TOLERANCE_US / base["us"])
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "json_backend": "orjson" if USE_ORJSON else "stdlib",
+    }
+
+
+def load_baselines():
+    try:
+        return load_json(BASELINES_FILE)
+    except FileNotFoundError:
+        return {"environment": None, "results": {}}
+
+
+def save_baselines(baselines, results):
+    baselines["environment"] = environment()
+    baselines["results"] = dict(sorted({**baselines.get("results", {}), **results}.items()))
+    with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--iterations", type=int, default=None, help="llamadas por tanda (por defecto se calibra)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="rondas por caso (se toma la mediana)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento admitido (0.25 = 25%%)")
+    parser.add_argument("--save", action="store_true", help="guarda los resultados como nuevas referencias")
+    parser.add_argument("--check", action="store_true", help="termina con código 1 si hay regresiones")
+    args = parser.parse_args()
+
+    # El módulo principal configura logging a INFO; no queremos medir la escritura de logs
+    import youtube_music_api as api
+
+    logging.disable(logging.CRITICAL)
+
+    baselines = load_baselines()
+    reference = baselines.get("results", {})
+    if baselines.get("environment") and baselines["environment"] != environment():
+        print(f"aviso: las referencias se midieron en otro entorno: {baselines['environment']}")
+
+    results = {}
+    regressions = []
+    # cambio: coste relativo a la calibración frente al de la referencia; margen:
+    # empeoramiento admitido para el caso
+    print(f"{'caso':<40} {'µs/unidad':>11} {'referencia':>11} {'cambio':>9} {'margen':>8}")
+    # Un único contexto de petición para get_cached_response y jsonify: crear uno
+    # por llamada costaría más que lo que se mide
+    with tempfile.TemporaryDirectory() as cache_dir, api.app.test_request_context():
+        for name, units, func in build_cases(api, load_fixtures(), cache_dir):
+            if args.filter not in name:
+                continue
+            result = results[name] = measure(func, units, args.iterations, args.rounds)
+            base = reference.get(name)
+            if base:
+                base_relative = base.get("relative") or base["us"] / base["calibration_us"]
+                change = result["relative"] / base_relative - 1
+                tolerance = tolerance_for(name, result, base, args.tolerance)
+                mark = "  REGRESIÓN" if change > tolerance else ""
+                if mark:
+                    regressions.append(name)
+                print(f"{name:<40} {result['us']:>11.2f} {base['us']:>11.2f} {change:>+8.0%} {tolerance:>8.0%}{mark}")
+            else:
+                print(f"{name:<40} {result['us']:>11.2f} {'-':>11} {'-':>9} {'-':>8}")
+
+    if args.save:
+        save_baselines(baselines, results)
+        print(f"referencias guardadas en {os.path.relpath(BASELINES_FILE, BASE_DIR)}")
+    if regressions:
+        print(f"{len(regressions)} regresiones: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Servidor local que sustituye a YouTube Music en las pruebas de carga.
+
+Sirve respuestas de InnerTube (/youtubei/v1/<endpoint>) grabadas con una
+latencia y una tasa de errores configurables, para cargar la API sin llamar a
+YouTube Music. La API se apunta a él con YTMUSIC_BASE_URL:
+
+    python benchmarks/stub_upstream.py --port 8765
+    YTMUSIC_BASE_URL=http://127.0.0.1:8765 gunicorn app:app
+
+Grabación: con --record el servidor reenvía cada petición a music.youtube.com
+y guarda la respuesta en --recordings (un archivo por endpoint y cuerpo de
+petición). Basta con usar la API unos minutos contra el servidor en modo
+--record para tener un juego de respuestas reales.
+
+Reproducción: cada petición se responde con la grabación de su endpoint y
+cuerpo (sin el contexto del cliente). Si no hay una exacta se usa otra del
+mismo endpoint (la forma y el tamaño de la respuesta son los mismos), salvo
+con --strict, que responde 404.
+
+Latencias: fixed:MS, uniform:MIN_MS:MAX_MS o lognormal:MEDIANA_MS:SIGMA, para
+todas las peticiones (--latency) o por endpoint (--endpoint-latency
+search=lognormal:250:0.5). Los errores inyectados (--error-rate, por endpoint
+con --endpoint-error-rate) responden --error-status con el cuerpo de error de
+InnerTube. GET /__stats devuelve los contadores del servidor.
+
+Uso: python benchmarks/stub_upstream.py [--port N] [--recordings DIR] [--record] [--strict]
+         [--latency SPEC] [--endpoint-latency ENDPOINT=SPEC ...]
+         [--error-rate P] [--endpoint-error-rate ENDPOINT=P ...] [--error-status N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORDINGS_DIR = os.path.join(BASE_DIR, "benchmarks", "recordings")
+
+YTM_DOMAIN = "https://music.youtube.com"
+API_PREFIX = "/youtubei/v1/"
+
+# Página inicial mínima: ytmusicapi solo extrae de ella el visitor id
+VISITOR_PAGE = b'<html><script>ytcfg.set({"VISITOR_DATA": "stub-visitor"});</script></html>'
+
+# Cabeceras que no se reenvían al grabar
+HOP_HEADERS = {"host", "content-length", "accept-encoding", "connection"}
+
+
+def parse_latency(spec):
+    """Función sin argumentos que devuelve una latencia en segundos según spec"""
+    kind, _, rest = spec.partition(":")
+    values = [float(value) for value in rest.split(":")] if rest else []
+    if kind == "none":
+        return lambda: 0.0
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: median * random.lognormvariate(0, sigma) / 1000
+    raise argparse.ArgumentTypeError(f"latencia inválida: '{spec}'")
+
+
+def parse_overrides(pairs, parse_value):
+    overrides = {}
+    for pair in pairs:
+        endpoint, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"se esperaba ENDPOINT=VALOR: '{pair}'")
+        overrides[endpoint] = parse_value(value)
+    return overrides
+
+
+def request_key(body):
+    """Clave de la grabación: el cuerpo de la petición sin el contexto del cliente"""
+    body = {key: value for key, value in body.items() if key != "context"} if isinstance(body, dict) else body
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class Recordings:
+    """Respuestas grabadas por endpoint y clave de petición"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._by_endpoint = {}
+        self._lock = threading.Lock()
+        if os.path.isdir(directory):
+            for folder in sorted(os.listdir(directory)):
+                path = os.path.join(directory, folder)
+                for name in sorted(os.listdir(path)) if os.path.isdir(path) else ():
+                    with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                        recording = json.load(f)
+                    self._by_endpoint.setdefault(recording["endpoint"], {})[name[:-5]] = recording
+
+    def find(self, endpoint, key, strict):
+        """(grabación, exacta) o (None, False)"""
+        recordings = self._by_endpoint.get(endpoint)
+        if not recordings:
+            return None, False
+        if key in recordings:
+            return recordings[key], True
+        if strict:
+            return None, False
+        return random.choice(list(recordings.values())), False
+
+    def save(self, endpoint, key, request_body, status, body):
+        recording = {"endpoint": endpoint, "request": request_body, "status": status, "body": body}
+        folder = os.path.join(self.directory, endpoint.replace("/", "_"))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(recording, f, ensure_ascii=False)
+        with self._lock:
+            self._by_endpoint.setdefault(endpoint, {})[key] = recording
+
+    def summary(self):
+        return {endpoint: len(recordings) for endpoint, recordings in sorted(self._by_endpoint.items())}
+
+
+class StubState:
+    def __init__(self, args):
+        self.recordings = Recordings(args.recordings)
+        self.record = args.record
+        self.strict = args.strict
+        self.latency = args.latency
+        self.endpoint_latency = parse_overrides(args.endpoint_latency, parse_latency)
+        self.error_rate = args.error_rate
+        self.endpoint_error_rate = parse_overrides(args.endpoint_error_rate, float)
+        self.error_status = args.error_status
+        self.stats = {"requests": 0, "exact": 0, "fallback": 0, "missing": 0, "injected_errors": 0, "recorded": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ytmusic-stub"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == "/__stats":
+            self._send_json(200, {**state.stats, "recordings": state.recordings.summary()})
+        elif state.record:
+            response = requests.get(YTM_DOMAIN + self.path, headers=self._forward_headers(), timeout=30)
+            self._send(response.status_code, response.content, response.headers.get("Content-Type", "text/html"))
+        else:
+            self._send(200, VISITOR_PAGE, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        state = self.server.state
+        state.count("requests")
+        path = self.path.split("?", 1)[0]
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not path.startswith(API_PREFIX):
+            self._send_json(404, {"error": {"code": 404, "message": f"ruta desconocida: {path}"}})
+            return
+        endpoint = path[len(API_PREFIX):]
+        try:
+            request_body = json.loads(raw or b"{}")
+        except ValueError:
+            request_body = {}
+        key = request_key(request_body)
+
+        if state.record:
+            self._record(endpoint, key, request_body, raw)
+            return
+
+        time.sleep(state.endpoint_latency.get(endpoint, state.latency)())
+        if random.random() < state.endpoint_error_rate.get(endpoint, state.error_rate):
+            state.count("injected_errors")
+            message = "stub: error inyectado"
+            self._send_json(state.error_status, {"error": {"code": state.error_status, "message": message}})
+            return
+
+        recording, exact = state.recordings.find(endpoint, key, state.strict)
+        if recording is None:
+            state.count("missing")
+            self._send_json(404, {"error": {"code": 404, "message": f"stub: sin grabación para '{endpoint}'"}})
+            return
+        state.count("exact" if exact else "fallback")
+        self._send_json(recording["status"], recording["body"])
+
+    def _forward_headers(self):
+        return {name: value for name, value in self.headers.items() if name.lower() not in HOP_HEADERS}
+
+    def _record(self, endpoint, key, request_body, raw):
+        state = self.server.state
+        response = requests.post(YTM_DOMAIN + self.path, data=raw, headers=self._forward_headers(), timeout=30)
+        try:
+            body = response.json()
+        except ValueError:
+            self._send(response.status_code, response.content, response.headers.get("Content-Type", "text/plain"))
+            return
+        if response.status_code < 400:
+            state.recordings.save(endpoint, key, request_body, response.status_code, body)
+            state.count("recorded")
+        self._send_json(response.status_code, body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_DIR, help="directorio de grabaciones")
+    parser.add_argument("--record", action="store_true", help="reenvía a music.youtube.com y graba las respuestas")
+    parser.add_argument("--strict", action="store_true", help="404 si no hay grabación exacta de la petición")
+    parser.add_argument("--latency", type=parse_latency, default=parse_latency("lognormal:120:0.5"))
+    parser.add_argument("--endpoint-latency", action="append", default=[], metavar="ENDPOINT=SPEC")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de peticiones con error")
+    parser.add_argument("--endpoint-error-rate", action="append", default=[], metavar="ENDPOINT=P")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--verbose", action="store_true", help="registra cada petición")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(args)
+    server.verbose = args.verbose
+
+    mode = "grabando desde music.youtube.com" if args.record else "reproduciendo"
+    print(f"stub de YouTube Music en http://{args.host}:{args.port} ({mode}, grabaciones en {args.recordings})")
+    print(f"grabaciones por endpoint: {server.state.recordings.summary() or 'ninguna'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.state.stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Circuit breaker por método de YouTube Music.
+
+Cada método de ytmusicapi (search, get_artist, get_watch_playlist...) tiene su
+propio breaker con tres estados:
+
+- closed: las llamadas pasan normalmente y se cuentan los fallos consecutivos.
+- open: tras superar el umbral de fallos, las llamadas se rechazan al instante
+  con CircuitOpenError para que los endpoints sirvan caché antiguo o fallback.
+- half_open: pasado el tiempo de recuperación se deja pasar una llamada de
+  prueba; si funciona el breaker se cierra, si falla vuelve a abrirse.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger("youtube-music-api")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Configuración (se puede ajustar por variables de entorno)
+FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+RECOVERY_TIMEOUT = float(os.environ.get("CIRCUIT_RECOVERY_SECONDS", 30))
+HALF_OPEN_MAX_CALLS = int(os.environ.get("CIRCUIT_HALF_OPEN_CALLS", 1))
+
+
+class CircuitOpenError(Exception):
+    """Se lanza cuando el breaker de un método está abierto"""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuito abierto para '{name}', reintento en {retry_after:.1f}s")
+
+
+def is_upstream_failure(error):
+    """
+    Indica si un error se debe a YouTube Music (red, HTTP 5xx/429, respuesta
+    corrupta) y por lo tanto debe contar para abrir el circuito.
+    Los errores locales (idioma no soportado, parámetros inválidos) no cuentan.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (requests.exceptions.RequestException, json.JSONDecodeError)):
+        return True
+
+    message = str(error)
+    if message.startswith("Server returned HTTP"):
+        # Los 4xx (salvo 429) son errores de la petición, no de disponibilidad
+        return not message.startswith("Server returned HTTP 4") or message.startswith("Server returned HTTP 429")
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None, half_open_max_calls=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or RECOVERY_TIMEOUT
+        self.half_open_max_calls = half_open_max_calls or HALF_OPEN_MAX_CALLS
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        # Contadores para /status
+        self._total_calls = 0
+        self._total_failures = 0
+        self._rejected = 0
+        self._last_error = None
+        self._last_state_change = time.time()
+
+    def _set_state(self, state):
+        if state != self._state:
+            logger.warning(f"[CIRCUIT] '{self.name}': {self._state} -> {state}")
+            self._state = state
+            self._last_state_change = time.time()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        # Pasar de open a half_open cuando vence el tiempo de recuperación
+        if self._state == OPEN and time.time() - self._opened_at >= self.recovery_timeout:
+            self._set_state(HALF_OPEN)
+            self._half_open_calls = 0
+
+    def before_call(self):
+        """Reserva una llamada o lanza CircuitOpenError si el circuito no la permite"""
+        with self._lock:
+            self._refresh_state()
+            if self._state == OPEN:
+                self._rejected += 1
+                retry_after = self.recovery_timeout - (time.time() - self._opened_at)
+                raise CircuitOpenError(self.name, max(0.0, retry_after))
+            if self._state == HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._half_open_calls += 1
+            self._total_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._set_state(CLOSED)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            if error is not None:
+                self._last_error = str(error)[:200]
+
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.time()
+                self._set_state(OPEN)
+
+    def release(self):
+        """Libera la reserva de una llamada que terminó sin veredicto (error local)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def call(self, func, *args, **kwargs):
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record_failure(e)
+            else:
+                self.release()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh_state()
+            data = {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "total_calls": self._total_calls,
+                "total_failures": self._total_failures,
+                "rejected_calls": self._rejected,
+                "last_error": self._last_error,
+                "last_state_change": self._last_state_change,
+            }
+            if self._state == OPEN:
+                data["retry_after_seconds"] = round(max(0.0, self.recovery_timeout - (time.time() - self._opened_at)), 2)
+            return data
+
+
+# Registro global de breakers (uno por método de YTMusic)
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name):
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name)
+                _breakers[name] = breaker
+    return breaker
+
+
+def call_with_breaker(name, func, *args, **kwargs):
+    """Ejecuta func protegida por el breaker del método indicado"""
+    return get_breaker(name).call(func, *args, **kwargs)
+
+
+def any_circuit_open():
+    """Indica si algún método de YouTube Music tiene el circuito abierto"""
+    return any(breaker.state == OPEN for breaker in list(_breakers.values()))
+
+
+def circuit_open(*names):
+    """Indica si alguno de los métodos indicados tiene el circuito abierto (no cuenta half_open)"""
+    for name in names:
+        breaker = _breakers.get(name)
+        if breaker is not None and breaker.state == OPEN:
+            return True
+    return False
+
+
+def breakers_status():
+    """Estado de todos los breakers para el endpoint /status"""
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
@@ -0,0 +1,153 @@
+"""
+Compresión de respuestas (gzip y brotli).
+
+Se negocia con Accept-Encoding: brotli si el cliente lo acepta y el paquete
+brotli está instalado (es opcional), si no gzip. Solo se comprimen respuestas
+de texto/JSON completas (no las de streaming) de al menos
+COMPRESSION_MIN_BYTES.
+
+Las variantes comprimidas se recuerdan por el hash del cuerpo: una respuesta
+que se repite (todas las que salen de caché) se comprime una sola vez y las
+siguientes peticiones reutilizan los bytes ya comprimidos.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+logger = logging.getLogger("youtube-music-api")
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", 1024))
+# Nivel de gzip (1-9) y calidad de brotli (0-11)
+COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+# Bytes comprimidos que se guardan como máximo para reutilizar
+COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get("COMPRESSION_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+
+
+def _compress_gzip(data):
+    # mtime=0: la misma entrada produce siempre los mismos bytes
+    return gzip.compress(data, compresslevel=COMPRESSION_LEVEL, mtime=0)
+
+
+def _compress_brotli(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+# Orden de preferencia del servidor
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS["br"] = _compress_brotli
+ENCODERS["gzip"] = _compress_gzip
+
+
+class CompressedVariants:
+    """LRU de cuerpos comprimidos por (hash del cuerpo, codificación), acotada en bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, data, encoding):
+        key = (hashlib.sha1(data).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = ENCODERS[encoding](data)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+    def status(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+variants = CompressedVariants(COMPRESSION_CACHE_MAX_BYTES)
+_stats = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+_stats_lock = threading.Lock()
+
+
+def _should_compress(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress_response(response):
+    """Comprime la respuesta si el cliente lo acepta y merece la pena"""
+    if not _should_compress(response):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = request.accept_encodings.best_match(list(ENCODERS))
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+
+    compressed = variants.get_or_compress(data, encoding)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    with _stats_lock:
+        _stats["compressed"] += 1
+        _stats["bytes_in"] += len(data)
+        _stats["bytes_out"] += len(compressed)
+    return response
+
+
+def install_compression(app):
+    """Registra la compresión como último paso de cada respuesta"""
+    if not COMPRESSION_ENABLED:
+        logger.info("Compresión de respuestas desactivada (COMPRESSION_ENABLED)")
+        return
+    app.after_request(compress_response)
+
+
+def compression_status():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(
+        {
+            "enabled": COMPRESSION_ENABLED,
+            "encodings": list(ENCODERS),
+            "min_bytes": COMPRESSION_MIN_BYTES,
+            "level": COMPRESSION_LEVEL,
+            "variants": variants.status(),
+        }
+    )
+    return stats
@@ -0,0 +1,91 @@
+"""
+Ejecución concurrente acotada para endpoints que lanzan muchas llamadas a
+YouTube Music en una sola petición (lotes, multi-get).
+
+Cada tarea corre con una copia del contexto de la petición, así que conserva el
+deadline y el contexto de Flask; las tareas que no terminan antes del deadline
+se descartan y la petición devuelve lo que tenga.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+
+from deadlines import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger("youtube-music-api")
+
+
+def iter_concurrently(func, items, max_workers):
+    """
+    Ejecuta func(item) para cada item con como mucho max_workers hilos y genera
+    (item, resultado) a medida que termina cada tarea.
+    Los items que fallan o no terminan antes del deadline no se generan.
+    """
+    if not items:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))), thread_name_prefix="batch")
+    futures = {}
+    for item in items:
+        ctx = contextvars.copy_context()
+        futures[executor.submit(ctx.run, func, item)] = item
+
+    finished = 0
+    expired = 0
+    try:
+        for future in as_completed(futures, timeout=remaining_time()):
+            finished += 1
+            error = future.exception()
+            if isinstance(error, DeadlineExceeded):
+                expired += 1
+            elif error is not None:
+                logger.error(f"[BATCH] Error procesando '{futures[future]}': {error}")
+            else:
+                yield futures[future], future.result()
+    except FuturesTimeout:
+        pass
+    finally:
+        # No esperar a las tareas pendientes: el deadline ya se agotó
+        executor.shutdown(wait=False, cancel_futures=True)
+        expired += len(futures) - finished
+        if expired:
+            logger.warning(f"[BATCH] {expired} de {len(futures)} tareas sin terminar al agotarse el deadline")
+
+
+def run_concurrently(func, items, max_workers):
+    """
+    Ejecuta func(item) para cada item con como mucho max_workers hilos.
+    Devuelve {item: resultado}; los items que fallan o no terminan a tiempo no aparecen.
+    """
+    return dict(iter_concurrently(func, items, max_workers))
+
+
+def iter_batch_results(keys, resolved, pending, resolve, max_workers, make_result):
+    """
+    Genera los resultados de un lote a medida que están disponibles.
+
+    keys: clave de cada posición de la entrada (las repetidas se resuelven una vez)
+    resolved: {clave: resultado} ya disponibles (p. ej. aciertos de caché)
+    pending: claves a resolver con resolve(clave), en paralelo
+    make_result(index, clave, resultado): construye el resultado de una posición;
+    recibe resultado None si la clave no se resolvió (inválida o deadline agotado)
+    """
+    positions = {}
+    for index, key in enumerate(keys):
+        positions.setdefault(key, []).append(index)
+
+    for key, result in resolved.items():
+        for index in positions.get(key, ()):
+            yield make_result(index, key, result)
+
+    done = set(resolved)
+    for key, result in iter_concurrently(resolve, pending, max_workers):
+        done.add(key)
+        for index in positions.get(key, ()):
+            yield make_result(index, key, result)
+
+    for key, indices in positions.items():
+        if key not in done:
+            for index in indices:
+                yield make_result(index, key, None)
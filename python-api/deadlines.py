@@ -0,0 +1,152 @@
+"""
+Deadlines de extremo a extremo por petición.
+
+Cada petición recibe un presupuesto de tiempo que se puede fijar con la cabecera
+X-Request-Timeout o el parámetro timeout_ms (ambos en milisegundos); si no se
+indica se usa el valor por defecto de la ruta (ROUTE_DEADLINES).
+
+El deadline se guarda en una ContextVar, de modo que llega también a los hilos
+de hedging y a las llamadas concurrentes. DeadlineSession lo aplica como timeout
+de cada petición HTTP a YouTube Music, y los endpoints que agregan varias
+fuentes lo consultan para devolver lo que tengan con la marca partial.
+"""
+
+import contextvars
+import logging
+import os
+import time
+
+import requests
+from flask import request
+
+logger = logging.getLogger("youtube-music-api")
+
+# Presupuesto por defecto y máximo (segundos)
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 15))
+MAX_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_MAX_SECONDS", 60))
+
+# Timeout por defecto de ytmusicapi para cada petición HTTP
+UPSTREAM_TIMEOUT_SECONDS = 30
+
+# Presupuesto por defecto de cada ruta (segundos)
+ROUTE_DEADLINES = {
+    "/api/suggestions": 2,
+    "/api/search": 6,
+    "/api/find-track": 6,
+    "/api/find-tracks": 30,
+    "/api/spotify-to-youtube": 6,
+    "/api/spotify-to-youtube/batch": 30,
+    "/api/watch-playlist": 6,
+    "/api/youtube-artist": 8,
+    "/api/youtube-artists": 15,
+    "/api/top-artists": 8,
+    "/api/artists-by-genre": 8,
+    "/api/recommendations": 10,
+    "/api/recommendations-by-genres": 12,
+}
+
+_current_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Se lanza cuando se agota el presupuesto de tiempo de la petición"""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.budget = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+        self.exceeded = False
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        if time.monotonic() >= self.expires_at:
+            self.exceeded = True
+        return self.exceeded
+
+    def check(self, what="operación"):
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline de {self.budget:.1f}s agotado antes de {what}")
+
+
+def current_deadline():
+    """Deadline de la petición en curso (None fuera de una petición)"""
+    return _current_deadline.get()
+
+
+def remaining_time(default=None):
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else default
+
+
+def deadline_expired():
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired()
+
+
+def check_deadline(what="operación"):
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(what)
+
+
+def is_partial():
+    """Indica si la petición agotó su deadline y la respuesta puede estar incompleta"""
+    deadline = _current_deadline.get()
+    return deadline is not None and (deadline.exceeded or deadline.expired())
+
+
+def _requested_budget():
+    raw = request.headers.get("X-Request-Timeout") or request.args.get("timeout_ms")
+    if raw:
+        try:
+            return min(MAX_DEADLINE_SECONDS, max(0.05, float(raw) / 1000.0))
+        except ValueError:
+            logger.warning(f"[DEADLINE] Valor de timeout inválido: '{raw}'")
+    return ROUTE_DEADLINES.get(request.path, DEFAULT_DEADLINE_SECONDS)
+
+
+def install_deadlines(app):
+    """Registra los hooks que crean y liberan el deadline de cada petición"""
+
+    @app.before_request
+    def _start_deadline():
+        request.environ["deadline.token"] = _current_deadline.set(Deadline(_requested_budget()))
+
+    @app.teardown_request
+    def _end_deadline(exc=None):
+        token = request.environ.pop("deadline.token", None)
+        if token is not None:
+            try:
+                _current_deadline.reset(token)
+            except ValueError:
+                # El token pertenece a otro contexto (p. ej. respuestas en streaming)
+                _current_deadline.set(None)
+
+
+class DeadlineSession(requests.Session):
+    """Sesión de requests que usa el tiempo restante de la petición como timeout"""
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.pop("timeout", None) or UPSTREAM_TIMEOUT_SECONDS
+        deadline = _current_deadline.get()
+        limited = False
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                deadline.exceeded = True
+                raise DeadlineExceeded(f"Deadline de {deadline.budget:.1f}s agotado antes de llamar a YouTube Music")
+            if remaining < timeout:
+                timeout = remaining
+                limited = True
+        try:
+            return super().request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.Timeout:
+            if limited:
+                # El timeout lo impuso nuestro deadline, no es un fallo de YouTube Music
+                deadline.exceeded = True
+                raise DeadlineExceeded(f"Deadline de {deadline.budget:.1f}s agotado esperando a YouTube Music")
+            raise
@@ -0,0 +1,567 @@
+"""
+Catálogo de datos de fallback (artistas por género, playlists destacadas,
+nuevos lanzamientos y charts) para cuando YouTube Music no responde.
+
+Los datos se cargan una sola vez al importar el módulo y las respuestas de
+fallback se precalculan por región, con índices de alias de género y de
+región. Cada consulta es una búsqueda en un dict que devuelve objetos
+compartidos: los endpoints no deben modificarlos (copiarlos con dict() si
+hace falta cambiar algo).
+"""
+
+import logging
+import random
+from functools import lru_cache
+from types import MappingProxyType
+
+logger = logging.getLogger("youtube-music-api")
+
+# --- Datos ---
+
+REGION_PLAYLISTS = {
+    "ES": [
+        {
+            "title": "Éxitos España",
+            "playlistId": "ES_top_hits",
+            "author": "YouTube Music",
+            "description": "Los éxitos más populares en España",
+            "trackCount": 50,
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/p7bfOZek9t4/maxresdefault.jpg"}],
+            "region": "ES",
+        },
+        {
+            "title": "Flamenco Fusion",
+            "playlistId": "ES_flamenco",
+            "author": "YouTube Music",
+            "description": "Lo mejor del flamenco fusión",
+            "trackCount": 30,
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/qmbx4_TQbkA/maxresdefault.jpg"}],
+            "region": "ES",
+        },
+    ],
+    "MX": [
+        {
+            "title": "Regional Mexicano",
+            "playlistId": "MX_regional",
+            "author": "YouTube Music",
+            "description": "Lo mejor de la música regional mexicana",
+            "trackCount": 40,
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/NGZ-xIDBiCs/maxresdefault.jpg"}],
+            "region": "MX",
+        },
+        {
+            "title": "Pop Latino México",
+            "playlistId": "MX_pop",
+            "author": "YouTube Music",
+            "description": "El pop más escuchado en México",
+            "trackCount": 45,
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/MBmb5_TTT-w/maxresdefault.jpg"}],
+            "region": "MX",
+        },
+    ],
+    "AR": [
+        {
+            "title": "Trap Argentino",
+            "playlistId": "AR_trap",
+            "author": "YouTube Music",
+            "description": "El mejor trap de Argentina",
+            "trackCount": 40,
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/3V-bu_i-w_o/maxresdefault.jpg"}],
+            "region": "AR",
+        }
+    ],
+}
+
+GENERIC_PLAYLISTS = [
+    {
+        "title": "Top Hits Globales",
+        "playlistId": "PL55713C70BA91BD6E",
+        "author": "YouTube Music",
+        "description": "Los éxitos más populares del momento",
+        "trackCount": 50,
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/kJQP7kiw5Fk/maxresdefault.jpg"}],
+        "region": "global",
+    },
+    {
+        "title": "Éxitos Latinos",
+        "playlistId": "PL4fGSI1pDJn6jXS_Tv_N9B8Z0HTRVJE0n",
+        "author": "YouTube Music",
+        "description": "Lo mejor de la música latina",
+        "trackCount": 40,
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/TmKh7lAwnBI/maxresdefault.jpg"}],
+        "region": "global",
+    },
+    {
+        "title": "Acoustic Chill",
+        "playlistId": "PLgzTt0k8mXzEk586ze4BjvDXR7c-TUSnx",
+        "author": "YouTube Music",
+        "description": "Música acústica para relajarte",
+        "trackCount": 35,
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/jTLhQf5KJSc/maxresdefault.jpg"}],
+        "region": "global",
+    },
+    {
+        "title": "Workout Hits",
+        "playlistId": "PL4o29bINVT4EG_y-k5jGoOu3-Am8Nvi10",
+        "author": "YouTube Music",
+        "description": "Música para entrenar",
+        "trackCount": 45,
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/pRpeEdMmmQ0/maxresdefault.jpg"}],
+        "region": "global",
+    },
+    {
+        "title": "Indie Discoveries",
+        "playlistId": "PL4fGSI1pDJn5kI81J1fYWK5eZRl1zJ5kM",
+        "author": "YouTube Music",
+        "description": "Descubre nuevas bandas indie",
+        "trackCount": 30,
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/8SbUC-UaAxE/maxresdefault.jpg"}],
+        "region": "global",
+    },
+]
+
+REGION_ALBUMS = {
+    "ES": [
+        {
+            "id": "yt-album-es-1",
+            "name": "El Madrileño",
+            "artists": [{"name": "C. Tangana"}],
+            "images": [{"url": "https://i.ytimg.com/vi/7Z2XmgX-jjE/maxresdefault.jpg"}],
+            "release_date": "2025",
+            "type": "album",
+            "region": "ES",
+        },
+        {
+            "id": "yt-album-es-2",
+            "name": "Vibras",
+            "artists": [{"name": "J Balvin"}],
+            "images": [{"url": "https://i.ytimg.com/vi/0MpFSsP9rIM/maxresdefault.jpg"}],
+            "release_date": "2025",
+            "type": "album",
+            "region": "ES",
+        },
+    ],
+    "MX": [
+        {
+            "id": "yt-album-mx-1",
+            "name": "Un Canto por México",
+            "artists": [{"name": "Natalia Lafourcade"}],
+            "images": [{"url": "https://i.ytimg.com/vi/F0IjuWLTuZM/maxresdefault.jpg"}],
+            "release_date": "2025",
+            "type": "album",
+            "region": "MX",
+        },
+        {
+            "id": "yt-album-mx-2",
+            "name": "Mañana Será Bonito",
+            "artists": [{"name": "Karol G"}],
+            "images": [{"url": "https://i.ytimg.com/vi/sqj6yUQyGmw/maxresdefault.jpg"}],
+            "release_date": "2025",
+            "type": "album",
+            "region": "MX",
+        },
+    ],
+    "AR": [
+        {
+            "id": "yt-album-ar-1",
+            "name": "Bzrp Music Sessions",
+            "artists": [{"name": "Bizarrap"}],
+            "images": [{"url": "https://i.ytimg.com/vi/3nQNiWdeH2Q/maxresdefault.jpg"}],
+            "release_date": "2025",
+            "type": "album",
+            "region": "AR",
+        }
+    ],
+}
+
+DEFAULT_ALBUMS = [
+    {
+        "id": "yt-album-1",
+        "name": "Future Nostalgia (2025 Edition)",
+        "artists": [{"name": "Dua Lipa"}],
+        "images": [{"url": "https://i.ytimg.com/vi/WHuBW3qKm9g/maxresdefault.jpg"}],
+        "release_date": "2025",
+        "type": "album",
+        "region": "global",
+    },
+    {
+        "id": "yt-album-2",
+        "name": "Un Verano Sin Ti (Deluxe)",
+        "artists": [{"name": "Bad Bunny"}],
+        "images": [{"url": "https://i.ytimg.com/vi/1TCX_Aqzoo4/maxresdefault.jpg"}],
+        "release_date": "2025",
+        "type": "album",
+        "region": "global",
+    },
+    {
+        "id": "yt-album-3",
+        "name": "After Hours (Extended Version)",
+        "artists": [{"name": "The Weeknd"}],
+        "images": [{"url": "https://i.ytimg.com/vi/XXYlFuWEuKI/maxresdefault.jpg"}],
+        "release_date": "2025",
+        "type": "album",
+        "region": "global",
+    },
+    {
+        "id": "yt-album-4",
+        "name": "Harry's House (Expanded Edition)",
+        "artists": [{"name": "Harry Styles"}],
+        "images": [{"url": "https://i.ytimg.com/vi/H5v3kku4y6Q/maxresdefault.jpg"}],
+        "release_date": "2025",
+        "type": "album",
+        "region": "global",
+    },
+    {
+        "id": "yt-album-5",
+        "name": "Midnights (The Complete Collection)",
+        "artists": [{"name": "Taylor Swift"}],
+        "images": [{"url": "https://i.ytimg.com/vi/b1kbLwvqugk/maxresdefault.jpg"}],
+        "release_date": "2025",
+        "type": "album",
+        "region": "global",
+    },
+]
+
+REGION_CHART_TRACKS = {
+    "US": [
+        {
+            "videoId": "us_pop_1",
+            "title": "US Pop Hit 1",
+            "artists": [{"name": "US Artist 1"}],
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/dQw4w9WgXcQ/maxresdefault.jpg"}],
+            "type": "track",
+            "region": "US",
+        }
+    ],
+    "ES": [
+        {
+            "videoId": "es_pop_1",
+            "title": "Hit Latino 1",
+            "artists": [{"name": "Artista Latino 1"}],
+            "thumbnails": [{"url": "https://i.ytimg.com/vi/kJQP7kiw5Fk/maxresdefault.jpg"}],
+            "type": "track",
+            "region": "ES",
+        }
+    ],
+}
+
+DEFAULT_CHART_TRACKS = [
+    {
+        "videoId": "global_pop_1",
+        "title": "Global Hit 1",
+        "artists": [{"name": "Global Artist 1"}],
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/JGwWNGJdvx8/maxresdefault.jpg"}],
+        "type": "track",
+        "region": "global",
+    },
+    {
+        "videoId": "global_pop_2",
+        "title": "Global Hit 2",
+        "artists": [{"name": "Global Artist 2"}],
+        "thumbnails": [{"url": "https://i.ytimg.com/vi/3tmd-ClpJxA/maxresdefault.jpg"}],
+        "type": "track",
+        "region": "global",
+    },
+]
+
+GENRE_ARTISTS = {
+    "pop": [
+        {
+            "id": "pop1",
+            "name": "Taylor Swift",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb6a224073987b930f99adc8bc"}],
+        },
+        {
+            "id": "pop2",
+            "name": "Ed Sheeran",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb3bcef85e105dfc42399ef0c2"}],
+        },
+        {
+            "id": "pop3",
+            "name": "Ariana Grande",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebcdce7620dc940db079bf4952"}],
+        },
+        {
+            "id": "pop4",
+            "name": "Justin Bieber",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8ae7f2aaa9817a704a87ea36"}],
+        },
+    ],
+    "rock": [
+        {
+            "id": "rock1",
+            "name": "Foo Fighters",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8b9e05bd676878c8861f7828"}],
+        },
+        {
+            "id": "rock2",
+            "name": "Arctic Monkeys",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb7da39dea0a72f581535fb11f"}],
+        },
+        {
+            "id": "rock3",
+            "name": "Imagine Dragons",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb920dc1f617550de8388f368e"}],
+        },
+        {
+            "id": "rock4",
+            "name": "Twenty One Pilots",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba53ac4a3e0240306c2c33bae"}],
+        },
+    ],
+    "hip hop": [
+        {
+            "id": "hiphop1",
+            "name": "Kendrick Lamar",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb6eb08a5d2495d9f7d429aee9"}],
+        },
+        {
+            "id": "hiphop2",
+            "name": "Drake",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb4293385d324db8558179afd9"}],
+        },
+        {
+            "id": "hiphop3",
+            "name": "J. Cole",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebadd503b411a712e277895c8a"}],
+        },
+        {
+            "id": "hiphop4",
+            "name": "Travis Scott",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba00b11c129b27a88fc72f36b"}],
+        },
+    ],
+    "electronic": [
+        {
+            "id": "edm1",
+            "name": "Calvin Harris",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebc2b305a3560d6708dd8b7de0"}],
+        },
+        {
+            "id": "edm2",
+            "name": "Martin Garrix",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb12a2ef08d00dd7451a6dbed6"}],
+        },
+        {
+            "id": "edm3",
+            "name": "Daft Punk",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb10ca40ea0b0b5082dba0ff75"}],
+        },
+        {
+            "id": "edm4",
+            "name": "Avicii",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebd212fe90e871fa11c232c3a6"}],
+        },
+    ],
+    "indie": [
+        {
+            "id": "indie1",
+            "name": "Tame Impala",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebf87efa01ac7680a3fa7d0987"}],
+        },
+        {
+            "id": "indie2",
+            "name": "The 1975",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8197fc99bf4768c774d18c55"}],
+        },
+        {
+            "id": "indie3",
+            "name": "Vampire Weekend",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb809b75d71c5e258695cef8c4"}],
+        },
+        {
+            "id": "indie4",
+            "name": "MGMT",
+            "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb68151ade82ce461f9f761a5e"}],
+        },
+    ],
+}
+
+REGION_GENRE_ARTISTS = {
+    "ES": {
+        "pop": [
+            {
+                "id": "es-pop1",
+                "name": "Rosalía",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb4a5844d12a6633fcce886ce2"}],
+            },
+            {
+                "id": "es-pop2",
+                "name": "Aitana",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1af3fabbe3738a589d6f45de"}],
+            },
+            {
+                "id": "es-pop3",
+                "name": "Pablo Alborán",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb996e3a6acf0b2bec97b29f34"}],
+            },
+        ],
+        "rock": [
+            {
+                "id": "es-rock1",
+                "name": "Leiva",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1f3c2b9c5fafe47fdb6dd2e3"}],
+            },
+            {
+                "id": "es-rock2",
+                "name": "Izal",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb32d0c0c92328b225d069534a"}],
+            },
+        ],
+    },
+    "MX": {
+        "pop": [
+            {
+                "id": "mx-pop1",
+                "name": "Natalia Lafourcade",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb9c0ac81650538c3a3f5c5536"}],
+            },
+            {
+                "id": "mx-pop2",
+                "name": "Reik",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba09a439764e2c2d5eb517de1"}],
+            },
+            {
+                "id": "mx-pop3",
+                "name": "Jesse & Joy",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba8c8f89da7b1c1fcc9e1c92e"}],
+            },
+        ]
+    },
+    "AR": {
+        "pop": [
+            {
+                "id": "ar-pop1",
+                "name": "Tini",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebb6a2c7d2a2b38be4f4ede430"}],
+            },
+            {
+                "id": "ar-pop2",
+                "name": "Lali",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1e34e6df777e8d4bd0269ed7"}],
+            },
+            {
+                "id": "ar-pop3",
+                "name": "Nicki Nicole",
+                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb21128629ebdb8ac427228921"}],
+            },
+        ]
+    },
+}
+
+REGION_KEYWORDS = {
+    "ES": "españa",
+    "MX": "méxico",
+    "AR": "argentina",
+    "CO": "colombia",
+    "CL": "chile",
+    "US": "usa",
+    "GB": "uk",
+    "FR": "francia",
+    "DE": "alemania",
+    "IT": "italia",
+    "BR": "brasil",
+}
+
+# Alias frecuentes de cada género del catálogo (se comparan en minúsculas)
+GENRE_ALIASES = {
+    "pop": ("k-pop", "kpop", "pop latino", "latin pop", "dance pop"),
+    "rock": ("alternative rock", "hard rock", "rock alternativo", "metal"),
+    "hip hop": ("hip-hop", "hiphop", "rap", "trap"),
+    "electronic": ("electronica", "electrónica", "edm", "dance", "house", "techno"),
+    # "indie pop" e "indie rock" no son alias: por coincidencia parcial van a pop y rock
+    "indie": ("alternative", "alternativo"),
+}
+
+# Popularidad que se asigna a los artistas de fallback
+FALLBACK_POPULARITY = 50
+# Combinaciones (género, región) de artistas de fallback que se recuerdan
+ARTIST_RESPONSE_CACHE_SIZE = 1024
+
+
+def _freeze(items):
+    return tuple(dict(item) for item in items)
+
+
+def _by_region(region_items, default_items):
+    """Índice región -> lista precalculada (específicos de la región + generales)"""
+    defaults = _freeze(default_items)
+    index = {region: _freeze(items) + defaults for region, items in region_items.items()}
+    return MappingProxyType(index), defaults
+
+
+class FallbackCatalog:
+    def __init__(self):
+        self._playlists, self._default_playlists = _by_region(REGION_PLAYLISTS, GENERIC_PLAYLISTS)
+        self._albums, self._default_albums = _by_region(REGION_ALBUMS, DEFAULT_ALBUMS)
+        self._chart_tracks, self._default_chart_tracks = _by_region(REGION_CHART_TRACKS, DEFAULT_CHART_TRACKS)
+        self._region_keywords = MappingProxyType(dict(REGION_KEYWORDS))
+
+        self._genre_artists = MappingProxyType({genre: _freeze(items) for genre, items in GENRE_ARTISTS.items()})
+        self._region_genre_artists = MappingProxyType(
+            {
+                (region, genre): _freeze(items)
+                for region, genres in REGION_GENRE_ARTISTS.items()
+                for genre, items in genres.items()
+            }
+        )
+        aliases = {genre: genre for genre in GENRE_ARTISTS}
+        for genre, names in GENRE_ALIASES.items():
+            aliases.update((name, genre) for name in names)
+        self._genre_aliases = MappingProxyType(aliases)
+
+        # Mezcla de todos los géneros para los géneros desconocidos (se baraja en cada petición)
+        self._mixed_artists = tuple(artist for artists in self._genre_artists.values() for artist in artists)
+
+        # Géneros pedidos por los usuarios: memoizados con límite de tamaño
+        self.match_genre = lru_cache(maxsize=ARTIST_RESPONSE_CACHE_SIZE)(self._match_genre)
+        self._artist_response = lru_cache(maxsize=ARTIST_RESPONSE_CACHE_SIZE)(self._build_artist_response)
+        logger.info(
+            f"[FALLBACK] Catálogo cargado: {len(self._genre_artists)} géneros, "
+            f"{len(self._genre_aliases)} alias, {len(self._playlists)} regiones con playlists"
+        )
+
+    def _match_genre(self, genre):
+        """Género del catálogo que corresponde a un género pedido (None si ninguno)"""
+        normalized_genre = (genre or "").lower().strip()
+        matched = self._genre_aliases.get(normalized_genre)
+        if matched:
+            return matched
+        # Coincidencia parcial, como "latin hip hop" -> "hip hop"
+        for key in self._genre_artists:
+            if key in normalized_genre or normalized_genre in key:
+                return key
+        return None
+
+    def _build_artist_response(self, genre, region):
+        matched_genre = self.match_genre(genre)
+        if matched_genre:
+            base = self._region_genre_artists.get((region, matched_genre), ()) + self._genre_artists[matched_genre]
+        else:
+            base = self._mixed_artists
+        return tuple(
+            {**artist, "genres": [genre], "popularity": FALLBACK_POPULARITY, "source": "youtube", "region": region}
+            for artist in base
+        )
+
+    def artists_for_genre(self, genre, count, region="US"):
+        """Artistas de fallback para un género y región (específicos de la región primero)"""
+        artists = self._artist_response(genre, region)
+        if self.match_genre(genre) is None:
+            artists = random.sample(artists, len(artists))
+        return list(artists[: max(0, count)])
+
+    def featured_playlists(self, region, limit):
+        return list(self._playlists.get(region, self._default_playlists)[:limit])
+
+    def new_releases(self, region, limit):
+        return list(self._albums.get(region, self._default_albums)[:limit])
+
+    def chart_singles(self, region, limit):
+        return list(self._chart_tracks.get(region, self._default_chart_tracks)[:limit])
+
+    def region_keyword(self, region_code):
+        return self._region_keywords.get(region_code, "")
+
+
+fallback_catalog = FallbackCatalog()
@@ -0,0 +1,264 @@
+"""
+Índice persistente de géneros: qué artistas, playlists y tracks pertenecen a
+cada género.
+
+Se alimenta de forma incremental con los resultados de búsqueda de los
+endpoints por género (artists-by-genre, top-artists, recommendations-by-genres)
+y con las playlists de mood/género de YouTube Music. Se guardan los resultados
+crudos de ytmusicapi, así que cada endpoint los formatea igual que si vinieran
+de una búsqueda.
+
+Los endpoints leen primero del índice y solo van a YouTube Music para
+completarlo cuando no tiene suficientes elementos. Un hilo en segundo plano
+refresca los géneros pedidos recientemente cuando sus datos superan
+GENRE_INDEX_TTL_HOURS.
+
+La clave es solo el género, sin idioma ni región: los endpoints por género no
+pasan la región a YouTube Music, y el idioma solo traduce los textos de la
+interfaz (p. ej. "1,2 M suscriptores"), no los nombres de artistas, playlists
+y canciones ni sus IDs, que es lo que devuelven. El refresco en segundo plano
+usa el cliente por defecto, así que una entrada por idioma duplicaría los
+mismos elementos.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from spotify_matcher import DATA_DIR, normalize_text
+
+logger = logging.getLogger("youtube-music-api")
+
+GENRE_INDEX_DB = os.environ.get("GENRE_INDEX_DB", os.path.join(DATA_DIR, "genre_index.db"))
+# Antigüedad a partir de la cual un género se refresca en segundo plano
+GENRE_INDEX_TTL_HOURS = float(os.environ.get("GENRE_INDEX_TTL_HOURS", 24))
+# Cada cuánto revisa el hilo de refresco los géneros pedidos
+GENRE_INDEX_REFRESH_INTERVAL_SECONDS = float(os.environ.get("GENRE_INDEX_REFRESH_INTERVAL_SECONDS", 300))
+# Elementos que se guardan como máximo por género y tipo
+GENRE_INDEX_MAX_ITEMS = int(os.environ.get("GENRE_INDEX_MAX_ITEMS", 200))
+# Solo se refrescan solos los géneros pedidos en este periodo
+RECENT_REQUEST_SECONDS = 24 * 3600
+
+def genre_key(genre):
+    return normalize_text(genre)
+
+
+def _item_id(item):
+    return item.get("browseId") or item.get("videoId") or item.get("playlistId")
+
+
+class GenreIndex:
+    def __init__(self, path=GENRE_INDEX_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._refresher = None
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._requested = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS genre_items (
+                    genre TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    rank INTEGER,
+                    seen_count INTEGER DEFAULT 1,
+                    source TEXT,
+                    updated_at REAL,
+                    PRIMARY KEY (genre, kind, item_id)
+                )
+                """
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS genres (genre TEXT PRIMARY KEY, refreshed_at REAL)")
+            conn.commit()
+            self._initialized = True
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    # --- Ingesta ---
+
+    def add(self, genre, kind, items, source="search"):
+        """Guarda resultados crudos de ytmusicapi de un género; devuelve cuántos se guardaron"""
+        key = genre_key(genre)
+        now = time.time()
+        rows = [
+            (key, kind, _item_id(item), json.dumps(item, ensure_ascii=False), rank, source, now)
+            for rank, item in enumerate(items or [])
+            if isinstance(item, dict) and _item_id(item)
+        ]
+        if not key or not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO genre_items (genre, kind, item_id, data, rank, source, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (genre, kind, item_id) DO UPDATE SET data = excluded.data,"
+                " rank = MIN(rank, excluded.rank), seen_count = seen_count + 1, updated_at = excluded.updated_at",
+                rows,
+            )
+            # Recortar los menos relevantes
+            conn.execute(
+                "DELETE FROM genre_items WHERE genre = ? AND kind = ? AND item_id NOT IN ("
+                " SELECT item_id FROM genre_items WHERE genre = ? AND kind = ?"
+                " ORDER BY rank, seen_count DESC LIMIT ?)",
+                (key, kind, key, kind, GENRE_INDEX_MAX_ITEMS),
+            )
+        return len(rows)
+
+    def mark_refreshed(self, genre):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO genres (genre, refreshed_at) VALUES (?, ?)", (genre_key(genre), time.time()))
+
+    # --- Consulta ---
+
+    def get(self, genre, kind, limit):
+        """Hasta limit resultados crudos del género, los más relevantes primero"""
+        key = genre_key(genre)
+        try:
+            self._note_request(key, genre)
+            rows = self._connection().execute(
+                "SELECT data FROM genre_items WHERE genre = ? AND kind = ? ORDER BY rank, seen_count DESC LIMIT ?",
+                (key, kind, limit),
+            ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[GENEROS] Error leyendo el índice de '{genre}': {str(e)}")
+            return []
+        self._count("hits" if len(rows) >= limit else "misses")
+        return [json.loads(row[0]) for row in rows]
+
+    def lookup(self, genre, kind, limit, search):
+        """
+        Resultados crudos del género desde el índice. Si no hay limit elementos,
+        search() los pide a YouTube Music; su respuesta se indexa y se completa
+        con lo que ya había en el índice.
+        """
+        indexed = self.get(genre, kind, limit)
+        if indexed and len(indexed) >= limit:
+            return indexed
+        results = search() or []
+        try:
+            self.add(genre, kind, results)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[GENEROS] Error indexando '{genre}': {str(e)}")
+        seen = {_item_id(item) for item in results if isinstance(item, dict)}
+        merged = list(results)
+        for item in indexed:
+            if len(merged) >= limit:
+                break
+            if _item_id(item) not in seen:
+                merged.append(item)
+        return merged
+
+    def is_stale(self, genre):
+        row = self._connection().execute(
+            "SELECT refreshed_at FROM genres WHERE genre = ?", (genre_key(genre),)
+        ).fetchone()
+        return row is None or time.time() - row[0] > GENRE_INDEX_TTL_HOURS * 3600
+
+    # --- Refresco en segundo plano ---
+
+    def set_refresher(self, refresher):
+        """refresher(genre) consulta YouTube Music y llama a add() con los resultados"""
+        self._refresher = refresher
+
+    def _note_request(self, key, genre):
+        with self._lock:
+            self._requested[key] = (time.time(), genre)
+        if self.is_stale(genre):
+            self.request_refresh(genre)
+
+    def request_refresh(self, genre):
+        """Encola el refresco de un género (una sola vez aunque se pida varias)"""
+        if self._refresher is None:
+            return
+        key = genre_key(genre)
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._ensure_worker()
+        self._queue.put(genre)
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._refresh_loop, name="genre-index-refresh", daemon=True)
+                self._worker.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                genre = self._queue.get(timeout=GENRE_INDEX_REFRESH_INTERVAL_SECONDS)
+            except queue.Empty:
+                self._enqueue_stale()
+                continue
+            try:
+                started = time.time()
+                self._refresher(genre)
+                self.mark_refreshed(genre)
+                self._count("refreshes")
+                logger.info(f"[GENEROS] Género '{genre}' refrescado en {time.time() - started:.2f}s")
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"[GENEROS] Error refrescando el género '{genre}': {str(e)}")
+            finally:
+                with self._lock:
+                    self._queued.discard(genre_key(genre))
+
+    def _enqueue_stale(self):
+        # Géneros pedidos recientemente cuyos datos han caducado
+        now = time.time()
+        with self._lock:
+            recent = [genre for requested_at, genre in self._requested.values() if now - requested_at < RECENT_REQUEST_SECONDS]
+        for genre in recent:
+            try:
+                if self.is_stale(genre):
+                    self.request_refresh(genre)
+            except (sqlite3.Error, OSError):
+                break
+
+    def status(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["requested_genres"] = len(self._requested)
+            stats["pending_refreshes"] = len(self._queued)
+        try:
+            rows = self._connection().execute("SELECT kind, COUNT(*) FROM genre_items GROUP BY kind").fetchall()
+            stats["items"] = dict(rows)
+            stats["genres"] = self._connection().execute("SELECT COUNT(*) FROM genres").fetchone()[0]
+        except (sqlite3.Error, OSError):
+            stats["items"] = None
+        return stats
+
+
+genre_index = GenreIndex()
@@ -0,0 +1,19 @@
+"""
+Configuración de gunicorn (se carga sola al arrancar desde este directorio).
+
+Los hooks mantienen las métricas multiproceso de METRICS_DIR: al arrancar el
+maestro se borran los archivos de ejecuciones anteriores y, cuando un worker
+termina, su última instantánea se suma al total archivado.
+"""
+
+
+def on_starting(server):
+    from metrics import reset_metrics_dir
+
+    reset_metrics_dir()
+
+
+def child_exit(server, worker):
+    from metrics import archive_worker
+
+    archive_worker(worker.pid)
@@ -0,0 +1,232 @@
+"""
+Peticiones "hedged" a YouTube Music para recortar la cola de latencia.
+
+Para los métodos habilitados (HEDGE_METHODS), si una llamada no ha terminado
+cuando supera el percentil HEDGE_PERCENTILE de la latencia observada para ese
+método, se envía una copia y se devuelve la primera respuesta válida.
+
+La carga extra está limitada por un presupuesto: cada llamada aporta
+HEDGE_BUDGET_RATIO fichas y cada copia consume una, así que como mucho se
+duplica ese porcentaje de las llamadas.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+logger = logging.getLogger("youtube-music-api")
+
+# Configuración (se puede ajustar por variables de entorno). Vacío = desactivado
+HEDGE_METHODS = {m.strip() for m in os.environ.get("HEDGE_METHODS", "").split(",") if m.strip()}
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 95))
+HEDGE_BUDGET_RATIO = float(os.environ.get("HEDGE_BUDGET_RATIO", 0.1))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", 20))
+HEDGE_POOL_SIZE = int(os.environ.get("HEDGE_POOL_SIZE", 16))
+
+# Tamaño de la ventana de latencias por método y cada cuántas muestras se recalcula el umbral
+LATENCY_WINDOW = 256
+THRESHOLD_REFRESH = 16
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias de un método con percentil cacheado"""
+
+    def __init__(self, percentile=None, window=LATENCY_WINDOW):
+        self.percentile = HEDGE_PERCENTILE if percentile is None else percentile
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._threshold = None
+        self._since_refresh = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_refresh += 1
+            if self._since_refresh >= THRESHOLD_REFRESH or self._threshold is None:
+                self._refresh()
+
+    def _refresh(self):
+        self._since_refresh = 0
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            self._threshold = None
+            return
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        self._threshold = ordered[index]
+
+    @property
+    def threshold(self):
+        """Latencia (segundos) a partir de la cual se envía la copia; None si aún no hay datos"""
+        return self._threshold
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """Presupuesto de copias: HEDGE_BUDGET_RATIO fichas por llamada, una ficha por copia"""
+
+    def __init__(self, ratio=None, max_tokens=10.0):
+        self.ratio = HEDGE_BUDGET_RATIO if ratio is None else ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class _MethodStats:
+    __slots__ = ("tracker", "calls", "hedges", "hedge_wins", "budget_denied")
+
+    def __init__(self):
+        self.tracker = LatencyTracker()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+_budget = HedgeBudget()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_stats(name):
+    stats = _stats.get(name)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(name, _MethodStats())
+    return stats
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix="hedge")
+    return _executor
+
+
+def is_enabled(name):
+    return name in HEDGE_METHODS
+
+
+def _timed(stats, func, args, kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stats.tracker.record(time.perf_counter() - start)
+    return result
+
+
+def _submit(stats, func, args, kwargs):
+    # Cada copia corre con su propia copia del contexto (petición Flask, deadline...)
+    ctx = contextvars.copy_context()
+    return _get_executor().submit(ctx.run, _timed, stats, func, args, kwargs)
+
+
+def _start(stats, func, args, kwargs):
+    """
+    Lanza la llamada principal en un hilo propio, sin pasar por la cola del pool:
+    con el pool ocupado la espera contaría como latencia y provocaría copias
+    justo cuando YouTube Music va lento.
+    """
+    future = Future()
+    ctx = contextvars.copy_context()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(ctx.run(_timed, stats, func, args, kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+    return future
+
+
+def hedged_call(name, func, *args, **kwargs):
+    """Ejecuta func; si el método está habilitado y tarda más del umbral, envía una copia"""
+    stats = _get_stats(name)
+    with _stats_lock:
+        stats.calls += 1
+    if not is_enabled(name):
+        return _timed(stats, func, args, kwargs)
+
+    _budget.deposit()
+    threshold = stats.tracker.threshold
+    if threshold is None:
+        # Sin datos suficientes todavía: llamada directa midiendo latencia
+        return _timed(stats, func, args, kwargs)
+
+    primary = _start(stats, func, args, kwargs)
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+
+    if not _budget.try_spend():
+        with _stats_lock:
+            stats.budget_denied += 1
+        return primary.result()
+
+    logger.info(f"[HEDGE] '{name}' supera {threshold * 1000:.0f}ms, enviando copia")
+    hedge = _submit(stats, func, args, kwargs)
+    with _stats_lock:
+        stats.hedges += 1
+
+    pending = {primary, hedge}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            if error is None:
+                if future is hedge:
+                    with _stats_lock:
+                        stats.hedge_wins += 1
+                else:
+                    # La copia aún en la cola del pool ya no hace falta
+                    hedge.cancel()
+                return future.result()
+            if first_error is None:
+                first_error = error
+    raise first_error
+
+
+def hedging_status():
+    """Estadísticas de hedging por método para el endpoint /status"""
+    with _stats_lock:
+        methods = {
+            name: {
+                "enabled": is_enabled(name),
+                "calls": stats.calls,
+                "hedges_sent": stats.hedges,
+                "hedge_wins": stats.hedge_wins,
+                "budget_denied": stats.budget_denied,
+                "threshold_ms": (round(stats.tracker.threshold * 1000, 1) if stats.tracker.threshold is not None else None),
+                "samples": len(stats.tracker),
+            }
+            for name, stats in sorted(_stats.items())
+        }
+    return {
+        "enabled_methods": sorted(HEDGE_METHODS),
+        "percentile": HEDGE_PERCENTILE,
+        "budget_ratio": HEDGE_BUDGET_RATIO,
+        "methods": methods,
+    }
@@ -0,0 +1,128 @@
+"""
+Serialización JSON de la API.
+
+- Backend: orjson si está instalado (es opcional), si no el json de la
+  biblioteca estándar. JSON_BACKEND=stdlib fuerza el estándar.
+- FastJSONEncoder se instala como json_encoder de la app (Flask 2.0 no tiene
+  JSON providers), así que todos los jsonify pasan por el backend rápido y
+  mantienen el formato de Flask (fechas HTTP, JSON_SORT_KEYS).
+- SerializedCache guarda ya serializado el contenido de las entradas de
+  caché: un acierto se responde con esos bytes tal cual, sin json.load del
+  disco ni jsonify en cada petición.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+logger = logging.getLogger("youtube-music-api")
+
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto").lower()
+USE_ORJSON = orjson is not None and JSON_BACKEND in ("auto", "orjson")
+if JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning("JSON_BACKEND=orjson pero orjson no está instalado; se usa json estándar")
+
+# Bytes de respuestas serializadas que se guardan en memoria
+SERIALIZED_CACHE_MAX_BYTES = int(os.environ.get("SERIALIZED_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps_bytes(obj):
+    """JSON compacto en UTF-8 (bytes) con el backend más rápido disponible"""
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Tipos que orjson no admite (p. ej. enteros de más de 64 bits)
+            pass
+    return _stdlib_encoder.encode(obj).encode("utf-8")
+
+
+class FastJSONEncoder(JSONEncoder):
+    """JSONEncoder de Flask que serializa con orjson cuando está disponible"""
+
+    def encode(self, o):
+        if USE_ORJSON and self.indent is None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(o, default=self.default, option=option).decode("utf-8")
+            except TypeError:
+                pass
+        return super().encode(o)
+
+
+def install_json(app):
+    app.json_encoder = FastJSONEncoder
+    logger.info(f"Serialización JSON con {'orjson' if USE_ORJSON else 'json estándar'}")
+
+
+def json_response(body, status=200):
+    """Respuesta application/json con un cuerpo ya serializado"""
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+class SerializedCache:
+    """LRU acotada en bytes: clave de caché -> (marca de tiempo de la entrada, cuerpo serializado)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, max_age_seconds):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > max_age_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, body, timestamp):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (timestamp, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def status(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+serialized_cache = SerializedCache(SERIALIZED_CACHE_MAX_BYTES)
+
+
+def json_status():
+    return {"backend": "orjson" if USE_ORJSON else "stdlib", "serialized_cache": serialized_cache.status()}
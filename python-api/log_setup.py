@@ -0,0 +1,167 @@
+"""
+Configuración de logging del servicio.
+
+- Los registros se encolan (QueueHandler) y un hilo en segundo plano
+  (QueueListener) les da formato y los escribe, así que la petición no espera a
+  que se escriba en la consola. Si la cola se llena, los registros se descartan
+  y se cuentan en lugar de bloquear. El hilo se arranca con el primer registro
+  de cada proceso, así que también funciona en los workers de gunicorn --preload.
+- log_item() es para los diagnósticos por elemento de los bucles calientes
+  (un log por track, por miniatura...): el mensaje se formatea solo si se va a
+  emitir (estilo %), cada etiqueta se muestrea a LOG_SAMPLE_PER_SECOND
+  registros por segundo y, con LOG_ITEM_DIAGNOSTICS desactivado (por defecto
+  con FLASK_ENV=production), se descartan sin coste.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger("youtube-music-api")
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Escritura de logs en un hilo aparte (desactivar para depurar con el servidor de desarrollo)
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Diagnósticos por elemento: activados en desarrollo, desactivados en producción
+LOG_ITEM_DIAGNOSTICS = os.environ.get(
+    "LOG_ITEM_DIAGNOSTICS", "false" if os.environ.get("FLASK_ENV") == "production" else "true"
+).lower() in ("1", "true", "yes")
+# Registros por segundo que se emiten como máximo por etiqueta en log_item
+LOG_SAMPLE_PER_SECOND = int(os.environ.get("LOG_SAMPLE_PER_SECOND", 5))
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloquea: con la cola llena descarta el registro"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Solo se resuelve el mensaje (los args pueden cambiar después); la fecha,
+        # el nivel y el resto del formato se aplican en el hilo del listener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        _ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TagSampler:
+    """Deja pasar como mucho per_second registros por segundo y etiqueta"""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+
+    def allow(self, tag):
+        now = int(time.monotonic())
+        skipped = 0
+        with self._lock:
+            window, count, dropped = self._windows.get(tag, (now, 0, 0))
+            if window != now:
+                skipped = dropped
+                window, count, dropped = now, 0, 0
+            allowed = count < self.per_second
+            if allowed:
+                count += 1
+            else:
+                dropped += 1
+                self.sampled_out += 1
+            self._windows[tag] = (window, count, dropped)
+        if skipped:
+            logger.info("[%s] %d diagnósticos omitidos por muestreo en el último segundo", tag, skipped)
+        return allowed
+
+
+_sampler = TagSampler(LOG_SAMPLE_PER_SECOND)
+_queue_handler = None
+_stream_handler = None
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def log_item(tag, message, *args, level=logging.INFO):
+    """
+    Diagnóstico por elemento para bucles calientes: log_item("RASTREO-PLAYLIST", "Artista: '%s'", name).
+    Los args solo se formatean si el registro se emite.
+    """
+    if not LOG_ITEM_DIAGNOSTICS or not logger.isEnabledFor(level) or not _sampler.allow(tag):
+        return
+    logger.log(level, "[" + tag + "] " + message, *args)
+
+
+def configure_logging():
+    """Configura el logging raíz (sustituye a logging.basicConfig); idempotente"""
+    global _queue_handler, _stream_handler
+    root = logging.getLogger()
+    # Igual que basicConfig: si ya hay handlers configurados no se toca nada
+    if root.handlers:
+        return
+    root.setLevel(LOG_LEVEL)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    if not LOG_ASYNC:
+        root.addHandler(handler)
+        return
+
+    _stream_handler = handler
+    _queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    root.addHandler(_queue_handler)
+
+
+def _ensure_listener():
+    # Un hilo por proceso; se arranca con el primer registro del proceso porque
+    # los hilos no sobreviven al fork de gunicorn (--preload)
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        if _listener_pid is None:
+            atexit.register(stop_logging)
+        else:
+            # Proceso hijo: la cola heredada puede tener registros del padre o un lock tomado
+            _queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, _stream_handler, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def stop_logging():
+    """Vacía la cola de logs y detiene el hilo de escritura de este proceso"""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener = None
+
+
+def logging_status():
+    return {
+        "async": _queue_handler is not None,
+        "level": LOG_LEVEL,
+        "item_diagnostics": LOG_ITEM_DIAGNOSTICS,
+        "sample_per_second": LOG_SAMPLE_PER_SECOND,
+        "sampled_out": _sampler.sampled_out,
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped if _queue_handler is not None else 0,
+    }
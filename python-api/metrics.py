@@ -0,0 +1,450 @@
+"""
+Métricas del servicio en formato Prometheus (/metrics).
+
+- Peticiones por ruta, método y estado (contador e histograma de latencia) y
+  peticiones en curso.
+- Llamadas a YouTube Music por método y resultado (histograma), registradas
+  por la capa upstream.
+- Aciertos, fallos y usos de caché antigua por espacio de nombres.
+- Identidad del worker (pid, host, arranque).
+
+Cada hilo escribe en su propio fragmento, con un lock que solo se disputa
+cuando se exporta; al exportar se suman los fragmentos. Con gunicorn cada
+worker es un proceso: un hilo guarda cada METRICS_FLUSH_SECONDS una instantánea
+del proceso en METRICS_DIR/metrics_<pid>.json y /metrics, lo atienda el worker
+que lo atienda, guarda la suya y suma todos los archivos, así que los
+contadores no retroceden entre scrapes.
+
+Los hooks de gunicorn.conf.py vacían METRICS_DIR al arrancar el maestro y,
+cuando un worker termina, suman su última instantánea al total archivado
+(archived.json) y borran su archivo. Contadores e histogramas incluyen los
+workers que ya terminaron; las peticiones en curso y worker_info solo los vivos.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin gunicorn no hay varios workers que coordinar
+    fcntl = None
+
+from flask import Response, request
+
+logger = logging.getLogger("youtube-music-api")
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "metrics"))
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "http_requests_total": ("counter", "Peticiones HTTP atendidas"),
+    "http_request_duration_seconds": ("histogram", "Duración de las peticiones HTTP"),
+    "http_requests_in_flight": ("gauge", "Peticiones HTTP en curso"),
+    "ytmusic_upstream_duration_seconds": ("histogram", "Duración de las llamadas a YouTube Music"),
+    "cache_requests_total": ("counter", "Consultas a la caché por resultado"),
+    "worker_info": ("gauge", "Workers vivos del servicio"),
+}
+
+HOSTNAME = socket.gethostname()
+STARTED_AT = time.time()
+
+
+class _Shard:
+    """Métricas de un solo hilo: solo él escribe; el lock solo compite con la exportación"""
+
+    __slots__ = ("thread", "counters", "histograms", "in_flight", "lock")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        # Fragmentos de hilos que ya terminaron, ya sumados
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+                if len(self._shards) % 64 == 0:
+                    self._retire_dead()
+        return shard
+
+    def inc(self, name, labels, value=1):
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            shard.counters[key] = shard.counters.get(key, 0) + value
+
+    def observe(self, name, labels, seconds):
+        shard = self._shard()
+        key = (name, labels)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with shard.lock:
+            histogram = shard.histograms.get(key)
+            if histogram is None:
+                # [cubetas..., +Inf, suma]
+                histogram = shard.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+
+    def add_in_flight(self, delta):
+        shard = self._shard()
+        with shard.lock:
+            shard.in_flight += delta
+
+    def _retire_dead(self):
+        # Requiere self._lock
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                _merge(self._retired, shard)
+        self._shards = alive
+
+    def snapshot(self):
+        """Suma de todos los fragmentos del proceso"""
+        total = _Shard(None)
+        with self._lock:
+            self._retire_dead()
+            _merge(total, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            _merge(total, shard)
+        return {
+            "pid": os.getpid(),
+            "hostname": HOSTNAME,
+            "started": _process_started,
+            "in_flight": total.in_flight,
+            "counters": [[name, list(labels), value] for (name, labels), value in total.counters.items()],
+            "histograms": [[name, list(labels), values] for (name, labels), values in total.histograms.items()],
+        }
+
+
+def _merge(target, shard):
+    # El hilo dueño puede estar escribiendo: se copia bajo su lock
+    with shard.lock:
+        counters = list(shard.counters.items())
+        histograms = [(key, list(values)) for key, values in shard.histograms.items()]
+        in_flight = shard.in_flight
+    for key, value in counters:
+        target.counters[key] = target.counters.get(key, 0) + value
+    for key, values in histograms:
+        current = target.histograms.get(key)
+        if current is None:
+            target.histograms[key] = values
+        else:
+            for i, value in enumerate(values):
+                current[i] += value
+    target.in_flight += in_flight
+
+
+registry = Registry()
+
+
+def observe_upstream(method, outcome, seconds):
+    if METRICS_ENABLED:
+        registry.observe("ytmusic_upstream_duration_seconds", (("method", method), ("outcome", outcome)), seconds)
+
+
+def count_cache(namespace, result):
+    if METRICS_ENABLED:
+        registry.inc("cache_requests_total", (("namespace", namespace), ("result", result)))
+
+
+# --- Multiproceso ---
+
+ARCHIVE_FILE = "archived.json"
+ARCHIVE_LOCK_FILE = "archived.lock"
+
+# Arranque del proceso actual (con --preload STARTED_AT es el del maestro)
+_process_started = STARTED_AT
+_import_pid = os.getpid()
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f"metrics_{pid}.json")
+
+
+def _is_snapshot_name(name):
+    return name.startswith("metrics_") and name.endswith(".json") and name[8:-5].isdigit()
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    # Archivo temporal propio del hilo: el volcado periódico y el de /metrics pueden coincidir
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _archive_lock():
+    """Lock entre procesos (el maestro y los workers) para modificar el archivo"""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(os.path.join(METRICS_DIR, ARCHIVE_LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def reset_metrics_dir():
+    """Borra las instantáneas y el total archivado de ejecuciones anteriores"""
+    try:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        return
+    removed = 0
+    for name in names:
+        if _is_snapshot_name(name) or name == ARCHIVE_FILE or name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(METRICS_DIR, name))
+                removed += 1
+            except OSError:
+                pass
+    if removed:
+        logger.info(f"[METRICAS] Borrados {removed} archivos de métricas de ejecuciones anteriores")
+
+
+def archive_worker(pid):
+    """
+    Suma la última instantánea de un worker terminado al total archivado y borra
+    su archivo, para que un worker nuevo con el mismo pid no la sobrescriba.
+    """
+    path = _snapshot_path(pid)
+    try:
+        with _archive_lock():
+            snapshot = _read_json(path)
+            if snapshot is None:
+                return
+            archive_path = os.path.join(METRICS_DIR, ARCHIVE_FILE)
+            archive = _read_json(archive_path) or {"counters": [], "histograms": [], "archived": []}
+            identity = [snapshot["pid"], snapshot["started"]]
+            if identity not in archive["archived"]:
+                counters, histograms = _sum_snapshots([archive, snapshot])
+                archive = {
+                    "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+                    "histograms": [[name, list(labels), values] for (name, labels), values in histograms.items()],
+                    "archived": archive["archived"] + [identity],
+                }
+                # Primero el total y después el borrado: quien lea entre medias ve el
+                # worker como archivado y no lo cuenta dos veces
+                _write_json(archive_path, archive)
+            os.remove(path)
+    except OSError as e:
+        logger.warning(f"[METRICAS] No se pudo archivar la instantánea del worker {pid}: {str(e)}")
+
+
+def flush_snapshot(snapshot=None):
+    """Guarda la instantánea de este proceso para que la lean los demás workers"""
+    if _flusher_pid != os.getpid():
+        # Proceso que no ha atendido peticiones (p. ej. un script que solo importa la app)
+        return
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_json(_snapshot_path(os.getpid()), snapshot or registry.snapshot())
+    except OSError as e:
+        logger.warning(f"[METRICAS] No se pudo guardar la instantánea: {str(e)}")
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        flush_snapshot()
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _ensure_flusher():
+    # Un hilo por proceso; se arranca en la primera petición del worker porque
+    # los hilos no sobreviven al fork de gunicorn (--preload)
+    global _flusher_pid, _process_started
+    if _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        if _flusher_pid is None:
+            atexit.register(flush_snapshot)
+        if os.getpid() != _import_pid:
+            _process_started = time.time()
+        # Un archivo con nuestro pid es de un worker anterior que no se llegó a archivar
+        if os.path.exists(_snapshot_path(os.getpid())):
+            archive_worker(os.getpid())
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _other_snapshots():
+    """Instantáneas de los demás workers más el total archivado de los que terminaron"""
+    try:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        return []
+    own = os.path.basename(_snapshot_path(os.getpid()))
+    snapshots = []
+    for name in names:
+        if _is_snapshot_name(name) and name != own:
+            snapshot = _read_json(os.path.join(METRICS_DIR, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+    # El total archivado se lee después: si un worker se archiva mientras tanto,
+    # su archivo ya leído queda marcado y no se cuenta dos veces
+    archive = _read_json(os.path.join(METRICS_DIR, ARCHIVE_FILE))
+    if archive is None:
+        return snapshots
+    archived = {tuple(identity) for identity in archive["archived"]}
+    return [snapshot for snapshot in snapshots if (snapshot["pid"], snapshot["started"]) not in archived] + [archive]
+
+
+def _sum_snapshots(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            current = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                current[i] += value
+    return counters, histograms
+
+
+# --- Exportación ---
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def render_metrics():
+    """Texto de exposición de Prometheus con las métricas de todos los workers"""
+    # La instantánea propia se guarda antes de leer las demás: el scrape siguiente,
+    # lo atienda quien lo atienda, parte como mínimo de estos valores
+    own = registry.snapshot()
+    flush_snapshot(own)
+    snapshots = [own] + _other_snapshots()
+    counters, histograms = _sum_snapshots(snapshots)
+    lines = []
+    workers = [
+        snapshot
+        for snapshot in snapshots
+        if "pid" in snapshot and (snapshot["pid"] == os.getpid() or _pid_alive(snapshot["pid"]))
+    ]
+
+    def header(name):
+        kind, text = HELP[name]
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for metric in ("http_requests_total", "cache_requests_total"):
+        header(metric)
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{name}{_labels_text(labels)} {value}")
+
+    for metric in ("http_request_duration_seconds", "ytmusic_upstream_duration_seconds"):
+        header(metric)
+        for (name, labels), values in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels_text(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {values[-1]:.6f}")
+            lines.append(f"{name}_count{_labels_text(labels)} {cumulative}")
+
+    header("http_requests_in_flight")
+    for snapshot in workers:
+        lines.append(f"http_requests_in_flight{_labels_text((('pid', snapshot['pid']),))} {snapshot['in_flight']}")
+    header("worker_info")
+    for snapshot in workers:
+        labels = (("pid", snapshot["pid"]), ("hostname", snapshot["hostname"]), ("started", int(snapshot["started"])))
+        lines.append(f"worker_info{_labels_text(labels)} 1")
+    return "\n".join(lines) + "\n"
+
+
+def install_metrics(app):
+    """Registra la medición de peticiones, la ruta /metrics y el volcado multiproceso"""
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def _start_request():
+        _ensure_flusher()
+        request.environ["metrics.start"] = time.perf_counter()
+        registry.add_in_flight(1)
+
+    @app.after_request
+    def _record_request(response):
+        start = request.environ.get("metrics.start")
+        if start is not None:
+            labels = (
+                ("route", request.url_rule.rule if request.url_rule else "unmatched"),
+                ("method", request.method),
+                ("status", str(response.status_code)),
+            )
+            registry.inc("http_requests_total", labels)
+            registry.observe("http_request_duration_seconds", labels, time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def _end_request(exc=None):
+        if request.environ.pop("metrics.start", None) is not None:
+            registry.add_in_flight(-1)
+
+    app.add_url_rule("/metrics", "metrics", lambda: Response(render_metrics(), mimetype="text/plain; version=0.0.4"))
@@ -0,0 +1,245 @@
+"""
+Modelos compactos (con __slots__) para tracks, artistas y álbumes normalizados.
+
+Cada modelo tiene un camino rápido para la forma estándar de ytmusicapi
+(videoId/browseId, artists[].name, thumbnails con dimensiones). Las heurísticas
+que recorren todas las claves del dict (IDs alternativos, campos de artista o
+de imagen con otros nombres) solo se ejecutan si ese camino no basta.
+
+to_dict() construye directamente el dict que se serializa a JSON en la
+respuesta, sin pasos intermedios.
+"""
+
+import logging
+
+from log_setup import log_item
+from thumbnails import get_best_thumbnail
+
+logger = logging.getLogger("youtube-music-api")
+
+UNKNOWN_ARTIST = "Artista desconocido"
+# Longitud mínima de un ID de video válido
+MIN_ID_LENGTH = 5
+
+
+def parse_duration_seconds(item, duration=None):
+    """Duración en segundos (0 si no se conoce); duration es el valor original si no está en item["duration"]"""
+    if item.get("duration_seconds"):
+        return int(item["duration_seconds"])
+    if duration is None:
+        duration = item.get("duration", "")
+    if isinstance(duration, str):
+        if ":" not in duration:
+            return 0
+        seconds = 0
+        try:
+            for part in duration.split(":"):
+                seconds = seconds * 60 + int(part)
+        except ValueError:
+            return 0
+        return seconds
+    if isinstance(duration, (int, float)):
+        return int(duration)
+    return 0
+
+
+def _valid_id(value):
+    return isinstance(value, str) and value != "default" and len(value) >= MIN_ID_LENGTH
+
+
+def _valid_thumbnail(thumbnail):
+    return isinstance(thumbnail, str) and len(thumbnail) > 10 and "default" not in thumbnail
+
+
+def first_artist(item):
+    """Nombre del primer artista de un resultado de ytmusicapi (tal cual lo devuelve la búsqueda)"""
+    artists = item.get("artists")
+    if artists and isinstance(artists[0], dict):
+        return artists[0].get("name", UNKNOWN_ARTIST)
+    return UNKNOWN_ARTIST
+
+
+def _first_artist_name(artists):
+    for artist in artists:
+        if isinstance(artist, dict) and artist.get("name"):
+            return artist["name"]
+    return ""
+
+
+# --- Heurísticas del camino lento ---
+
+
+def _fallback_track_id(track):
+    track_id = track.get("videoId", "")
+    if not track_id:
+        # Sin videoId: solo se acepta el campo 'id' como alternativa
+        alternative = track.get("id")
+        if alternative and alternative != "default" and len(alternative) > MIN_ID_LENGTH:
+            return alternative
+        return track_id
+
+    # Intentar buscar un ID alternativo en otros campos
+    if track.get("id") and track["id"] != "default" and track["id"] != track_id and len(track["id"]) > MIN_ID_LENGTH:
+        return track["id"]
+    if track.get("browseId") and track["browseId"] != "default" and len(track["browseId"]) > MIN_ID_LENGTH:
+        return track["browseId"]
+    for key, value in track.items():
+        if isinstance(value, str) and "id" in key.lower() and value != "default" and len(value) > MIN_ID_LENGTH:
+            return value
+
+    # Generar un ID basado en título y artista para garantizar que haya un valor
+    title = track.get("title", "unknown")
+    artist = track.get("artist", track.get("author", "unknown"))
+    track_id = f"gen_{hash(title + artist) % 10000000:07d}"
+    log_item("NORMALIZE", "Track '%s' sin ID de video válido, usando ID generado %s", title, track_id, level=logging.WARNING)
+    return track_id
+
+
+def _fallback_artist(track, default_artist):
+    if isinstance(track.get("artists"), list):
+        artist = _first_artist_name(track["artists"])
+        if artist:
+            return artist
+    if track.get("artist"):
+        return track["artist"]
+    if track.get("author"):
+        return track["author"]
+    if isinstance(track.get("authors"), list):
+        artist = _first_artist_name(track["authors"])
+        if artist:
+            return artist
+    artist_info = track.get("artistInfo")
+    if isinstance(artist_info, dict) and artist_info.get("artist"):
+        return artist_info["artist"]
+    # Cualquier campo que contenga 'artist' en su nombre
+    for key, value in track.items():
+        if "artist" in key.lower() and value and isinstance(value, str):
+            return value
+    return default_artist or UNKNOWN_ARTIST
+
+
+def _fallback_thumbnail(track):
+    for key in ("thumbnail", "cover", "albumArt"):
+        value = track.get(key)
+        if isinstance(value, str) and len(value) > 10:
+            return value
+    # Cualquier campo que parezca contener una URL de imagen
+    for key, value in track.items():
+        if isinstance(value, str) and value.startswith("http") and len(value) > 10:
+            lower_key = key.lower()
+            if "image" in lower_key or "thumbnail" in lower_key or "cover" in lower_key:
+                return value
+    return None
+
+
+class Track:
+    __slots__ = ("id", "title", "artist", "thumbnail", "duration", "duration_text", "source")
+
+    def __init__(self, id, title, artist, thumbnail, duration=0, duration_text="", source="youtube_music"):
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.thumbnail = thumbnail
+        self.duration = duration
+        self.duration_text = duration_text
+        self.source = source
+
+    @classmethod
+    def from_ytmusic(cls, track, default_artist="", source=None):
+        """Track normalizado a partir de un dict de ytmusicapi; None si el dict está vacío"""
+        if not track:
+            return None
+
+        # Camino rápido: videoId y artists[].name estándar
+        track_id = track.get("videoId")
+        artists = track.get("artists")
+        artist = _first_artist_name(artists) if isinstance(artists, list) else ""
+        if not _valid_id(track_id):
+            track_id = _fallback_track_id(track)
+        if not artist:
+            artist = _fallback_artist(track, default_artist)
+
+        thumbnail = get_best_thumbnail(track.get("thumbnails", []))
+        if not _valid_thumbnail(thumbnail):
+            thumbnail = _fallback_thumbnail(track) or thumbnail
+            if not _valid_thumbnail(thumbnail) and track_id != "default":
+                # Sin miniatura utilizable: la de YouTube a partir del ID del video
+                thumbnail = f"https://img.youtube.com/vi/{track_id}/hqdefault.jpg"
+
+        duration = track.get("duration", track.get("length", ""))
+        log_item("NORMALIZE", "Track '%s' -> id=%s, artista='%s'", track.get("title"), track_id, artist, level=logging.DEBUG)
+        return cls(
+            track_id,
+            track.get("title", "Sin título"),
+            artist,
+            thumbnail,
+            parse_duration_seconds(track, duration),
+            duration,
+            source or track.get("source", "youtube_music"),
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "artist": self.artist,
+            "thumbnail": self.thumbnail,
+            "duration": self.duration,  # Siempre en segundos
+            "duration_text": self.duration_text,  # Formato original para referencia
+            "source": self.source,
+        }
+
+
+class Artist:
+    __slots__ = ("browse_id", "name", "thumbnails")
+
+    def __init__(self, browse_id, name, thumbnails):
+        self.browse_id = browse_id
+        self.name = name
+        self.thumbnails = thumbnails
+
+    @classmethod
+    def from_ytmusic(cls, item):
+        return cls(item.get("browseId", ""), item.get("title", "Sin nombre"), item.get("thumbnails", []))
+
+    def to_dict(self, region, language):
+        return {
+            "browseId": self.browse_id,
+            "title": self.name,
+            "name": self.name,  # Duplicado para compatibilidad
+            "thumbnails": self.thumbnails,
+            "region": region,
+            "language": language,
+        }
+
+
+class Album:
+    __slots__ = ("browse_id", "title", "artist", "year", "thumbnails")
+
+    def __init__(self, browse_id, title, artist, year, thumbnails):
+        self.browse_id = browse_id
+        self.title = title
+        self.artist = artist
+        self.year = year
+        self.thumbnails = thumbnails
+
+    @classmethod
+    def from_ytmusic(cls, item):
+        return cls(
+            item.get("browseId", ""),
+            item.get("title", "Sin título"),
+            first_artist(item),
+            item.get("year", ""),
+            item.get("thumbnails", []),
+        )
+
+    def to_dict(self, region, language):
+        return {
+            "browseId": self.browse_id,
+            "title": self.title,
+            "thumbnails": self.thumbnails,
+            "artist": self.artist,
+            "year": self.year,
+            "region": region,
+            "language": language,
+        }
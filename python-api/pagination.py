@@ -0,0 +1,105 @@
+"""
+Paginación con cursores opacos.
+
+Una consulta paginable (una búsqueda, una watch playlist, una sección de
+artista) guarda en caché la ventana de resultados ya obtenida de YouTube
+Music, con una sola entrada por consulta sin importar el tamaño de página.
+Las páginas que caen dentro de la ventana se sirven desde la caché; pedir una
+página más allá amplía la ventana con una sola llamada a YouTube Music, que
+como mínimo duplica lo obtenido para que pasar páginas no cueste una llamada
+por página.
+
+El cursor es base64 de los parámetros de la consulta, el desplazamiento y el
+tamaño de página: si la ventana ha caducado se vuelve a obtener sin más.
+"""
+
+import base64
+import hashlib
+import json
+import os
+
+from flask import request
+
+# Tamaño de página máximo y resultados máximos que se obtienen por consulta
+PAGE_MAX_SIZE = int(os.environ.get("PAGE_MAX_SIZE", 100))
+PAGE_MAX_WINDOW = int(os.environ.get("PAGE_MAX_WINDOW", 500))
+# Cuánto crece la ventana cuando hay que pedir más resultados
+PAGE_WINDOW_GROWTH = 2
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(params, offset, page_size):
+    raw = json.dumps({"p": params, "o": offset, "n": page_size}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(params, offset, page_size) de un cursor; CursorError si no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw.decode("utf-8"))
+        params, offset, page_size = data["p"], int(data["o"]), int(data["n"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise CursorError("Cursor no válido")
+    if not isinstance(params, dict) or offset < 0 or not 0 < page_size <= PAGE_MAX_SIZE:
+        raise CursorError("Cursor no válido")
+    return params, offset, page_size
+
+
+def page_args(default_page_size=20):
+    """
+    Parámetros de paginación de la petición: (params del cursor o None, offset,
+    page_size), o None si la petición no pide paginación (ni cursor ni pageSize).
+    """
+    cursor = request.args.get("cursor")
+    if cursor:
+        return decode_cursor(cursor)
+    if "pageSize" not in request.args:
+        return None
+    page_size = request.args.get("pageSize", type=int, default=default_page_size)
+    if not page_size or not 0 < page_size <= PAGE_MAX_SIZE:
+        raise CursorError(f"pageSize debe estar entre 1 y {PAGE_MAX_SIZE}")
+    return None, 0, page_size
+
+
+class PagedSource:
+    """
+    Resultados paginables de un tipo de consulta.
+    fetch(params, count) devuelve hasta count resultados desde el principio (None
+    si falló); load_state(key) y save_state(key, state) leen y guardan la ventana.
+    """
+
+    def __init__(self, name, fetch, load_state, save_state):
+        self.name = name
+        self.fetch = fetch
+        self.load_state = load_state
+        self.save_state = save_state
+
+    def state_key(self, params):
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+        return f"pages_{self.name}_{digest}"
+
+    def page(self, params, offset, page_size):
+        """{"items": [...], "nextCursor": cursor o None}; None si no se pudo obtener nada"""
+        key = self.state_key(params)
+        state = self.load_state(key) or {"items": [], "exhausted": False}
+        items, exhausted = state["items"], state["exhausted"]
+        end = offset + page_size
+
+        if len(items) < end and not exhausted:
+            target = min(max(end, len(items) * PAGE_WINDOW_GROWTH), PAGE_MAX_WINDOW)
+            fetched = self.fetch(params, target)
+            if fetched is None:
+                if not items:
+                    return None
+            else:
+                items = list(fetched)
+                exhausted = len(items) < target or target >= PAGE_MAX_WINDOW
+                self.save_state(key, {"items": items, "exhausted": exhausted})
+
+        page = items[offset:end]
+        has_more = bool(page) and (end < len(items) or not exhausted)
+        return {"items": page, "nextCursor": encode_cursor(params, end, page_size) if has_more else None}
@@ -0,0 +1,105 @@
+"""
+Proyección de campos de las respuestas (parámetro fields).
+
+fields es una lista de rutas separadas por comas; cada ruta recorre claves con
+puntos y las listas se recorren elemento a elemento:
+
+    /api/watch-playlist?videoId=...&fields=tracks.videoId,tracks.title,tracks.artists.name
+
+Solo se devuelven las claves pedidas; una ruta que acaba en un objeto o una
+lista lo devuelve completo. Con thumbnails=best cada lista de miniaturas se
+reduce a una sola entrada con la mejor URL (la misma que usa el resto de la
+API), aunque no se pida fields.
+
+La especificación se compila una vez a un árbol de claves y se memoiza, así
+que aplicarla es un único recorrido de la respuesta antes de serializarla.
+"""
+
+import re
+from functools import lru_cache
+
+from flask import request
+
+from server_timing import span
+from thumbnails import get_best_thumbnail
+
+# Rutas distintas que se recuerdan compiladas
+PROJECTION_CACHE_SIZE = 256
+MAX_FIELDS = 64
+
+_SEGMENT_RE = re.compile(r"^[A-Za-z0-9_]+$")
+_THUMBNAIL_MODES = ("all", "best")
+
+
+class Projection:
+    """Selector compilado: tree es {clave: subárbol} o None para no filtrar"""
+
+    __slots__ = ("tree", "best_thumbnails")
+
+    def __init__(self, tree, best_thumbnails=False):
+        self.tree = tree
+        self.best_thumbnails = best_thumbnails
+
+    def apply(self, data):
+        return self._apply(data, self.tree)
+
+    def _apply(self, value, tree):
+        if isinstance(value, list):
+            return [self._apply(item, tree) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if tree is None:
+            if not self.best_thumbnails:
+                return value
+            return {key: self._value(key, item, None) for key, item in value.items()}
+        return {key: self._value(key, value[key], subtree) for key, subtree in tree.items() if key in value}
+
+    def _value(self, key, value, tree):
+        if self.best_thumbnails and key == "thumbnails" and isinstance(value, list):
+            return [{"url": get_best_thumbnail(value)}] if value else []
+        return self._apply(value, tree)
+
+
+def _compile_tree(fields):
+    tree = {}
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+    if len(paths) > MAX_FIELDS:
+        raise ValueError(f"Máximo {MAX_FIELDS} campos en 'fields'")
+    for path in paths:
+        segments = path.split(".")
+        if not all(_SEGMENT_RE.match(segment) for segment in segments):
+            raise ValueError(f"Campo no válido en 'fields': {path}")
+        node = tree
+        for segment in segments[:-1]:
+            child = node.get(segment, {})
+            if child is None:
+                # Ya se pidió el objeto completo
+                break
+            node[segment] = child
+            node = child
+        else:
+            node[segments[-1]] = None
+    return tree or None
+
+
+@lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def compile_projection(fields=None, thumbnails="all"):
+    """Compila fields y el modo de miniaturas; ValueError si no son válidos"""
+    if thumbnails not in _THUMBNAIL_MODES:
+        raise ValueError(f"'thumbnails' debe ser uno de: {', '.join(_THUMBNAIL_MODES)}")
+    tree = _compile_tree(fields) if fields else None
+    if tree is None and thumbnails == "all":
+        return None
+    return Projection(tree, thumbnails == "best")
+
+
+def projection_from_request():
+    """Projection de los parámetros fields/thumbnails de la petición, o None si no se piden"""
+    return compile_projection(request.args.get("fields") or None, request.args.get("thumbnails", "all"))
+
+
+def project(data, projection):
+    if projection is None:
+        return data
+    with span("projection"):
+        return projection.apply(data)
@@ -0,0 +1,52 @@
+"""
+Limitador de tasa (token bucket) para las llamadas a YouTube Music que se
+lanzan en ráfaga, como las resoluciones por lotes de /api/find-tracks.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from deadlines import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger("youtube-music-api")
+
+# Configuración (se puede ajustar por variables de entorno)
+UPSTREAM_RATE_PER_SECOND = float(os.environ.get("UPSTREAM_RATE_PER_SECOND", 10))
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", 10))
+
+
+class RateLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Espera hasta obtener una ficha; lanza DeadlineExceeded si la petición se queda sin tiempo"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+
+            remaining = remaining_time()
+            if remaining is not None and wait_time >= remaining:
+                raise DeadlineExceeded("Deadline agotado esperando al limitador de YouTube Music")
+            time.sleep(wait_time)
+
+
+# Limitador compartido por las operaciones por lotes
+upstream_limiter = RateLimiter(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST)
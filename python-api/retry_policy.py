@@ -0,0 +1,168 @@
+"""
+Política de reintentos para las llamadas a YouTube Music.
+
+Reemplaza los reintentos con time.sleep() fijos por un motor común que:
+
+- clasifica cada error como reintentable o no (los errores de esquema, como el
+  KeyError de musicImmersiveHeaderRenderer, nunca se reintentan);
+- espera con backoff exponencial y jitter completo;
+- descuenta los reintentos y el tiempo de espera de un presupuesto por petición,
+  de modo que una petición nunca retiene al worker más de RETRY_BUDGET_SECONDS
+  esperando reintentos, aunque haga muchas llamadas a YouTube Music.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from flask import g, has_request_context
+
+from circuit_breaker import CircuitOpenError
+from deadlines import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger("youtube-music-api")
+
+# Tipos de error
+RETRYABLE = "retryable"
+SCHEMA = "schema"
+FATAL = "fatal"
+
+# Configuración (se puede ajustar por variables de entorno)
+MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", 3))
+BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", 0.1))
+MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", 1.0))
+# Presupuesto por petición: reintentos totales y segundos totales de espera
+RETRY_BUDGET_RETRIES = int(os.environ.get("RETRY_BUDGET_RETRIES", 4))
+RETRY_BUDGET_SECONDS = float(os.environ.get("RETRY_BUDGET_SECONDS", 1.0))
+
+# Errores producidos al recorrer una respuesta con una estructura inesperada
+SCHEMA_ERRORS = (KeyError, IndexError, TypeError, AttributeError)
+
+
+def classify_error(error):
+    """Clasifica un error de YouTube Music como RETRYABLE, SCHEMA o FATAL"""
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        return FATAL
+    if isinstance(error, SCHEMA_ERRORS):
+        return SCHEMA
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return RETRYABLE
+    if isinstance(error, json.JSONDecodeError):
+        # Respuesta truncada o página de error en lugar de JSON
+        return RETRYABLE
+
+    message = str(error)
+    if message.startswith("Server returned HTTP"):
+        if message.startswith("Server returned HTTP 5") or message.startswith("Server returned HTTP 429"):
+            return RETRYABLE
+        return FATAL
+    return FATAL
+
+
+class RetryBudget:
+    """Presupuesto de reintentos compartido por todas las llamadas de una petición"""
+
+    def __init__(self, max_retries=None, max_seconds=None):
+        self.retries_left = RETRY_BUDGET_RETRIES if max_retries is None else max_retries
+        self.seconds_left = RETRY_BUDGET_SECONDS if max_seconds is None else max_seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, delay):
+        """Reserva un reintento con la espera indicada; devuelve la espera concedida o None"""
+        with self._lock:
+            if self.retries_left <= 0 or self.seconds_left <= 0:
+                return None
+            granted = min(delay, self.seconds_left)
+            self.retries_left -= 1
+            self.seconds_left -= granted
+            return granted
+
+
+def get_request_budget():
+    """Devuelve el presupuesto de la petición actual (o uno nuevo fuera de una petición)"""
+    if not has_request_context():
+        return RetryBudget()
+    budget = getattr(g, "retry_budget", None)
+    if budget is None:
+        budget = RetryBudget()
+        g.retry_budget = budget
+    return budget
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        self.max_attempts = max_attempts or MAX_ATTEMPTS
+        self.base_delay = BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = MAX_DELAY if max_delay is None else max_delay
+
+        self._lock = threading.Lock()
+        self._stats = {"retries": 0, "schema_errors": 0, "budget_exhausted": 0, "gave_up": 0}
+
+    def backoff(self, attempt):
+        """Backoff exponencial con jitter completo para el intento indicado (0 = primer reintento)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def execute(self, name, func, *args, **kwargs):
+        """Ejecuta func aplicando la política; propaga el último error si no se puede reintentar"""
+        budget = None
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == SCHEMA:
+                    self._count("schema_errors")
+                    logger.warning(f"[RETRY] '{name}': error de estructura, no se reintenta: {type(e).__name__}: {e}")
+                    raise
+                if kind != RETRYABLE:
+                    raise
+                if attempt + 1 >= self.max_attempts:
+                    self._count("gave_up")
+                    raise
+
+                delay = self.backoff(attempt)
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    logger.warning(f"[RETRY] '{name}': no queda tiempo en el deadline de la petición, sin reintentar")
+                    raise
+
+                if budget is None:
+                    budget = get_request_budget()
+                delay = budget.acquire(delay)
+                if delay is None:
+                    self._count("budget_exhausted")
+                    logger.warning(f"[RETRY] '{name}': presupuesto de reintentos agotado, sin reintentar")
+                    raise
+
+                self._count("retries")
+                logger.info(f"[RETRY] '{name}': intento {attempt + 1}/{self.max_attempts} falló ({e}), reintento en {delay:.2f}s")
+                if delay > 0:
+                    time.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+# Política por defecto para todas las llamadas a YouTube Music
+default_policy = RetryPolicy()
+
+
+def retry_status():
+    """Estadísticas de reintentos para el endpoint /status"""
+    return {
+        "max_attempts": default_policy.max_attempts,
+        "budget_retries_per_request": RETRY_BUDGET_RETRIES,
+        "budget_seconds_per_request": RETRY_BUDGET_SECONDS,
+        **default_policy.stats(),
+    }
@@ -0,0 +1,61 @@
+"""
+Transformación de resultados de YTMusic.search al formato de /api/search.
+
+Cada filtro (songs, videos, artists, albums) tiene su extractor de campos, que
+se elige una sola vez por búsqueda; después se recorre la lista de resultados
+en una pasada. La búsqueda principal y los fallbacks de idioma usan el mismo
+transformador, solo cambian la región y el idioma que se anotan.
+"""
+
+from models import Album, Artist, first_artist, parse_duration_seconds
+
+
+class SearchTransformer:
+    """
+    Convierte resultados crudos de ytmusicapi en los dicts de la API.
+    thumbnail_resolver recibe la lista de thumbnails y devuelve una URL.
+    """
+
+    def __init__(self, thumbnail_resolver):
+        self.thumbnail_resolver = thumbnail_resolver
+        track = (frozenset(("song", "video")), self._track)
+        # filtro -> (resultType aceptados, extractor)
+        self._extractors = {
+            "songs": track,
+            "videos": track,
+            "artists": (frozenset(("artist",)), self._artist),
+            "albums": (frozenset(("album",)), self._album),
+        }
+
+    def _track(self, item, region, language):
+        album = item.get("album")
+        return {
+            "id": item.get("videoId", ""),
+            "title": item.get("title", "Sin título"),
+            "artist": first_artist(item),
+            "thumbnail": self.thumbnail_resolver(item.get("thumbnails", [])),
+            "album": album.get("name", "") if album else "",
+            "duration": parse_duration_seconds(item),  # Siempre un número en segundos
+            "duration_text": item.get("duration", ""),  # Formato original para referencia
+            "region": region,
+            "language": language,
+        }
+
+    def _artist(self, item, region, language):
+        return Artist.from_ytmusic(item).to_dict(region, language)
+
+    def _album(self, item, region, language):
+        return Album.from_ytmusic(item).to_dict(region, language)
+
+    def transform(self, items, filter_type, region, language):
+        """Transforma los resultados de un filtro; los de otro tipo se descartan"""
+        accepted, extract = self._extractors.get(filter_type.lower(), (None, None))
+        if extract is None or not items:
+            return []
+
+        results = []
+        for item in items:
+            result_type = item.get("resultType") or ""
+            if result_type in accepted or result_type.lower() in accepted:
+                results.append(extract(item, region, language))
+        return results
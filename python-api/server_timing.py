@@ -0,0 +1,200 @@
+"""
+Desglose del tiempo de cada petición (cabecera Server-Timing).
+
+Se miden tramos alrededor de la lectura de caché, la creación de clientes
+YTMusic, cada llamada a YouTube Music y las transformaciones de resultados.
+Al terminar la petición se suman por nombre y se envían en la cabecera
+Server-Timing, que muestran las devtools del navegador y reenvía el proxy de
+Node:
+
+    Server-Timing: cache;dur=0.4;desc="x2", upstream.search;dur=312.5, transform;dur=4.1, total;dur=330.2
+
+desc indica cuántos tramos se sumaron cuando son más de uno. Los tramos de los
+hilos de una misma petición (hedging, lotes) se solapan, así que la suma de un
+nombre puede superar a total.
+
+Con SERVER_TIMING_DEBUG activo, las peticiones con ?debug_timing=1 o la
+cabecera X-Debug-Timing: 1 reciben además el detalle de cada tramo (inicio y
+duración en ms e hilo) en un campo "_timing" al final del cuerpo. WSGI no
+admite trailers HTTP, así que el detalle va en el propio cuerpo y solo en las
+respuestas que son un objeto JSON.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import request
+
+from json_provider import dumps_bytes
+
+logger = logging.getLogger("youtube-music-api")
+
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_DEBUG = os.environ.get(
+    "SERVER_TIMING_DEBUG", "false" if os.environ.get("FLASK_ENV") == "production" else "true"
+).lower() in ("1", "true", "yes")
+# Tramos que se guardan como máximo en el detalle de depuración
+SERVER_TIMING_DEBUG_MAX_SPANS = int(os.environ.get("SERVER_TIMING_DEBUG_MAX_SPANS", 500))
+
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Timings:
+    """Tramos de una petición; los hilos de la petición comparten la misma instancia"""
+
+    def __init__(self, debug=False):
+        self.started = time.perf_counter()
+        self.debug = debug
+        # nombre -> [ms, tramos]
+        self.totals = {}
+        self.spans = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end):
+        ms = (end - start) * 1000
+        with self._lock:
+            total = self.totals.get(name)
+            if total is None:
+                self.totals[name] = [ms, 1]
+            else:
+                total[0] += ms
+                total[1] += 1
+            if self.debug:
+                if len(self.spans) < SERVER_TIMING_DEBUG_MAX_SPANS:
+                    self.spans.append(
+                        {
+                            "name": name,
+                            "start": round((start - self.started) * 1000, 3),
+                            "dur": round(ms, 3),
+                            "thread": threading.current_thread().name,
+                        }
+                    )
+                else:
+                    self.dropped += 1
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self):
+        with self._lock:
+            totals = list(self.totals.items())
+        parts = []
+        for name, (ms, count) in totals:
+            parts.append(f'{name};dur={ms:.1f};desc="x{count}"' if count > 1 else f"{name};dur={ms:.1f}")
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def debug_payload(self):
+        with self._lock:
+            return {
+                "total": round(self.elapsed_ms(), 3),
+                "totals": {name: {"dur": round(ms, 3), "count": count} for name, (ms, count) in self.totals.items()},
+                "spans": list(self.spans),
+                "dropped": self.dropped,
+            }
+
+
+def record_span(name, start, end):
+    """Registra un tramo ya medido (instantes de time.perf_counter) en la petición en curso"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.record(name, start, end)
+
+
+class _Span:
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _current_timings.get()
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+def span(name):
+    """Context manager que mide un tramo de la petición en curso: with span("cache"): ..."""
+    return _Span(name)
+
+
+def timed(name):
+    """Decorador que mide cada llamada a la función como un tramo"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current_timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(name, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+
+def _wants_debug():
+    if not SERVER_TIMING_DEBUG:
+        return False
+    flag = request.args.get("debug_timing") or request.headers.get("X-Debug-Timing")
+    return bool(flag) and flag.lower() in ("1", "true", "yes")
+
+
+def _append_debug(response, timings):
+    if response.direct_passthrough or response.is_streamed or response.mimetype != "application/json":
+        return
+    data = response.get_data().rstrip()
+    if not (data.startswith(b"{") and data.endswith(b"}")):
+        return
+    payload = dumps_bytes(timings.debug_payload())
+    if data[1:-1].strip():
+        data = data[:-1] + b',"_timing":' + payload + b"}"
+    else:
+        data = b'{"_timing":' + payload + b"}"
+    response.set_data(data)
+
+
+def install_server_timing(app):
+    """Registra los hooks que abren y emiten el desglose de tiempos de cada petición"""
+    if not SERVER_TIMING_ENABLED:
+        logger.info("Cabecera Server-Timing desactivada (SERVER_TIMING_ENABLED)")
+        return
+
+    @app.before_request
+    def _start_timings():
+        request.environ["server_timing.token"] = _current_timings.set(Timings(debug=_wants_debug()))
+
+    @app.after_request
+    def _emit_timings(response):
+        timings = _current_timings.get()
+        if timings is not None:
+            if timings.debug:
+                _append_debug(response, timings)
+            response.headers["Server-Timing"] = timings.header()
+        return response
+
+    @app.teardown_request
+    def _end_timings(exc=None):
+        token = request.environ.pop("server_timing.token", None)
+        if token is not None:
+            try:
+                _current_timings.reset(token)
+            except ValueError:
+                # El token pertenece a otro contexto (p. ej. respuestas en streaming)
+                _current_timings.set(None)
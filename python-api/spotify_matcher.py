@@ -0,0 +1,228 @@
+"""
+Motor de emparejamiento Spotify -> YouTube Music.
+
+- Puntúa los candidatos de una búsqueda en YouTube Music por similitud de
+  título y artista y por diferencia de duración.
+- Guarda los emparejamientos confirmados en una tabla SQLite persistente
+  (spotify_id -> videoId) con búsqueda indexada, de modo que una vez aprendido
+  un track su resolución es una lectura local.
+- Permite importar y exportar la tabla en bloque.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from difflib import SequenceMatcher
+
+logger = logging.getLogger("youtube-music-api")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SPOTIFY_MAP_DB = os.environ.get("SPOTIFY_MAP_DB", os.path.join(DATA_DIR, "spotify_map.db"))
+
+# Puntuación mínima para guardar un emparejamiento como confirmado
+MATCH_THRESHOLD = float(os.environ.get("SPOTIFY_MATCH_THRESHOLD", 0.75))
+
+# Pesos de cada criterio (la duración solo cuenta si se conoce en ambos lados)
+TITLE_WEIGHT = 0.5
+ARTIST_WEIGHT = 0.35
+DURATION_WEIGHT = 0.15
+# Diferencia de duración (segundos) a partir de la cual la puntuación de duración es 0
+DURATION_TOLERANCE = 30
+
+# Sufijos y adornos que no ayudan a comparar títulos
+_PARENTHESES_RE = re.compile(r"[\(\[][^\)\]]*[\)\]]")
+_SUFFIX_RE = re.compile(r"\s+-\s+(remaster(ed)?|live|radio edit|single version|mono|stereo)\b.*$")
+_FEAT_RE = re.compile(r"\b(feat|ft|featuring)\b.*$")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Normaliza un título o artista para compararlo (minúsculas, sin acentos ni adornos)"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    text = _PARENTHESES_RE.sub(" ", text)
+    text = _SUFFIX_RE.sub("", text)
+    text = _FEAT_RE.sub("", text)
+    text = _NON_ALNUM_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def similarity(a, b):
+    a, b = normalize_text(a), normalize_text(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _candidate_artists(candidate):
+    artists = [a.get("name", "") for a in candidate.get("artists") or [] if isinstance(a, dict)]
+    if not artists and candidate.get("artist"):
+        artists = [candidate["artist"]]
+    return artists
+
+
+def _candidate_duration(candidate):
+    if candidate.get("duration_seconds"):
+        return int(candidate["duration_seconds"])
+    duration = candidate.get("duration")
+    if isinstance(duration, str) and ":" in duration:
+        seconds = 0
+        try:
+            for part in duration.split(":"):
+                seconds = seconds * 60 + int(part)
+            return seconds
+        except ValueError:
+            return None
+    return None
+
+
+def score_candidate(candidate, title, artist, duration=None):
+    """Puntuación entre 0 y 1 de un resultado de búsqueda frente al track de Spotify"""
+    title_score = similarity(candidate.get("title", ""), title)
+    artist_score = max((similarity(name, artist) for name in _candidate_artists(candidate)), default=0.0)
+
+    candidate_duration = _candidate_duration(candidate)
+    if duration and candidate_duration:
+        duration_score = max(0.0, 1.0 - abs(candidate_duration - duration) / DURATION_TOLERANCE)
+        return title_score * TITLE_WEIGHT + artist_score * ARTIST_WEIGHT + duration_score * DURATION_WEIGHT
+
+    # Sin duración, repartir su peso proporcionalmente
+    return (title_score * TITLE_WEIGHT + artist_score * ARTIST_WEIGHT) / (TITLE_WEIGHT + ARTIST_WEIGHT)
+
+
+def best_match(candidates, title, artist, duration=None):
+    """Devuelve (candidato, puntuación) con la mejor puntuación, o (None, 0.0)"""
+    best, best_score = None, 0.0
+    for candidate in candidates or []:
+        if not candidate or not candidate.get("videoId"):
+            continue
+        score = score_candidate(candidate, title, artist, duration)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best, best_score
+
+
+class SpotifyMap:
+    """Tabla persistente spotify_id -> videoId (SQLite, una conexión por hilo)"""
+
+    COLUMNS = ("spotify_id", "video_id", "title", "artist", "duration", "thumbnail", "score", "source", "updated_at")
+
+    def __init__(self, path=SPOTIFY_MAP_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS spotify_map (
+                    spotify_id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    title TEXT,
+                    artist TEXT,
+                    duration INTEGER,
+                    thumbnail TEXT,
+                    score REAL,
+                    source TEXT,
+                    updated_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_spotify_map_video ON spotify_map (video_id)")
+            conn.commit()
+            self._initialized = True
+
+    def get(self, spotify_id):
+        row = self._connection().execute("SELECT * FROM spotify_map WHERE spotify_id = ?", (spotify_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_many(self, spotify_ids):
+        """Búsqueda indexada de varios IDs: {spotify_id: fila}"""
+        found = {}
+        ids = list(spotify_ids)
+        # SQLite limita el número de parámetros por consulta
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection().execute(
+                f"SELECT * FROM spotify_map WHERE spotify_id IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((row["spotify_id"], dict(row)) for row in rows)
+        return found
+
+    def put(self, spotify_id, video_id, title="", artist="", duration=None, thumbnail="", score=None, source="match"):
+        self.put_many(
+            [
+                {
+                    "spotify_id": spotify_id,
+                    "video_id": video_id,
+                    "title": title,
+                    "artist": artist,
+                    "duration": duration,
+                    "thumbnail": thumbnail,
+                    "score": score,
+                    "source": source,
+                }
+            ]
+        )
+
+    def put_many(self, rows):
+        """Inserta o actualiza varios emparejamientos; devuelve cuántos se guardaron"""
+        now = time.time()
+        values = [
+            (
+                row["spotify_id"],
+                row["video_id"],
+                row.get("title", ""),
+                row.get("artist", ""),
+                row.get("duration"),
+                row.get("thumbnail", ""),
+                row.get("score"),
+                row.get("source", "import"),
+                row.get("updated_at") or now,
+            )
+            for row in rows
+            if row.get("spotify_id") and row.get("video_id")
+        ]
+        if not values:
+            return 0
+        conn = self._connection()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO spotify_map ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+            values,
+        )
+        conn.commit()
+        return len(values)
+
+    def export(self):
+        rows = self._connection().execute("SELECT * FROM spotify_map ORDER BY spotify_id").fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM spotify_map").fetchone()[0]
+
+
+spotify_map = SpotifyMap()
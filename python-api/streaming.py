@@ -0,0 +1,55 @@
+"""
+Respuestas en streaming NDJSON (un objeto JSON por línea) para los endpoints que
+agregan varias fuentes o resuelven lotes.
+
+Es opcional: se activa con el parámetro stream=1 (o stream=ndjson) o con la
+cabecera Accept: application/x-ndjson. Cada línea se envía en cuanto su fuente
+termina, y la última línea es siempre {"type": "done", ...} con el número de
+líneas enviadas y la marca partial si se agotó el deadline.
+"""
+
+import logging
+
+from flask import Response, request, stream_with_context
+
+from deadlines import is_partial
+from json_provider import dumps_bytes
+
+logger = logging.getLogger("youtube-music-api")
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_ndjson():
+    """Indica si el cliente pidió la respuesta en streaming NDJSON"""
+    if request.args.get("stream", "").lower() in ("1", "true", "ndjson"):
+        return True
+    return NDJSON_MIMETYPE in request.headers.get("Accept", "")
+
+
+def _line(item):
+    return dumps_bytes(item) + b"\n"
+
+
+def ndjson_response(items, summary=None):
+    """
+    Respuesta NDJSON a partir de un iterable de objetos.
+    summary se añade a la línea final {"type": "done"}.
+    """
+
+    def generate():
+        count = 0
+        try:
+            for item in items:
+                count += 1
+                yield _line(item)
+        except Exception as e:
+            logger.error(f"[STREAM] Error generando respuesta NDJSON: {str(e)}")
+            yield _line({"type": "error", "error": str(e)})
+        yield _line({"type": "done", "count": count, "partial": is_partial(), **(summary or {})})
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    # Evitar que un proxy (nginx) acumule la respuesta antes de enviarla
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
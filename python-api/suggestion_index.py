@@ -0,0 +1,252 @@
+"""
+Índice local de sugerencias para /api/suggestions.
+
+Guarda en memoria, en una lista ordenada de claves normalizadas, los títulos y
+artistas que pasan por el servicio (búsquedas, find_track, sugerencias) y las
+consultas que hacen los usuarios. Los prefijos cortos, que abarcan miles de
+claves, tienen precalculada la lista de sus claves más populares; los largos se
+resuelven con una búsqueda binaria del rango de claves que empiezan por ellos.
+Ninguno llama a YouTube Music.
+
+También recuerda las sugerencias obtenidas de YouTube Music por consulta: si el
+usuario sigue escribiendo ("tay" -> "tayl"), se filtran las sugerencias de la
+consulta más corta en lugar de volver a pedirlas.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from heapq import nlargest
+from collections import OrderedDict
+
+from spotify_matcher import normalize_text
+
+logger = logging.getLogger("youtube-music-api")
+
+# Configuración (se puede ajustar por variables de entorno)
+SUGGESTION_INDEX_MAX_ENTRIES = int(os.environ.get("SUGGESTION_INDEX_MAX_ENTRIES", 50000))
+SUGGESTION_QUERY_CACHE_SIZE = int(os.environ.get("SUGGESTION_QUERY_CACHE_SIZE", 5000))
+SUGGESTION_QUERY_TTL_SECONDS = float(os.environ.get("SUGGESTION_QUERY_TTL_SECONDS", 6 * 3600))
+# Búsquedas con resultados necesarias para que una consulta de usuario se sugiera
+SUGGESTION_MIN_QUERY_COUNT = int(os.environ.get("SUGGESTION_MIN_QUERY_COUNT", 3))
+# Sugerencias que devuelve como máximo YouTube Music por consulta
+SUGGESTION_UPSTREAM_CAP = int(os.environ.get("SUGGESTION_UPSTREAM_CAP", 7))
+
+# Longitud mínima de prefijo para responder desde el índice
+MIN_PREFIX_LENGTH = 2
+# Prefijos de hasta esta longitud guardan sus PREFIX_TOP_SIZE claves más populares
+PREFIX_TOP_LENGTH = 3
+PREFIX_TOP_SIZE = 50
+# Fin del rango de claves de un prefijo en la lista ordenada
+_PREFIX_END = "\U0010ffff"
+
+
+def suggestion_matches(suggestion, key):
+    """Indica si el texto de una sugerencia empieza por key o tiene una palabra que empieza por key"""
+    text = normalize_text(suggestion.get("text", ""))
+    return text.startswith(key) or f" {key}" in text
+
+
+class SuggestionIndex:
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or SUGGESTION_INDEX_MAX_ENTRIES
+        self._keys = []
+        self._entries = {}
+        self._weights = {}
+        # Prefijo corto -> claves con ese prefijo, de más a menos popular
+        self._top = {}
+        self._queries = OrderedDict()
+        self._query_counts = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "prefix_hits": 0, "misses": 0}
+
+    def __len__(self):
+        return len(self._keys)
+
+    # --- Ingesta ---
+
+    def add(self, text, suggestion, weight=1):
+        key = normalize_text(text)
+        if len(key) < MIN_PREFIX_LENGTH:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._weights[key] += weight
+                # Completar datos que antes no teníamos (p. ej. la miniatura)
+                if suggestion.get("imageUrl") and not self._entries[key].get("imageUrl"):
+                    self._entries[key] = suggestion
+                self._promote(key)
+                return
+            insort(self._keys, key)
+            self._entries[key] = suggestion
+            self._weights[key] = weight
+            self._promote(key)
+            if len(self._keys) > self.max_entries:
+                self._evict()
+
+    def _prefix_range(self, prefix):
+        return self._keys[bisect_left(self._keys, prefix) : bisect_left(self._keys, prefix + _PREFIX_END)]
+
+    def _promote(self, key):
+        # Recolocar la clave en la lista de populares de cada prefijo corto suyo
+        weight = self._weights[key]
+        for length in range(MIN_PREFIX_LENGTH, min(len(key), PREFIX_TOP_LENGTH) + 1):
+            top = self._top.setdefault(key[:length], [])
+            if key in top:
+                top.remove(key)
+            elif len(top) >= PREFIX_TOP_SIZE and weight <= self._weights[top[-1]]:
+                continue
+            position = 0
+            while position < len(top) and self._weights[top[position]] >= weight:
+                position += 1
+            top.insert(position, key)
+            del top[PREFIX_TOP_SIZE:]
+
+    def _evict(self):
+        # Descartar el 10% de claves menos populares
+        drop = sorted(self._keys, key=self._weights.__getitem__)[: max(1, self.max_entries // 10)]
+        for key in drop:
+            del self._entries[key]
+            del self._weights[key]
+        dropped = set(drop)
+        self._keys = [key for key in self._keys if key not in dropped]
+        # Las listas de populares afectadas se rehacen para recuperar las claves que habían quedado fuera
+        prefixes = {key[:length] for key in drop for length in range(MIN_PREFIX_LENGTH, min(len(key), PREFIX_TOP_LENGTH) + 1)}
+        for prefix in prefixes:
+            keys = self._prefix_range(prefix)
+            if keys:
+                self._top[prefix] = nlargest(PREFIX_TOP_SIZE, keys, key=self._weights.__getitem__)
+            else:
+                self._top.pop(prefix, None)
+        logger.info(f"[SUGERENCIAS] Índice lleno, descartadas {len(drop)} claves poco usadas")
+
+    def add_track(self, video_id, title, artist, thumbnail=""):
+        if not video_id or not title:
+            return
+        suggestion = {
+            "id": video_id,
+            "text": f"{title} - {artist}" if artist else title,
+            "type": "track",
+            "source": "youtube",
+            "artist": artist,
+            "trackName": title,
+            "imageUrl": thumbnail,
+        }
+        self.add(f"{title} {artist}", suggestion)
+        if artist:
+            self.add(f"{artist} {title}", suggestion)
+
+    def add_artist(self, browse_id, name, thumbnail=""):
+        if not browse_id or not name:
+            return
+        self.add(name, {"id": browse_id, "text": name, "type": "artist", "source": "youtube", "imageUrl": thumbnail})
+
+    def add_results(self, results):
+        """Ingiere resultados ya transformados de /api/search o find_track"""
+        for item in results or []:
+            if item.get("browseId") and item.get("name"):
+                self.add_artist(item["browseId"], item["name"], _first_thumbnail(item.get("thumbnails")))
+            elif item.get("id"):
+                self.add_track(item["id"], item.get("title", ""), item.get("artist", ""), item.get("thumbnail", ""))
+
+    def record_query(self, query):
+        """
+        Cuenta una búsqueda de usuario que tuvo resultados. La consulta solo se
+        sugiere a partir de SUGGESTION_MIN_QUERY_COUNT búsquedas, para no ofrecer
+        erratas ni consultas de un único usuario.
+        """
+        query = " ".join(str(query).split())
+        key = normalize_text(query)
+        if len(key) < MIN_PREFIX_LENGTH:
+            return
+        with self._lock:
+            count = self._query_counts.pop(key, 0) + 1
+            self._query_counts[key] = count
+            while len(self._query_counts) > self.max_entries:
+                self._query_counts.popitem(last=False)
+        if count < SUGGESTION_MIN_QUERY_COUNT:
+            return
+        suggestion = {"id": f"query_{key.replace(' ', '_')}", "text": query, "type": "query", "source": "local"}
+        # Al entrar en el índice lo hace con todas las búsquedas contadas hasta ahora
+        self.add(query, suggestion, weight=count if count == SUGGESTION_MIN_QUERY_COUNT else 1)
+
+    # --- Consulta ---
+
+    def lookup(self, query, limit):
+        """Sugerencias locales para un prefijo, las más populares primero"""
+        key = normalize_text(query)
+        if len(key) < MIN_PREFIX_LENGTH:
+            return []
+        with self._lock:
+            if len(key) <= PREFIX_TOP_LENGTH:
+                candidates = self._top.get(key, [])
+            else:
+                candidates = sorted(self._prefix_range(key), key=self._weights.__getitem__, reverse=True)
+            results = []
+            seen = set()
+            for candidate in candidates:
+                suggestion = self._entries[candidate]
+                if suggestion["id"] in seen:
+                    continue
+                seen.add(suggestion["id"])
+                results.append(suggestion)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def remember(self, query, suggestions):
+        """
+        Guarda las sugerencias de YouTube Music de una consulta. YouTube Music
+        devuelve como máximo SUGGESTION_UPSTREAM_CAP: solo si devolvió menos se sabe
+        que no había más, y entonces sus extensiones se pueden resolver filtrando.
+        """
+        key = normalize_text(query)
+        if not key:
+            return
+        complete = len(suggestions) < SUGGESTION_UPSTREAM_CAP
+        with self._lock:
+            self._queries[key] = (time.monotonic(), suggestions, complete)
+            self._queries.move_to_end(key)
+            while len(self._queries) > SUGGESTION_QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+
+    def cached(self, query, limit):
+        """
+        Sugerencias de una consulta ya pedida a YouTube Music, o de una consulta más
+        corta de la que esta es una extensión; None si no hay nada reutilizable.
+        """
+        key = normalize_text(query)
+        now = time.monotonic()
+        with self._lock:
+            for length in range(len(key), MIN_PREFIX_LENGTH - 1, -1):
+                entry = self._queries.get(key[:length])
+                if entry is None or now - entry[0] > SUGGESTION_QUERY_TTL_SECONDS:
+                    continue
+                _, suggestions, complete = entry
+                if length == len(key):
+                    return suggestions[:limit]
+                filtered = [suggestion for suggestion in suggestions if suggestion_matches(suggestion, key)]
+                # Solo es fiable si la consulta corta ya tenía todas las sugerencias o basta con lo filtrado
+                if complete or len(filtered) >= limit:
+                    return filtered[:limit]
+                return None
+        return None
+
+    def count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def status(self):
+        with self._lock:
+            return {"entries": len(self._keys), "cached_queries": len(self._queries), **self._stats}
+
+
+def _first_thumbnail(thumbnails):
+    if thumbnails and isinstance(thumbnails, list) and isinstance(thumbnails[-1], dict):
+        return thumbnails[-1].get("url", "")
+    return ""
+
+
+suggestion_index = SuggestionIndex()
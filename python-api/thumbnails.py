@@ -0,0 +1,84 @@
+"""
+Resolución de miniaturas de YouTube Music.
+
+De una lista de thumbnails de ytmusicapi se elige la de mayor tamaño (o la
+primera si ninguna trae dimensiones) y su URL se reescribe a la resolución
+que usa el frontend (=w544-h544-l90-rj), en HTTPS y absoluta.
+
+La reescritura de la URL se memoiza por URL de origen: una misma portada
+aparece muchas veces en charts, recomendaciones y playlists. Los logs de
+detalle pasan por log_item (nivel DEBUG, muestreados y desactivables).
+"""
+
+import logging
+import os
+import re
+from functools import lru_cache
+
+from log_setup import log_item
+
+logger = logging.getLogger("youtube-music-api")
+
+DEFAULT_THUMBNAIL = "https://img.youtube.com/vi/default/hqdefault.jpg"
+# URLs de origen distintas que se recuerdan
+THUMBNAIL_CACHE_SIZE = int(os.environ.get("THUMBNAIL_CACHE_SIZE", 20000))
+
+# Parámetros de tamaño de las URLs de googleusercontent (=w120-h120-l90-rj)
+_SIZE_RE = re.compile(r"(=w)\d+(-h)\d+.*$")
+_HIGH_RES_SUFFIX = "=w544-h544-l90-rj"
+
+
+def _pick_thumbnail_url(thumbnails):
+    """URL de la miniatura más grande, o de la primera válida si ninguna tiene dimensiones"""
+    best_url, best_area, first_url = None, -1, None
+    for t in thumbnails:
+        if not isinstance(t, dict) or "url" not in t:
+            continue
+        if first_url is None:
+            first_url = t["url"]
+        if "width" in t and "height" in t:
+            area = (t["width"] or 0) * (t["height"] or 0)
+            if area > best_area:
+                best_url, best_area = t["url"], area
+    return best_url if best_url is not None else first_url
+
+
+@lru_cache(maxsize=THUMBNAIL_CACHE_SIZE)
+def canonical_thumbnail_url(url):
+    """Reescribe una URL de miniatura a alta resolución, HTTPS y absoluta (memoizada)"""
+    if not url:
+        return DEFAULT_THUMBNAIL
+
+    modified_url = _SIZE_RE.sub(_HIGH_RES_SUFFIX, url)
+    if modified_url == url:
+        # Sin parámetros de tamaño reconocibles: quitar los que haya
+        modified_url = url.split("=")[0]
+
+    if modified_url.startswith("http:"):
+        modified_url = modified_url.replace("http:", "https:")
+
+    if not modified_url.startswith(("http://", "https://")):
+        if modified_url.startswith("//"):
+            modified_url = "https:" + modified_url
+        else:
+            log_item("THUMBNAIL", "URL de miniatura inválida: %s", modified_url, level=logging.WARNING)
+            return DEFAULT_THUMBNAIL
+
+    log_item("THUMBNAIL", "%s -> %s", url, modified_url, level=logging.DEBUG)
+    return modified_url
+
+
+def get_best_thumbnail(thumbnails):
+    """Obtiene la mejor calidad de thumbnail disponible"""
+    if not thumbnails or not isinstance(thumbnails, list):
+        return DEFAULT_THUMBNAIL
+    url = _pick_thumbnail_url(thumbnails)
+    if url is None:
+        log_item("THUMBNAIL", "No se encontraron URLs válidas en las miniaturas", level=logging.DEBUG)
+        return DEFAULT_THUMBNAIL
+    return canonical_thumbnail_url(url)
+
+
+def thumbnail_status():
+    info = canonical_thumbnail_url.cache_info()
+    return {"cached_urls": info.currsize, "hits": info.hits, "misses": info.misses, "max_size": info.maxsize}
@@ -0,0 +1,384 @@
+"""
+Catálogo local de tracks con búsqueda de texto completo (SQLite FTS5).
+
+Todos los tracks que devuelven search, get_watch_playlist, get_charts,
+get_artist y get_playlist se guardan aquí de forma incremental: la capa
+upstream los encola y un hilo en segundo plano los escribe por lotes, así que
+la petición no espera a la base de datos.
+
+find_track consulta primero el catálogo; si el mejor resultado supera
+CATALOG_MATCH_THRESHOLD se responde sin llamar a YTMusic.search.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from spotify_matcher import DATA_DIR, normalize_text, score_candidate, similarity
+
+logger = logging.getLogger("youtube-music-api")
+
+TRACK_CATALOG_DB = os.environ.get("TRACK_CATALOG_DB", os.path.join(DATA_DIR, "track_catalog.db"))
+# Confianza mínima para responder find_track desde el catálogo
+CATALOG_MATCH_THRESHOLD = float(os.environ.get("CATALOG_MATCH_THRESHOLD", 0.85))
+# Candidatos que se puntúan por consulta
+CATALOG_CANDIDATES = 10
+# Escritura por lotes: máximo de tracks por lote y espera máxima antes de escribir
+WRITE_BATCH_SIZE = 200
+WRITE_INTERVAL_SECONDS = 1.0
+# Profundidad máxima al buscar tracks dentro de una respuesta de ytmusicapi
+MAX_EXTRACT_DEPTH = 4
+# Conexiones libres que se conservan para reutilizar entre peticiones
+CONNECTION_POOL_SIZE = 4
+# Tipos de resultado de ytmusicapi que son tracks reproducibles
+TRACK_RESULT_TYPES = ("song", "video")
+
+
+def _parse_duration(item):
+    if item.get("duration_seconds"):
+        return int(item["duration_seconds"])
+    for field in ("duration", "length"):
+        value = item.get(field)
+        if isinstance(value, (int, float)) and value > 0:
+            return int(value)
+        if isinstance(value, str) and ":" in value:
+            seconds = 0
+            try:
+                for part in value.split(":"):
+                    seconds = seconds * 60 + int(part)
+                return seconds
+            except ValueError:
+                continue
+    return None
+
+
+def _track_row(item):
+    """Convierte un track (formato ytmusicapi o ya transformado) en una fila del catálogo"""
+    video_id = item.get("videoId") or item.get("id")
+    title = item.get("title")
+    if not video_id or not isinstance(video_id, str) or not title:
+        return None
+
+    artist = item.get("artist") if isinstance(item.get("artist"), str) else ""
+    if not artist and isinstance(item.get("artists"), list):
+        artist = ", ".join(a.get("name", "") for a in item["artists"] if isinstance(a, dict) and a.get("name"))
+
+    album = item.get("album")
+    if isinstance(album, dict):
+        album = album.get("name", "")
+    if not isinstance(album, str):
+        album = ""
+
+    thumbnail = item.get("thumbnail") if isinstance(item.get("thumbnail"), str) else ""
+    thumbnails = item.get("thumbnails")
+    if not thumbnail and isinstance(thumbnails, list) and thumbnails and isinstance(thumbnails[-1], dict):
+        thumbnail = thumbnails[-1].get("url", "")
+
+    return (video_id, title, artist, album, thumbnail, _parse_duration(item))
+
+
+def _is_track(item):
+    """Indica si un dict de ytmusicapi es un track (no un álbum, artista o estantería)"""
+    if not ((item.get("videoId") or "").strip() and item.get("title")):
+        return False
+    result_type = item.get("resultType")
+    if result_type:
+        return result_type in TRACK_RESULT_TYPES
+    # Sin resultType (watch playlist, charts, álbumes, artistas): los tracks llevan sus artistas
+    return isinstance(item.get("artists"), list) and bool(item["artists"])
+
+
+def extract_tracks(data, depth=0):
+    """Recorre una respuesta de ytmusicapi y genera los dicts que son tracks"""
+    if depth > MAX_EXTRACT_DEPTH:
+        return
+    if isinstance(data, dict):
+        if _is_track(data):
+            yield data
+            return
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from extract_tracks(value, depth + 1)
+    elif isinstance(data, list):
+        for value in data:
+            if isinstance(value, (dict, list)):
+                yield from extract_tracks(value, depth + 1)
+
+
+def _fts_query(text, column=None):
+    tokens = normalize_text(text).split()
+    if not tokens:
+        return ""
+    terms = " ".join(f'"{token}"' for token in tokens)
+    return f"{column} : ({terms})" if column else terms
+
+
+class TrackCatalog:
+    def __init__(self, path=TRACK_CATALOG_DB):
+        self.path = path
+        self._pool = []
+        self._pool_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"ingested": 0, "hits": 0, "misses": 0}
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Sin transacciones implícitas: write() abre la suya con BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        self._ensure_schema(conn)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """
+        Conexión prestada del pool. Los hilos de las peticiones en lote y del
+        hedging son de usar y tirar: una conexión por hilo no se cerraría nunca.
+        """
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if len(self._pool) < CONNECTION_POOL_SIZE:
+                    self._pool.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def _ensure_schema(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tracks (
+                    video_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    artist TEXT,
+                    album TEXT,
+                    thumbnail TEXT,
+                    duration INTEGER,
+                    seen_count INTEGER DEFAULT 1,
+                    updated_at REAL
+                )
+                """
+            )
+            # Texto normalizado (sin acentos ni adornos) para la búsqueda
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(video_id UNINDEXED, title, artist)")
+            self._initialized = True
+
+    def _count(self, stat, amount=1):
+        with self._stats_lock:
+            self._stats[stat] += amount
+
+    # --- Ingesta ---
+
+    def ingest(self, items):
+        """Encola tracks para guardarlos en el catálogo (no bloquea)"""
+        rows = [row for row in map(_track_row, items or []) if row]
+        if not rows:
+            return
+        self._ensure_writer()
+        self._queue.put(rows)
+
+    def ingest_response(self, data):
+        """Encola todos los tracks que aparezcan en una respuesta de ytmusicapi"""
+        self.ingest(list(extract_tracks(data)))
+
+    def _ensure_writer(self):
+        # Un hilo por proceso: con gunicorn --preload el del maestro no sobrevive al fork
+        if self._writer_pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._writer_pid == os.getpid():
+                return
+            if self._writer_pid is None:
+                atexit.register(self.close)
+            self._writer = threading.Thread(target=self._write_loop, name="track-catalog-writer", daemon=True)
+            self._writer.start()
+            self._writer_pid = os.getpid()
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            rows = self._queue.get()
+            if rows is None:
+                return
+            deadline = time.monotonic() + WRITE_INTERVAL_SECONDS
+            while len(rows) < WRITE_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    more = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                rows.extend(more)
+            try:
+                self.write(rows)
+            except Exception as e:
+                logger.error(f"[CATALOGO] Error guardando {len(rows)} tracks: {str(e)}")
+
+    def write(self, rows):
+        """Guarda filas en el catálogo (inserta las nuevas y actualiza las conocidas)"""
+        latest = {}
+        seen = {}
+        for row in rows:
+            latest[row[0]] = row
+            seen[row[0]] = seen.get(row[0], 0) + 1
+
+        now = time.time()
+        with self._connection() as conn:
+            # Cada worker tiene su escritor: BEGIN IMMEDIATE toma el lock de escritura
+            # antes de leer, así que los ids conocidos no cambian hasta el COMMIT
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                known = set()
+                ids = list(latest)
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start : start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    known.update(
+                        row[0]
+                        for row in conn.execute(f"SELECT video_id FROM tracks WHERE video_id IN ({placeholders})", chunk)
+                    )
+
+                conn.executemany(
+                    "INSERT INTO tracks (video_id, title, artist, album, thumbnail, duration, seen_count, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(video_id) DO UPDATE SET"
+                    " seen_count = seen_count + excluded.seen_count, updated_at = excluded.updated_at,"
+                    " album = COALESCE(NULLIF(excluded.album, ''), album),"
+                    " thumbnail = COALESCE(NULLIF(excluded.thumbnail, ''), thumbnail),"
+                    " duration = COALESCE(excluded.duration, duration)",
+                    [(*row, seen[video_id], now) for video_id, row in latest.items()],
+                )
+                new_rows = [row for video_id, row in latest.items() if video_id not in known]
+                conn.executemany(
+                    "INSERT INTO tracks_fts (video_id, title, artist) VALUES (?, ?, ?)",
+                    [(row[0], normalize_text(row[1]), normalize_text(row[2])) for row in new_rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._count("ingested", len(new_rows))
+        return len(new_rows)
+
+    def flush(self):
+        """Escribe de inmediato lo que haya en la cola"""
+        rows = []
+        while True:
+            try:
+                batch = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is not None:
+                rows.extend(batch)
+        if rows:
+            self.write(rows)
+
+    def close(self):
+        """Escribe lo pendiente al salir del proceso (el escritor es un hilo daemon)"""
+        try:
+            if self._writer is not None and self._writer.is_alive() and self._writer_pid == os.getpid():
+                # El escritor termina el lote que tenga entre manos y se detiene
+                self._queue.put(None)
+                self._writer.join(timeout=10)
+            self.flush()
+        except Exception as e:
+            logger.error(f"[CATALOGO] Error guardando los tracks pendientes al salir: {str(e)}")
+
+    # --- Consulta ---
+
+    def search(self, text, title="", artist="", limit=CATALOG_CANDIDATES):
+        """Candidatos del catálogo ordenados por relevancia (bm25, el título pesa más)"""
+        queries = []
+        title_query, artist_query = _fts_query(title, "title"), _fts_query(artist, "artist")
+        if title_query and artist_query:
+            queries.append(f"{title_query} AND {artist_query}")
+        if title_query:
+            queries.append(title_query)
+        queries.append(_fts_query(text))
+
+        with self._connection() as conn:
+            for fts_query in queries:
+                if not fts_query:
+                    continue
+                rows = conn.execute(
+                    "SELECT t.* FROM tracks_fts f JOIN tracks t ON t.video_id = f.video_id"
+                    " WHERE tracks_fts MATCH ? ORDER BY bm25(tracks_fts, 0, 2.0, 1.0), t.seen_count DESC LIMIT ?",
+                    (fts_query, limit),
+                ).fetchall()
+                if rows:
+                    return [dict(row) for row in rows]
+        return []
+
+    def best_match(self, query, title="", artist=""):
+        """
+        Mejor track del catálogo para la consulta y su confianza (0-1).
+        Con título y artista se puntúan por separado; con solo la consulta, contra "título artista".
+        """
+        try:
+            candidates = self.search(query, title, artist)
+        except sqlite3.Error as e:
+            logger.warning(f"[CATALOGO] Error consultando el catálogo: {str(e)}")
+            return None, 0.0
+
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            if title and artist:
+                artists = [{"name": name} for name in (candidate["artist"] or "").split(", ")]
+                score = score_candidate({"title": candidate["title"], "artists": artists}, title, artist)
+            else:
+                score = max(
+                    similarity(query, f"{candidate['title']} {candidate['artist']}"),
+                    similarity(query, f"{candidate['artist']} {candidate['title']}"),
+                )
+            if score > best_score:
+                best, best_score = candidate, score
+        return best, best_score
+
+    def find(self, query, title="", artist=""):
+        """Track del catálogo si supera CATALOG_MATCH_THRESHOLD, si no None"""
+        match, score = self.best_match(query, title, artist)
+        if match is None or score < CATALOG_MATCH_THRESHOLD:
+            self._count("misses")
+            return None
+        self._count("hits")
+        logger.info(f"[CATALOGO] '{query}' -> {match['video_id']} desde el catálogo local (score={score:.2f})")
+        return {**match, "score": round(score, 3)}
+
+    def count(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def status(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        try:
+            stats["tracks"] = self.count()
+        except sqlite3.Error:
+            stats["tracks"] = None
+        return {"pending_batches": self._queue.qsize(), "threshold": CATALOG_MATCH_THRESHOLD, **stats}
+
+
+track_catalog = TrackCatalog()
@@ -0,0 +1,124 @@
+"""
+Capa de acceso a YouTube Music.
+
+Todas las instancias de YTMusic del servicio se crean con create_ytmusic(), que
+devuelve un UpstreamClient: un envoltorio transparente que hace pasar cada
+llamada a un método público de ytmusicapi por estas capas, de fuera a dentro:
+
+1. política de reintentos (retry_policy)
+2. hedging opcional contra la cola de latencia (hedging)
+3. circuit breaker del método (circuit_breaker), aplicado a cada copia
+
+Los clientes usan una DeadlineSession, así que cada petición HTTP a YouTube
+Music tiene como timeout el tiempo que le queda a la petición en curso.
+
+La duración de cada llamada (reintentos incluidos) se registra en las métricas
+por método y resultado, y como tramo de la cabecera Server-Timing de la
+petición (upstream.<método>, ytmusic_init para la creación de clientes).
+
+Con YTMUSIC_BASE_URL las peticiones de los clientes a music.youtube.com se
+envían a ese servidor (p. ej. benchmarks/stub_upstream.py en pruebas de carga).
+
+Los tracks de las respuestas de CATALOG_METHODS se encolan en el catálogo local
+(track_catalog) para poder responder find_track sin llamar a YouTube Music.
+"""
+
+import logging
+import os
+import time
+
+from ytmusicapi import YTMusic
+from ytmusicapi.constants import YTM_DOMAIN
+
+from circuit_breaker import call_with_breaker
+from deadlines import DeadlineSession, check_deadline
+from hedging import hedged_call
+from metrics import observe_upstream
+from retry_policy import default_policy
+from server_timing import record_span
+from track_catalog import track_catalog
+
+logger = logging.getLogger("youtube-music-api")
+
+# Nombre del breaker usado para la construcción del cliente (petición de visitor id)
+CLIENT_INIT = "client_init"
+
+# Métodos cuyas respuestas alimentan el catálogo local de tracks
+CATALOG_METHODS = {"search", "get_watch_playlist", "get_charts", "get_artist", "get_playlist"}
+
+# Servidor que sustituye a music.youtube.com (vacío = YouTube Music real)
+YTMUSIC_BASE_URL = os.environ.get("YTMUSIC_BASE_URL", "").rstrip("/")
+if YTMUSIC_BASE_URL:
+    logger.warning(f"[UPSTREAM] Las peticiones a YouTube Music se envían a {YTMUSIC_BASE_URL}")
+
+
+class RedirectedSession(DeadlineSession):
+    """DeadlineSession que envía a YTMUSIC_BASE_URL las peticiones a music.youtube.com"""
+
+    def request(self, method, url, **kwargs):
+        if url.startswith(YTM_DOMAIN):
+            url = YTMUSIC_BASE_URL + url[len(YTM_DOMAIN):]
+        return super().request(method, url, **kwargs)
+
+
+def _attempt(name, func, args, kwargs):
+    # Un intento: posiblemente duplicado por hedging, cada copia pasa por el breaker
+    return hedged_call(name, call_with_breaker, name, func, *args, **kwargs)
+
+
+def call_upstream(name, func, *args, **kwargs):
+    """Ejecuta una llamada a YouTube Music con todas las capas de protección"""
+    check_deadline(f"llamar a '{name}'")
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = default_policy.execute(name, _attempt, name, func, args, kwargs)
+        outcome = "ok"
+        return result
+    finally:
+        end = time.perf_counter()
+        observe_upstream(name, outcome, end - start)
+        record_span(f"upstream.{name}", start, end)
+
+
+class UpstreamClient:
+    """Envoltorio de YTMusic que pasa cada llamada por call_upstream()"""
+
+    def __init__(self, client):
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = call_upstream(name, attr, *args, **kwargs)
+            if name in CATALOG_METHODS:
+                try:
+                    track_catalog.ingest_response(result)
+                except Exception as e:
+                    logger.warning(f"[CATALOGO] No se pudo encolar la respuesta de '{name}': {str(e)}")
+            return result
+
+        call.__name__ = name
+        return call
+
+
+def create_ytmusic(*args, **kwargs):
+    """Crea un cliente YTMusic protegido por reintentos y circuit breaker"""
+    kwargs.setdefault("requests_session", RedirectedSession() if YTMUSIC_BASE_URL else DeadlineSession())
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        client = default_policy.execute(CLIENT_INIT, call_with_breaker, CLIENT_INIT, YTMusic, *args, **kwargs)
+        outcome = "ok"
+    finally:
+        end = time.perf_counter()
+        observe_upstream(CLIENT_INIT, outcome, end - start)
+        record_span("ytmusic_init", start, end)
+    return UpstreamClient(client)
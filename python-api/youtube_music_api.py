@@ -4,20 +4,49 @@ import os
 import json
 from datetime import datetime, timedelta
 import logging
-from ytmusicapi import YTMusic
 import time
 import threading
 from pprint import pprint
-import random
 from functools import wraps
-import re
 import ssl
+import hashlib
+
+from circuit_breaker import CircuitOpenError, breakers_status, circuit_open
+from compression import compression_status, install_compression
+from concurrency import iter_batch_results, run_concurrently
+from deadlines import DeadlineExceeded, deadline_expired, install_deadlines, is_partial
+from fallback_catalog import fallback_catalog
+from genre_index import genre_index
+from hedging import hedging_status
+from json_provider import dumps_bytes, install_json, json_response, json_status, serialized_cache
+from log_setup import configure_logging, log_item, logging_status
+from metrics import count_cache, install_metrics, reset_metrics_dir
+from models import Track
+from pagination import CursorError, PagedSource, page_args
+from projection import project, projection_from_request
+from rate_limiter import upstream_limiter
+from retry_policy import retry_status
+from search_transform import SearchTransformer
+from server_timing import install_server_timing, span, timed
+from spotify_matcher import MATCH_THRESHOLD, best_match, normalize_text, spotify_map
+from streaming import ndjson_response, wants_ndjson
+from suggestion_index import suggestion_index
+from thumbnails import get_best_thumbnail, thumbnail_status
+from track_catalog import track_catalog
+from upstream import CLIENT_INIT, create_ytmusic
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 logger = logging.getLogger("youtube-music-api")
 
 app = Flask(__name__)
+install_json(app)
+install_metrics(app)
+install_deadlines(app)
+# Se registra antes que CORS para que comprima la respuesta ya terminada
+install_compression(app)
+# Después de la compresión: la cabecera y el detalle de depuración se añaden antes de comprimir
+install_server_timing(app)
 
 # Configuración CORS principal (restrictiva)
 cors_origin_string = os.environ.get("CORS_ORIGIN", "")  # Leer variable, default a string vacío
@@ -59,6 +88,9 @@ os.makedirs(cache_dir, exist_ok=True)
 # Duración del caché en segundos
 CACHE_DURATION = 3600  # 1 hora
 
+# Antigüedad máxima del caché que se sirve cuando YouTube Music no responde
+STALE_CACHE_TTL_HOURS = 72
+
 # Estado del servicio (para monitoreo)
 service_status = {
     "ytmusic_available": False,
@@ -71,7 +103,21 @@ service_status = {
 # Decorador para caché
 
 
-def cached(cache_file):
+def skip_response_cache():
+    """Marca la respuesta de la petición para que @cached no la guarde (datos de fallback o error)"""
+    request.environ["cache.skip"] = True
+
+
+def cached(cache_file, methods=()):
+    """
+    Caché en disco por región de un endpoint. methods son los métodos de YouTube
+    Music que llama el endpoint: si alguno tiene el circuito abierto se sirve el
+    caché expirado en lugar de esperar a que falle la llamada.
+    No se guardan las respuestas parciales (deadline agotado) ni las marcadas con
+    skip_response_cache(), para no sustituir los datos reales del caché.
+    """
+    breaker_names = (CLIENT_INIT,) + tuple(methods)
+
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -82,21 +128,45 @@ def cached(cache_file):
             cache_path = os.path.join(CACHE_DIR, region_cache_file)
 
             try:
-                # Verificar si existe un caché válido
-                if os.path.exists(cache_path):
-                    with open(cache_path, "r") as f:
-                        cached_data = json.load(f)
+                with span("cache"):
+                    # Acierto ya serializado en memoria
+                    body = serialized_cache.get(cache_path, CACHE_DURATION)
+                    cached_data = None
+                    if body is None and os.path.exists(cache_path):
+                        with open(cache_path, "r") as f:
+                            cached_data = json.load(f)
+
+                if body is not None:
+                    logger.info(f"Usando caché para {func.__name__} con región {region}")
+                    count_cache(cache_namespace(region_cache_file), "hit")
+                    return json_response(body)
 
+                # Verificar si existe un caché válido
+                if cached_data is not None:
                     # Verificar si el caché está vigente
                     if time.time() - cached_data.get("timestamp", 0) < CACHE_DURATION:
                         logger.info(f"Usando caché para {func.__name__} con región {region}")
-                        # Importante: devolver como jsonify para que sea una
-                        # respuesta válida
+                        body = dumps_bytes(cached_data.get("data"))
+                        serialized_cache.put(cache_path, body, cached_data["timestamp"])
+                        count_cache(cache_namespace(region_cache_file), "hit")
+                        return json_response(body)
+
+                    # Si el circuito hacia YouTube Music está abierto, servir el
+                    # caché expirado en lugar de esperar a que falle la llamada
+                    stale_age = time.time() - cached_data.get("timestamp", 0)
+                    if circuit_open(*breaker_names) and stale_age < STALE_CACHE_TTL_HOURS * 3600:
+                        logger.warning(f"Circuito abierto: usando caché antiguo para {func.__name__} con región {region}")
+                        count_cache(cache_namespace(region_cache_file), "stale")
                         return jsonify(cached_data.get("data"))
 
                 # Si no hay caché o expiró, ejecutar función
+                count_cache(cache_namespace(region_cache_file), "miss")
                 result = func(*args, **kwargs)
 
+                if is_partial() or request.environ.get("cache.skip"):
+                    logger.info(f"Respuesta de {func.__name__} sin guardar en caché (parcial o de fallback)")
+                    return result
+
                 # Extraer los datos JSON si es una respuesta Flask
                 if hasattr(result, "get_json"):
                     data_to_cache = result.get_json()
@@ -104,8 +174,12 @@ def cached(cache_file):
                     data_to_cache = result
 
                 # Guardar en caché
-                with open(cache_path, "w") as f:
-                    json.dump({"timestamp": time.time(), "data": data_to_cache}, f)
+                with span("cache_write"):
+                    timestamp = time.time()
+                    body = dumps_bytes(data_to_cache)
+                    with open(cache_path, "wb") as f:
+                        f.write(b'{"timestamp":' + repr(timestamp).encode("ascii") + b',"data":' + body + b"}")
+                    serialized_cache.put(cache_path, body, timestamp)
 
                 return result
             except Exception as e:
@@ -119,12 +193,26 @@ def cached(cache_file):
     return decorator
 
 
+def partial_jsonify(data):
+    """
+    jsonify que marca la respuesta como parcial si la petición agotó su deadline:
+    los objetos llevan "partial": true y todas las respuestas la cabecera X-Partial-Result
+    """
+    partial = is_partial()
+    if partial and isinstance(data, dict):
+        data = {**data, "partial": True}
+    response = jsonify(data)
+    if partial:
+        response.headers["X-Partial-Result"] = "true"
+    return response
+
+
 def get_ytmusic():
     global yt_music
     if yt_music is None:
         logger.info("Inicializando YTMusic...")
         try:
-            yt_music = YTMusic()
+            yt_music = create_ytmusic()
             logger.info("YTMusic inicializado correctamente")
         except Exception as e:
             logger.error(f"Error al inicializar YTMusic: {str(e)}")
@@ -132,8 +220,26 @@ def get_ytmusic():
     return yt_music
 
 
-def get_cached(key, ttl_hours=24):
-    """Obtiene resultados cacheados si existen y no han expirado"""
+_ytmusic_by_language = {}
+_ytmusic_lock = threading.Lock()
+
+
+def get_ytmusic_for_language(language):
+    """Cliente YTMusic reutilizable por idioma (evita crear uno en cada búsqueda)"""
+    client = _ytmusic_by_language.get(language)
+    if client is None:
+        with _ytmusic_lock:
+            client = _ytmusic_by_language.get(language)
+            if client is None:
+                logger.info(f"Inicializando YTMusic para idioma '{language}'...")
+                client = create_ytmusic(language=language)
+                _ytmusic_by_language[language] = client
+    return client
+
+
+@timed("cache")
+def read_cache_entry(key, ttl_hours=24):
+    """Entrada de caché vigente ({"timestamp", "content"}) o None"""
     cache_file = os.path.join(CACHE_DIR, f"{key}.json")
 
     if os.path.exists(cache_file):
@@ -141,7 +247,7 @@ def get_cached(key, ttl_hours=24):
             with open(cache_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
                 if datetime.fromisoformat(data["timestamp"]) + timedelta(hours=ttl_hours) > datetime.now():
-                    return data["content"]
+                    return data
         except UnicodeDecodeError:
             # Si hay un error de decodificación, intentar eliminar el archivo
             try:
@@ -155,348 +261,128 @@ def get_cached(key, ttl_hours=24):
     return None
 
 
-def save_to_cache(key, content):
-    cache_file = os.path.join(CACHE_DIR, f"{key}.json")
-    try:
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(
-                {"timestamp": datetime.now().isoformat(), "content": content},
-                f,
-                ensure_ascii=False,
-            )
-            logger.debug(f"Datos guardados en caché: {key}")
-    except Exception as e:
-        logger.error(f"Error guardando caché para {key}: {str(e)}")
-        # Intentar eliminar el archivo si existe y hay error al escribir
-        try:
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
-        except BaseException:
-            pass
-
-
-def get_cache_file_path(key):
-    """Genera una ruta de archivo para la clave de caché dada"""
-    # Convertir la clave a un nombre de archivo válido
-    cache_key = key.replace("/", "_").replace("?", "_").replace("=", "_")
-    return os.path.join(cache_dir, f"{cache_key}.json")
+# Espacios de nombres de las claves de caché para las métricas (de más a menos específico)
+CACHE_NAMESPACES = (
+    "recommendations_by_genres",
+    "recommendations",
+    "search",
+    "find_track",
+    "spotify_to_youtube",
+    "top_artists",
+    "artists_by_genre",
+    "artist_detail",
+    "mood_categories",
+    "pages_search",
+    "pages_watch",
+    "pages_artist_section",
+    "featured_playlists",
+    "new_releases",
+    "charts",
+)
+
+
+def cache_namespace(key):
+    # Las claves de @cached llevan delante la región: "US_charts.json"
+    for namespace in CACHE_NAMESPACES:
+        if key.startswith(namespace) or key.endswith(f"_{namespace}.json"):
+            return namespace
+    return "other"
 
 
-def get_cached_results(key):
+def get_cached(key, ttl_hours=24):
     """Obtiene resultados cacheados si existen y no han expirado"""
-    cache_file = get_cache_file_path(key)
+    entry = read_cache_entry(key, ttl_hours)
+    count_cache(cache_namespace(key), "hit" if entry else "miss")
+    return entry["content"] if entry else None
 
-    if os.path.exists(cache_file):
+
+def get_cached_response(key, ttl_hours=24):
+    """
+    Respuesta JSON con el contenido cacheado de key, o None si no hay (o está vacío).
+    El contenido se sirve ya serializado desde memoria: un acierto no decodifica el
+    archivo ni vuelve a codificarlo con jsonify.
+    """
+    with span("cache"):
+        body = serialized_cache.get(key, ttl_hours * 3600)
+    if body is None:
+        entry = read_cache_entry(key, ttl_hours)
+        if not entry or not entry["content"]:
+            count_cache(cache_namespace(key), "miss")
+            return None
+        body = dumps_bytes(entry["content"])
+        serialized_cache.put(key, body, datetime.fromisoformat(entry["timestamp"]).timestamp())
+    count_cache(cache_namespace(key), "hit")
+    return json_response(body)
+
+
+@timed("cache")
+def get_cached_many(keys, ttl_hours=24):
+    """Obtiene de una pasada los resultados cacheados vigentes de varias claves: {clave: contenido}"""
+    found = {}
+    limit = datetime.now() - timedelta(hours=ttl_hours)
+    for key in keys:
+        cache_file = os.path.join(CACHE_DIR, f"{key}.json")
         try:
             with open(cache_file, "r", encoding="utf-8") as f:
-                cached_data = json.load(f)
-
-            # Verificar si el caché ha expirado
-            cache_time = cached_data.get("timestamp", 0)
-            if time.time() - cache_time < CACHE_DURATION:
-                print(f"Cache hit para {key}")
-                return cached_data.get("data")
-            else:
-                print(f"Cache expirado para {key}")
+                data = json.load(f)
+            if datetime.fromisoformat(data["timestamp"]) > limit:
+                found[key] = data["content"]
+        except FileNotFoundError:
+            continue
         except Exception as e:
-            print(f"Error leyendo caché para {key}: {e}")
-
-    return None
-
-
-def get_best_thumbnail(thumbnails):
-    """Obtiene la mejor calidad de thumbnail disponible"""
-    default_thumbnail = "https://img.youtube.com/vi/default/hqdefault.jpg"
-
-    # Validar entrada
-    if not thumbnails or not isinstance(thumbnails, list):
-        logger.debug("[DEBUG-THUMBNAIL] Sin miniaturas disponibles para procesar")
-        return default_thumbnail
-
-    # Log detallado de la entrada
-    logger.info(f"[DEBUG-THUMBNAIL] Procesando thumbnails: {json.dumps(thumbnails[:2], indent=2, ensure_ascii=False)}")
-
-    # Filtrar y ordenar miniaturas por tamaño (width * height) de mayor a menor
-    valid_thumbnails = []
-    for t in thumbnails:
-        if isinstance(t, dict) and "url" in t:
-            # Si tiene dimensiones, usarlas para ordenar
-            if "width" in t and "height" in t:
-                valid_thumbnails.append(t)
-            # Si no tiene dimensiones pero tiene URL, también incluirla
-            else:
-                valid_thumbnails.append(t)
-
-    logger.info(f"[DEBUG-THUMBNAIL] Thumbnails válidos: {len(valid_thumbnails)}")
-
-    # Ordenar las miniaturas que tienen dimensiones (las mejores primero)
-    sorted_thumbnails = sorted(
-        [t for t in valid_thumbnails if "width" in t and "height" in t],
-        key=lambda x: x["width"] * x["height"],
-        reverse=True,
-    )
+            logger.warning(f"Error leyendo caché para {key}: {str(e)}")
+    for key in keys:
+        count_cache(cache_namespace(key), "hit" if key in found else "miss")
+    return found
 
-    # Preparar URL para devolver
-    thumbnail_url = ""
 
-    # Intentar obtener la mejor miniatura disponible
-    if sorted_thumbnails:
-        thumbnail_url = sorted_thumbnails[0]["url"]
-        logger.info(f"[DEBUG-THUMBNAIL] Usando miniatura ordenada: {thumbnail_url}")
-    elif valid_thumbnails:
-        thumbnail_url = valid_thumbnails[0]["url"]
-        logger.info(f"[DEBUG-THUMBNAIL] Usando primera miniatura válida: {thumbnail_url}")
-    else:
-        logger.warning("[DEBUG-THUMBNAIL] No se encontraron URLs válidas en las miniaturas")
-        return default_thumbnail
+def get_stale_cached(key):
+    """Obtiene resultados cacheados aunque hayan expirado, para usarlos cuando YouTube Music falla"""
+    entry = read_cache_entry(key, ttl_hours=STALE_CACHE_TTL_HOURS)
+    count_cache(cache_namespace(key), "stale" if entry else "stale_miss")
+    return entry["content"] if entry else None
 
-    # Validar y corregir la URL
-    if not thumbnail_url:
-        logger.warning("[DEBUG-THUMBNAIL] URL de miniatura vacía")
-        return default_thumbnail
 
-    # --- Añadir esta lógica de modificación de URL ---
+@timed("cache_write")
+def save_to_cache(key, content):
+    cache_file = os.path.join(CACHE_DIR, f"{key}.json")
     try:
-        # Intentar reemplazar los parámetros de tamaño por unos de mayor resolución
-        modified_url = re.sub(r"(=w)\d+(-h)\d+.*$", r"=w544-h544-l90-rj", thumbnail_url)
-        if modified_url != thumbnail_url:
-            thumbnail_url = modified_url
-            logger.info(f"[DEBUG-THUMBNAIL] URL modificada para mayor resolución: {thumbnail_url}")
+        # El contenido se serializa una vez: los mismos bytes van al archivo y a
+        # la caché en memoria de get_cached_response
+        now = datetime.now()
+        body = dumps_bytes(content)
+        with open(cache_file, "wb") as f:
+            f.write(b'{"timestamp":"' + now.isoformat().encode("ascii") + b'","content":' + body + b"}")
+            logger.debug(f"Datos guardados en caché: {key}")
+        if content:
+            serialized_cache.put(key, body, now.timestamp())
         else:
-            base_url = thumbnail_url.split("=")[0]
-            if base_url != thumbnail_url:  # Si había un '='
-                thumbnail_url = base_url
-                logger.info(f"[DEBUG-THUMBNAIL] URL modificada quitando parámetros: {thumbnail_url}")
+            serialized_cache.discard(key)
     except Exception as e:
-        logger.warning(f"[DEBUG-THUMBNAIL] No se pudo modificar la URL del thumbnail: {e}")
-    # --- Fin de la lógica de modificación ---
-
-    # Asegurar que la URL use HTTPS
-    if thumbnail_url.startswith("http:"):
-        thumbnail_url = thumbnail_url.replace("http:", "https:")
-        logger.info(f"[DEBUG-THUMBNAIL] Convertida URL a HTTPS: {thumbnail_url}")
-
-    # Verificar si es una URL relativa y convertirla a absoluta si es necesario
-    if not thumbnail_url.startswith(("http://", "https://")):
-        if thumbnail_url.startswith("//"):
-            thumbnail_url = "https:" + thumbnail_url
-            logger.info(f"[DEBUG-THUMBNAIL] Convertida URL relativa a absoluta: {thumbnail_url}")
-        else:
-            logger.warning(f"[DEBUG-THUMBNAIL] URL de miniatura inválida: {thumbnail_url}")
-            return default_thumbnail
+        logger.error(f"Error guardando caché para {key}: {str(e)}")
+        serialized_cache.discard(key)
+        # Intentar eliminar el archivo si existe y hay error al escribir
+        try:
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+        except BaseException:
+            pass
 
-    logger.info(f"[DEBUG-THUMBNAIL] URL final de miniatura: {thumbnail_url}")
-    return thumbnail_url
 
+search_transformer = SearchTransformer(get_best_thumbnail)
 
-def normalize_track_data(track, default_artist=""):
+
+@timed("transform")
+def normalize_track_data(track, default_artist="", source=None):
     """
     Normaliza los datos de una pista para garantizar consistencia en la estructura.
     Extrae el nombre del artista de manera robusta desde diferentes fuentes posibles.
     """
-    if not track:
-        logger.warning("[DEBUG-NORMALIZE] Se recibió un objeto track nulo o vacío")
+    normalized = Track.from_ytmusic(track, default_artist=default_artist, source=source)
+    if normalized is None:
+        logger.warning("[NORMALIZE] Se recibió un objeto track nulo o vacío")
         return None
-
-    # Loggear los datos de entrada para depuración
-    logger.info(f"[DEBUG-NORMALIZE] Normalizando track: {track.get('title', 'Sin título')}")
-
-    # ID del video es obligatorio
-    original_track_id = track.get("videoId", "")
-    track_id = original_track_id
-    logger.info(f"[DEBUG-NORMALIZE] ID de video original: '{track_id}'")
-
-    # Validar ID del video
-    if not track_id:
-        # Buscar en campo 'id' como alternativa
-        if "id" in track and track["id"] and track["id"] != "default" and len(track["id"]) > 5:
-            track_id = track["id"]
-            logger.info(f"[DEBUG-NORMALIZE] Usando 'id' alternativo: {track_id}")
-        else:
-            logger.warning(f"[DEBUG-NORMALIZE] ID de video vacío para track: {track.get('title', 'Sin título')}")
-            # No rechazamos el track aquí para poder seguir procesando otros datos
-
-    # Verificar si el ID es "default" o un valor no válido
-    if track_id == "default" or (track_id and len(track_id) < 5):
-        logger.warning(f"[DEBUG-NORMALIZE] ID de video inválido: '{track_id}' para track: {track.get('title', 'Sin título')}")
-
-        # Intentar buscar un ID alternativo en otros campos
-        if "id" in track and track["id"] and track["id"] != "default" and track["id"] != track_id and len(track["id"]) > 5:
-            track_id = track["id"]
-            logger.info(f"[DEBUG-NORMALIZE] Usando ID alternativo 'id': {track_id}")
-        elif "browseId" in track and track["browseId"] and track["browseId"] != "default" and len(track["browseId"]) > 5:
-            track_id = track["browseId"]
-            logger.info(f"[DEBUG-NORMALIZE] Usando ID alternativo 'browseId': {track_id}")
-        # Buscar en cualquier otro campo que parezca un ID
-        else:
-            for key, value in track.items():
-                if isinstance(value, str) and "id" in key.lower() and value != "default" and len(value) > 5:
-                    track_id = value
-                    logger.info(f"[DEBUG-NORMALIZE] Usando ID alternativo '{key}': {track_id}")
-                    break
-
-        # Verificar si finalmente tenemos un ID válido
-        if track_id == "default" or not track_id or len(track_id) < 5:
-            logger.warning(f"[DEBUG-NORMALIZE] No se encontró un ID alternativo válido. Usando un ID generado.")
-            # Generar un ID basado en título y artista para garantizar que haya un valor
-            title_str = track.get("title", "unknown")
-            artist_str = track.get("artist", track.get("author", "unknown"))
-            track_id = f"gen_{hash(title_str + artist_str) % 10000000:07d}"
-            logger.info(f"[DEBUG-NORMALIZE] ID generado: {track_id}")
-
-    # Obtener el título con valor predeterminado
-    title = track.get("title", "Sin título")
-
-    # Extraer el artista de manera robusta desde diferentes posibles campos
-    artist = ""
-
-    # Estructura para registrar la fuente del artista (debug)
-    artist_source = "ninguna"
-
-    # 1. Primero intentar con el campo 'artists' que es el más completo
-    if "artists" in track and isinstance(track["artists"], list) and track["artists"]:
-        for artist_obj in track["artists"]:
-            if isinstance(artist_obj, dict) and "name" in artist_obj and artist_obj["name"]:
-                artist = artist_obj["name"]
-                artist_source = "artists[].name"
-                break
-
-    # 2. Si no hay 'artists', intentar con 'artist'
-    if not artist and "artist" in track and track["artist"]:
-        artist = track["artist"]
-        artist_source = "artist"
-
-    # 3. Si no hay 'artist', intentar con 'author'
-    if not artist and "author" in track and track["author"]:
-        artist = track["author"]
-        artist_source = "author"
-
-    # 4. Intentar con campo 'authors'
-    if not artist and "authors" in track and isinstance(track["authors"], list) and track["authors"]:
-        for author_obj in track["authors"]:
-            if isinstance(author_obj, dict) and "name" in author_obj and author_obj["name"]:
-                artist = author_obj["name"]
-                artist_source = "authors[].name"
-                break
-
-    # 5. Verificar si hay un campo artistInfo
-    if not artist and "artistInfo" in track:
-        if isinstance(track["artistInfo"], dict) and "artist" in track["artistInfo"]:
-            artist = track["artistInfo"]["artist"]
-            artist_source = "artistInfo.artist"
-
-    # 6. Si todavía no hay artista, intentar buscar en cualquier otra
-    # estructura
-    if not artist:
-        # Buscar cualquier campo que contenga 'artist' en su nombre
-        for key in track.keys():
-            if "artist" in key.lower() and track[key] and isinstance(track[key], str):
-                artist = track[key]
-                artist_source = f"campo_{key}"
-                break
-
-    # 7. Si no se encontró ningún campo de artista, usar el valor
-    # predeterminado
-    if not artist:
-        if default_artist:
-            artist = default_artist
-            artist_source = "default_artist"
-        else:
-            artist = "Artista desconocido"
-            artist_source = "valor_predeterminado"
-
-    # Depuración detallada para comprender la estructura de datos
-    logger.debug(f"[NORMALIZE] Track: '{title}' | Artist: '{artist}' | Fuente: {artist_source}")
-
-    # Extraer la mejor imagen o usar URL predeterminada de YouTube basada en
-    # el ID del video
-    thumbnail = get_best_thumbnail(track.get("thumbnails", []))
-
-    # Verificar si tenemos una URL de miniatura válida
-    has_valid_thumbnail = thumbnail and isinstance(thumbnail, str) and len(thumbnail) > 10 and "default" not in thumbnail
-
-    if not has_valid_thumbnail:
-        # Si no hay thumbnail o no es válida, intentar con otros campos de
-        # imágenes
-        logger.info(f"[DEBUG-NORMALIZE] Thumbnail no válida: {thumbnail}")
-
-        # Probar diferentes fuentes de imágenes
-        alternative_thumbnails = []
-
-        # 1. Verificar si hay un campo 'thumbnail' directo
-        if "thumbnail" in track and isinstance(track["thumbnail"], str) and len(track["thumbnail"]) > 10:
-            alternative_thumbnails.append(("campo_thumbnail", track["thumbnail"]))
-
-        # 2. Verificar si hay un campo 'cover'
-        if "cover" in track and isinstance(track["cover"], str) and len(track["cover"]) > 10:
-            alternative_thumbnails.append(("campo_cover", track["cover"]))
-
-        # 3. Verificar si hay un campo 'albumArt'
-        if "albumArt" in track and isinstance(track["albumArt"], str) and len(track["albumArt"]) > 10:
-            alternative_thumbnails.append(("campo_albumArt", track["albumArt"]))
-
-        # 4. Buscar cualquier campo que parezca contener una URL de imagen
-        for key, value in track.items():
-            if isinstance(value, str) and ("image" in key.lower() or "thumbnail" in key.lower() or "cover" in key.lower()):
-                if value.startswith("http") and len(value) > 10:
-                    alternative_thumbnails.append((f"campo_{key}", value))
-
-        # Usar la primera alternativa válida que encontremos
-        if alternative_thumbnails:
-            source, value = alternative_thumbnails[0]
-            logger.info(f"[DEBUG-NORMALIZE] Usando miniatura alternativa de {source}: {value}")
-            thumbnail = value
-        # Si no hay alternativas pero tenemos un ID válido, generar URL de
-        # miniatura de YouTube
-        elif track_id and track_id != "default":
-            thumbnail = f"https://img.youtube.com/vi/{track_id}/hqdefault.jpg"
-            logger.info(f"[DEBUG-NORMALIZE] Creando URL de miniatura basada en ID: {thumbnail}")
-
-    # Verificar si la URL de la miniatura contiene "default"
-    if "default" in thumbnail and track_id != "default":
-        logger.warning(
-            f"[DEBUG-NORMALIZE] URL de miniatura contiene 'default' cuando el ID no debería ser 'default': {thumbnail}"
-        )
-        # Corregir URL si es necesario
-        thumbnail = f"https://img.youtube.com/vi/{track_id}/hqdefault.jpg"
-        logger.info(f"[DEBUG-NORMALIZE] URL de miniatura corregida: {thumbnail}")
-
-    # Procesar duración de manera consistente
-    duration = track.get("duration", track.get("length", ""))
-    duration_seconds = 0
-    
-    # Primero intentar usar duration_seconds si está disponible (versiones nuevas de ytmusicapi)
-    if "duration_seconds" in track and track["duration_seconds"]:
-        duration_seconds = int(track["duration_seconds"])
-    elif isinstance(duration, str) and ":" in duration:
-        try:
-            parts = duration.split(":")
-            if len(parts) == 2:  # MM:SS
-                duration_seconds = int(parts[0]) * 60 + int(parts[1])
-            elif len(parts) == 3:  # HH:MM:SS
-                duration_seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-        except ValueError:
-            # Si hay error de conversión, dejar como 0
-            duration_seconds = 0
-    elif isinstance(duration, (int, float)):
-        duration_seconds = int(duration)
-    
-    # Log para debug
-    logger.debug(f"Duración procesada para '{title}': original='{duration}', segundos={duration_seconds}")
-
-    # Crear y devolver objeto de datos normalizado
-    normalized_track = {
-        "id": track_id,
-        "title": title,
-        "artist": artist,
-        "thumbnail": thumbnail,
-        "duration": duration_seconds,  # Ahora siempre en segundos
-        "duration_text": duration,  # También incluir el formato original para referencia
-        "source": track.get("source", "youtube_music"),
-    }
-
-    logger.info(f"[DEBUG-NORMALIZE] Track normalizado: ID={track_id}, Título={title}, Artista={artist}, Thumbnail={thumbnail}")
-    return normalized_track
+    return normalized.to_dict()
 
 
 def setup_ytmusic_auth():
@@ -522,10 +408,10 @@ def setup_ytmusic_auth():
         # Caso contrario, creamos una nueva instancia
         if AUTH_FILE and os.path.exists(AUTH_FILE):
             # Usar archivo de autenticación si existe
-            yt_music = YTMusic(AUTH_FILE, language=region)
+            yt_music = create_ytmusic(AUTH_FILE, language=region)
         else:
             # Usar autenticación básica sin credenciales
-            yt_music = YTMusic(language=region)
+            yt_music = create_ytmusic(language=region)
 
         # Guardar la región utilizada
         yt_music.region = region
@@ -535,7 +421,7 @@ def setup_ytmusic_auth():
     except Exception as e:
         logger.error(f"Error en setup_auth: {str(e)}")
         # Fallback a crear una instancia simple sin autenticación
-        yt_music = YTMusic(language=region)
+        yt_music = create_ytmusic(language=region)
         return yt_music
 
 
@@ -555,6 +441,129 @@ def setup_auth():
         return jsonify({"success": False, "error": str(e)}), 400
 
 
+@timed("transform")
+def transform_search_results(query, search_results, filter_type, region, language, fallback=False):
+    """Transforma los resultados crudos de una búsqueda; [] si no hubo resultados"""
+    if not search_results:
+        if fallback:
+            logger.warning(f"No se encontraron resultados en el fallback para: {query}")
+        else:
+            logger.warning(f"No se encontraron resultados para: {query}")
+        return []
+
+    transformed_results = search_transformer.transform(search_results, filter_type, region, language)
+    if fallback:
+        logger.info(f"Búsqueda de fallback en {filter_type} completada, enviando {len(transformed_results)} resultados")
+    else:
+        logger.info(f"Búsqueda de {filter_type} completada, enviando {len(transformed_results)} resultados")
+    return transformed_results
+
+
+def run_search(query, filter_type, limit, region, language):
+    """
+    Ejecuta una búsqueda de un filtro en YouTube Music (con los fallbacks de idioma)
+    y devuelve los resultados transformados; None si la búsqueda falló.
+    """
+    # Configurar YTMusic con la región e idioma específicos
+    try:
+        music = get_ytmusic_for_language(language)
+
+        # Realizar la búsqueda
+        start_time = time.time()
+        search_results = music.search(query, filter=filter_type, limit=limit)
+        elapsed = time.time() - start_time
+        logger.info(f"Búsqueda completada en {elapsed:.2f}s, resultados: {len(search_results) if search_results else 0}")
+
+        return transform_search_results(query, search_results, filter_type, region, language)
+    except Exception as e:
+        logger.error(f"Error al realizar la búsqueda con idioma {language}: {str(e)}")
+
+    # Intentar con inglés como idioma de fallback si no es el que ya estamos
+    # usando; si ya era inglés, intentar sin especificar idioma
+    if language != "en":
+        logger.info(f"Intentando búsqueda con idioma inglés para: {query}")
+        get_client, fallback_region, fallback_language = lambda: get_ytmusic_for_language("en"), region, "en"
+        error_message = "Error también en la búsqueda con idioma inglés"
+    else:
+        logger.info(f"Intentando búsqueda sin especificar idioma para: {query}")
+        get_client, fallback_region, fallback_language = get_ytmusic, "global", "default"
+        error_message = "Error también en la búsqueda de fallback"
+
+    try:
+        # Clientes reutilizables: en el camino de error no se crea uno nuevo en cada búsqueda
+        music_fallback = get_client()
+        search_results = music_fallback.search(query, filter=filter_type, limit=limit)
+        return transform_search_results(
+            query, search_results, filter_type, fallback_region, fallback_language, fallback=True
+        )
+    except Exception as fallback_error:
+        logger.error(f"{error_message}: {str(fallback_error)}")
+        return None
+
+
+# Filtros que se pueden combinar en una sola búsqueda (filter=songs,artists o filter=all)
+SEARCH_FILTERS = ("songs", "videos", "artists", "albums")
+SEARCH_ALL_FILTERS = ("songs", "artists", "albums")
+SEARCH_CACHE_TTL_HOURS = float(os.environ.get("SEARCH_CACHE_TTL_HOURS", 1))
+
+
+def parse_search_filters(filter_type):
+    """Convierte el parámetro filter en la lista de filtros a buscar (vacía si no es válido)"""
+    filter_type = (filter_type or "songs").lower()
+    if filter_type == "all":
+        return list(SEARCH_ALL_FILTERS)
+    if "," not in filter_type:
+        # Un solo filtro: se pasa tal cual a ytmusicapi, como hasta ahora
+        return [filter_type]
+    filters = list(dict.fromkeys(name.strip() for name in filter_type.split(",") if name.strip()))
+    if not filters or any(name not in SEARCH_FILTERS for name in filters):
+        return []
+    return filters
+
+
+def search_cache_key(query, filter_type, limit, region, language):
+    digest = hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()[:16]
+    return f"search_{filter_type}_{language}_{region}_{limit}_{digest}"
+
+
+def cached_search(query, filter_type, limit, region, language):
+    """run_search con caché por filtro; None si la búsqueda falló"""
+    cache_key = search_cache_key(query, filter_type, limit, region, language)
+    cached_results = get_cached(cache_key, ttl_hours=SEARCH_CACHE_TTL_HOURS)
+    if cached_results:
+        logger.info(f"Búsqueda de {filter_type} desde caché: {query}")
+        return cached_results
+
+    results = run_search(query, filter_type, limit, region, language)
+    if results:
+        suggestion_index.add_results(results)
+        if not is_partial():
+            save_to_cache(cache_key, results)
+    return results
+
+
+def load_page_state(ttl_hours):
+    return lambda key: get_cached(key, ttl_hours=ttl_hours)
+
+
+def save_page_state(key, state):
+    if not is_partial():
+        save_to_cache(key, state)
+
+
+def fetch_search_window(params, count):
+    """Los primeros count resultados de una búsqueda paginada; None si falló"""
+    results = run_search(params["query"], params["filter"], count, params["region"], params["language"])
+    if results:
+        suggestion_index.add_results(results)
+    return results
+
+
+search_pages = PagedSource(
+    "search", fetch_search_window, load_page_state(SEARCH_CACHE_TTL_HOURS), save_page_state
+)
+
+
 @app.route("/api/search", methods=["GET"])
 def search():
     """Busca tracks, albums, artistas, playlists en YouTube Music"""
@@ -592,6 +601,19 @@ def search():
             logger.warning(f"Idioma '{language}' no soportado. Usando 'en' como fallback.")
             language = "en"  # Usar inglés como fallback
 
+        try:
+            paging = page_args(default_page_size=limit)
+        except CursorError as e:
+            return jsonify({"error": str(e)}), 400
+        if paging is not None and paging[0] is not None:
+            # Las páginas siguientes llevan la consulta en el cursor
+            cursor_params = paging[0]
+            query, filter_type = str(cursor_params.get("query", "")), str(cursor_params.get("filter", "songs"))
+            region, language = str(cursor_params.get("region", region)), str(cursor_params.get("language", language))
+            # El cursor lo envía el cliente: su idioma se valida igual que el del parámetro
+            if language not in supported_languages:
+                return jsonify({"error": "Cursor no válido"}), 400
+
         if not query:
             return jsonify({"error": "Se requiere parámetro query"}), 400
 
@@ -599,293 +621,65 @@ def search():
             f"Búsqueda en YouTube Music: {query} (filtro: {filter_type}, límite: {limit}, región: {region}, idioma: {language})"
         )
 
-        # Configurar YTMusic con la región e idioma específicos
-        try:
-            music = YTMusic(language=language)
-
-            # Realizar la búsqueda
-            start_time = time.time()
-            search_results = music.search(query, filter=filter_type, limit=limit)
-            elapsed = time.time() - start_time
-            logger.info(f"Búsqueda completada en {elapsed:.2f}s, resultados: {len(search_results) if search_results else 0}")
-
-            if search_results and len(search_results) > 0:
-                # Transformar los resultados
-                transformed_results = []
-
-                for item in search_results:
-                    # Para búsqueda de canciones/videos
-                    if filter_type.lower() in ["songs", "videos"] and item.get("resultType", "").lower() in ["song", "video"]:
-                        # Convertir duración a segundos si viene como string (formato MM:SS)
-                        duration = item.get("duration", "")
-                        duration_seconds = 0
-                        
-                        # Primero intentar usar duration_seconds si está disponible (versiones nuevas de ytmusicapi)
-                        if "duration_seconds" in item and item["duration_seconds"]:
-                            duration_seconds = int(item["duration_seconds"])
-                        elif isinstance(duration, str) and ":" in duration:
-                            try:
-                                parts = duration.split(":")
-                                if len(parts) == 2:  # MM:SS
-                                    duration_seconds = int(parts[0]) * 60 + int(parts[1])
-                                elif len(parts) == 3:  # HH:MM:SS
-                                    duration_seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                            except ValueError:
-                                # Si hay error de conversión, dejar como 0
-                                duration_seconds = 0
-                        elif isinstance(duration, (int, float)):
-                            duration_seconds = int(duration)
-                        
-                        # Log para debug
-                        logger.debug(f"Duración procesada para '{item.get('title', 'Sin título')}': original='{duration}', segundos={duration_seconds}")
-                        
-                        track_data = {
-                            "id": item.get("videoId", ""),
-                            "title": item.get("title", "Sin título"),
-                            "artist": item.get("artists", [{"name": "Artista desconocido"}])[0].get(
-                                "name", "Artista desconocido"
-                            ),
-                            "thumbnail": get_best_thumbnail(item.get("thumbnails", [])),
-                            "album": (item.get("album", {}).get("name", "") if item.get("album") else ""),
-                            "duration": duration_seconds,  # Ahora siempre devolvemos un número en segundos
-                            "duration_text": duration,  # También incluir el formato original para referencia
-                            "region": region,  # Incluir la región en la respuesta
-                            "language": language,  # Incluir el idioma usado
-                        }
-                        transformed_results.append(track_data)
-                    # Para búsqueda de artistas
-                    elif filter_type.lower() == "artists" and item.get("resultType", "").lower() == "artist":
-                        artist_data = {
-                            "browseId": item.get("browseId", ""),
-                            "title": item.get("title", "Sin nombre"),
-                            "name": item.get("title", "Sin nombre"),  # Duplicado para compatibilidad
-                            "thumbnails": item.get("thumbnails", []),
-                            "region": region,
-                            "language": language,
-                        }
-                        transformed_results.append(artist_data)
-                    # Para búsqueda de álbumes
-                    elif filter_type.lower() == "albums" and item.get("resultType", "").lower() == "album":
-                        album_data = {
-                            "browseId": item.get("browseId", ""),
-                            "title": item.get("title", "Sin título"),
-                            "thumbnails": item.get("thumbnails", []),
-                            "artist": (
-                                item.get("artists", [{"name": "Artista desconocido"}])[0].get("name", "Artista desconocido")
-                                if item.get("artists")
-                                else "Artista desconocido"
-                            ),
-                            "year": item.get("year", ""),
-                            "region": region,
-                            "language": language,
-                        }
-                        transformed_results.append(album_data)
-
-                logger.info(f"Búsqueda de {filter_type} completada, enviando {len(transformed_results)} resultados")
-
-                return jsonify(transformed_results)
-            else:
-                logger.warning(f"No se encontraron resultados para: {query}")
-                return jsonify([])
-        except Exception as e:
-            logger.error(f"Error al realizar la búsqueda con idioma {language}: {str(e)}")
-            # Intentar con inglés como idioma de fallback si no es el que ya
-            # estamos usando
-            if language != "en":
-                try:
-                    logger.info(f"Intentando búsqueda con idioma inglés para: {query}")
-                    music_fallback = YTMusic(language="en")
-                    search_results = music_fallback.search(query, filter=filter_type, limit=limit)
-
-                    if search_results and len(search_results) > 0:
-                        # Transformar los resultados igual que antes
-                        transformed_results = []
-
-                        for item in search_results:
-                            # Para búsqueda de canciones/videos
-                            if filter_type.lower() in ["songs", "videos"] and item.get("resultType", "").lower() in [
-                                "song",
-                                "video",
-                            ]:
-                                # Convertir duración a segundos si viene como string (formato MM:SS)
-                                duration = item.get("duration", "")
-                                duration_seconds = 0
-                                
-                                # Primero intentar usar duration_seconds si está disponible (versiones nuevas de ytmusicapi)
-                                if "duration_seconds" in item and item["duration_seconds"]:
-                                    duration_seconds = int(item["duration_seconds"])
-                                elif isinstance(duration, str) and ":" in duration:
-                                    try:
-                                        parts = duration.split(":")
-                                        if len(parts) == 2:  # MM:SS
-                                            duration_seconds = int(parts[0]) * 60 + int(parts[1])
-                                        elif len(parts) == 3:  # HH:MM:SS
-                                            duration_seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                                    except ValueError:
-                                        # Si hay error de conversión, dejar como 0
-                                        duration_seconds = 0
-                                elif isinstance(duration, (int, float)):
-                                    duration_seconds = int(duration)
-                                
-                                # Log para debug
-                                logger.debug(f"Duración procesada para '{item.get('title', 'Sin título')}': original='{duration}', segundos={duration_seconds}")
-                                
-                                track_data = {
-                                    "id": item.get("videoId", ""),
-                                    "title": item.get("title", "Sin título"),
-                                    "artist": item.get("artists", [{"name": "Artista desconocido"}])[0].get(
-                                        "name", "Artista desconocido"
-                                    ),
-                                    "thumbnail": get_best_thumbnail(item.get("thumbnails", [])),
-                                    "album": (item.get("album", {}).get("name", "") if item.get("album") else ""),
-                                    "duration": duration_seconds,  # Ahora siempre devolvemos un número en segundos
-                                    "duration_text": duration,  # También incluir el formato original para referencia
-                                    "region": region,
-                                    "language": "en",  # Indicar que se usó inglés como fallback
-                                }
-                                transformed_results.append(track_data)
-                            # Para búsqueda de artistas
-                            elif filter_type.lower() == "artists" and item.get("resultType", "").lower() == "artist":
-                                artist_data = {
-                                    "browseId": item.get("browseId", ""),
-                                    "title": item.get("title", "Sin nombre"),
-                                    "name": item.get("title", "Sin nombre"),  # Duplicado para compatibilidad
-                                    "thumbnails": item.get("thumbnails", []),
-                                    "region": region,
-                                    "language": "en",  # Fallback en inglés
-                                }
-                                transformed_results.append(artist_data)
-                            # Para búsqueda de álbumes
-                            elif filter_type.lower() == "albums" and item.get("resultType", "").lower() == "album":
-                                album_data = {
-                                    "browseId": item.get("browseId", ""),
-                                    "title": item.get("title", "Sin título"),
-                                    "thumbnails": item.get("thumbnails", []),
-                                    "artist": (
-                                        item.get("artists", [{"name": "Artista desconocido"}])[0].get(
-                                            "name", "Artista desconocido"
-                                        )
-                                        if item.get("artists")
-                                        else "Artista desconocido"
-                                    ),
-                                    "year": item.get("year", ""),
-                                    "region": region,
-                                    "language": "en",  # Fallback en inglés
-                                }
-                                transformed_results.append(album_data)
-
-                        logger.info(
-                            f"Búsqueda de fallback en {filter_type} completada, enviando {len(transformed_results)} resultados"
-                        )
-
-                        return jsonify(transformed_results)
-                    else:
-                        logger.warning(f"No se encontraron resultados en el fallback para: {query}")
-                        return jsonify([])
-                except Exception as fallback_error:
-                    logger.error(f"Error también en la búsqueda con idioma inglés: {str(fallback_error)}")
-                    return jsonify([])  # <-- Added newline before return
-            else:
-                # Si ya estábamos usando inglés y falló, intentar sin
-                # especificar idioma
-                try:
-                    logger.info(f"Intentando búsqueda sin especificar idioma para: {query}")
-                    music_fallback = YTMusic()
-                    search_results = music_fallback.search(query, filter=filter_type, limit=limit)
-
-                    if search_results and len(search_results) > 0:
-                        # Transformar los resultados igual que antes
-                        transformed_results = []
-
-                        for item in search_results:
-                            # Para búsqueda de canciones/videos
-                            if filter_type.lower() in ["songs", "videos"] and item.get("resultType", "").lower() in [
-                                "song",
-                                "video",
-                            ]:
-                                # Convertir duración a segundos si viene como string (formato MM:SS)
-                                duration = item.get("duration", "")
-                                duration_seconds = 0
-                                
-                                # Primero intentar usar duration_seconds si está disponible (versiones nuevas de ytmusicapi)
-                                if "duration_seconds" in item and item["duration_seconds"]:
-                                    duration_seconds = int(item["duration_seconds"])
-                                elif isinstance(duration, str) and ":" in duration:
-                                    try:
-                                        parts = duration.split(":")
-                                        if len(parts) == 2:  # MM:SS
-                                            duration_seconds = int(parts[0]) * 60 + int(parts[1])
-                                        elif len(parts) == 3:  # HH:MM:SS
-                                            duration_seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                                    except ValueError:
-                                        # Si hay error de conversión, dejar como 0
-                                        duration_seconds = 0
-                                elif isinstance(duration, (int, float)):
-                                    duration_seconds = int(duration)
-                                
-                                # Log para debug
-                                logger.debug(f"Duración procesada para '{item.get('title', 'Sin título')}': original='{duration}', segundos={duration_seconds}")
-                                
-                                track_data = {
-                                    "id": item.get("videoId", ""),
-                                    "title": item.get("title", "Sin título"),
-                                    "artist": item.get("artists", [{"name": "Artista desconocido"}])[0].get(
-                                        "name", "Artista desconocido"
-                                    ),
-                                    "thumbnail": get_best_thumbnail(item.get("thumbnails", [])),
-                                    "album": (item.get("album", {}).get("name", "") if item.get("album") else ""),
-                                    "duration": duration_seconds,  # Ahora siempre devolvemos un número en segundos
-                                    "duration_text": duration,  # También incluir el formato original para referencia
-                                    "region": "global",
-                                    "language": "default",  # Indicar que se usó la configuración predeterminada
-                                }
-                                transformed_results.append(track_data)
-                            # Para búsqueda de artistas
-                            elif filter_type.lower() == "artists" and item.get("resultType", "").lower() == "artist":
-                                artist_data = {
-                                    "browseId": item.get("browseId", ""),
-                                    "title": item.get("title", "Sin nombre"),
-                                    "name": item.get("title", "Sin nombre"),  # Duplicado para compatibilidad
-                                    "thumbnails": item.get("thumbnails", []),
-                                    "region": "global",
-                                    "language": "default",  # Fallback en inglés
-                                }
-                                transformed_results.append(artist_data)
-                            # Para búsqueda de álbumes
-                            elif filter_type.lower() == "albums" and item.get("resultType", "").lower() == "album":
-                                album_data = {
-                                    "browseId": item.get("browseId", ""),
-                                    "title": item.get("title", "Sin título"),
-                                    "thumbnails": item.get("thumbnails", []),
-                                    "artist": (
-                                        item.get("artists", [{"name": "Artista desconocido"}])[0].get(
-                                            "name", "Artista desconocido"
-                                        )
-                                        if item.get("artists")
-                                        else "Artista desconocido"
-                                    ),
-                                    "year": item.get("year", ""),
-                                    "region": "global",
-                                    "language": "default",  # Fallback en inglés
-                                }
-                                transformed_results.append(album_data)
-
-                        logger.info(
-                            f"Búsqueda de fallback en {filter_type} completada, enviando {len(transformed_results)} resultados"
-                        )
-
-                        return jsonify(transformed_results)
-                    else:
-                        logger.warning(f"No se encontraron resultados en el fallback para: {query}")
-                        return jsonify([])
-                except Exception as fallback_error:
-                    logger.error(f"Error también en la búsqueda de fallback: {str(fallback_error)}")
-                    return jsonify([])
+        filters = parse_search_filters(filter_type)
+        if not filters:
+            return jsonify({"error": f"Filtro no válido: '{filter_type}'"}), 400
+
+        if paging is not None:
+            if len(filters) != 1 or "," in filter_type:
+                return jsonify({"error": "La paginación con cursor solo admite un filtro"}), 400
+            _, offset, page_size = paging
+            params = {"query": query, "filter": filters[0], "region": region, "language": language}
+            page = search_pages.page(params, offset, page_size) or {"items": [], "nextCursor": None}
+            # Las páginas siguientes son la misma búsqueda: solo cuenta la primera
+            if page["items"] and paging[0] is None:
+                suggestion_index.record_query(query)
+            return partial_jsonify(page)
+
+        if len(filters) == 1 and "," not in filter_type:
+            cached_response = get_cached_response(
+                search_cache_key(query, filters[0], limit, region, language), ttl_hours=SEARCH_CACHE_TTL_HOURS
+            )
+            if cached_response:
+                logger.info(f"Búsqueda de {filters[0]} desde caché: {query}")
+                suggestion_index.record_query(query)
+                return cached_response
+            results = cached_search(query, filters[0], limit, region, language)
+            if results:
+                suggestion_index.record_query(query)
+            return jsonify(results or [])
+
+        # Varios filtros: búsquedas concurrentes, cada una con su propia entrada de caché
+        slices = run_concurrently(
+            lambda name: cached_search(query, name, limit, region, language), filters, len(filters)
+        )
+        results = {name: slices.get(name) or [] for name in filters}
+        failed = [name for name in filters if slices.get(name) is None]
+        if failed:
+            logger.warning(f"Búsqueda combinada sin resultados de: {', '.join(failed)}")
+        if any(results.values()):
+            suggestion_index.record_query(query)
+        return partial_jsonify({"query": query, "filters": filters, "results": results, "failed": failed})
     except Exception as e:
         logger.error(f"Error general en endpoint search: {str(e)}")
         return jsonify([])
 
 
+def merge_suggestions(local, remote, limit):
+    """Sugerencias locales primero y después las remotas, sin textos repetidos"""
+    merged = []
+    seen = set()
+    for suggestion in list(local) + list(remote):
+        key = normalize_text(suggestion.get("text", ""))
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(suggestion)
+        if len(merged) >= limit:
+            break
+    return merged
+
+
 @app.route("/api/suggestions", methods=["GET"])
 def get_suggestions():
     try:
@@ -895,28 +689,43 @@ def get_suggestions():
         if not query:
             return jsonify([])
 
-        # Intentar obtener sugerencias de YouTube Music
+        # 1. Índice local (títulos y artistas ya vistos, consultas populares)
+        local = suggestion_index.lookup(query, limit)
+        if len(local) >= limit:
+            suggestion_index.count("local_hits")
+            return jsonify(local)
+
+        # 2. Sugerencias ya pedidas para esta consulta o para un prefijo suyo
+        remote = suggestion_index.cached(query, limit)
+        if remote is not None:
+            suggestion_index.count("prefix_hits")
+            return jsonify(merge_suggestions(local, remote, limit))
+
+        # 3. Intentar obtener sugerencias de YouTube Music
         try:
+            suggestion_index.count("misses")
             ytmusic = get_ytmusic()
-            search_results = ytmusic.search(query, filter="songs", limit=limit)
-
-            suggestions = []
-            for result in search_results:
-                if "title" in result and "artists" in result:
-                    suggestion = {
-                        "id": result.get("videoId", f"suggestion_{len(suggestions)}"),
-                        "text": f"{result['title']} - {', '.join(artist['name'] for artist in result['artists'])}",
-                        "type": "track",
-                        "source": "youtube",
-                        "artist": ', '.join(artist['name'] for artist in result['artists']),
-                        "trackName": result['title'],
-                        "imageUrl": get_best_thumbnail(result.get("thumbnails", []))
-                    }
-                    suggestions.append(suggestion)
+            search_suggestions = ytmusic.get_search_suggestions(query)
+
+            remote = []
+            for text in search_suggestions or []:
+                if isinstance(text, str) and text.strip():
+                    # Texto de búsqueda sin artista ni miniatura: no es un track
+                    remote.append(
+                        {
+                            "id": f"query_{normalize_text(text).replace(' ', '_')}",
+                            "text": text,
+                            "type": "query",
+                            "source": "youtube",
+                        }
+                    )
+            suggestion_index.remember(query, remote)
 
-            return jsonify(suggestions)
+            return jsonify(merge_suggestions(local, remote, limit))
         except Exception as e:
             logger.error(f"Error al obtener sugerencias de YouTube Music: {str(e)}")
+            if local:
+                return jsonify(local)
             # Si falla YouTube Music, devolver sugerencias locales
             return jsonify([
                 { "id": "local-artist-bad-bunny", "text": "Bad Bunny", "type": "artist", "source": "local" },
@@ -933,42 +742,52 @@ def get_suggestions():
         return jsonify([])
 
 
-@app.route("/api/find-track", methods=["GET"])
-def find_track():
-    """Encuentra un track por título y artista"""
-    title = request.args.get("title", "")
-    artist = request.args.get("artist", "")
-    query = request.args.get("query", f"{title} {artist}").strip()
+# Caché de find_track: 1 semana
+FIND_TRACK_TTL_HOURS = 24 * 7
 
-    if not query:
-        return (
-            jsonify(
-                {
-                    "id": "",
-                    "title": "",
-                    "artist": "",
-                    "error": "Se requiere una consulta",
-                }
-            ),
-            400,
-        )
+# Límites del endpoint de resolución por lotes
+FIND_TRACKS_MAX_ITEMS = int(os.environ.get("FIND_TRACKS_MAX_ITEMS", 500))
+FIND_TRACKS_MAX_WORKERS = int(os.environ.get("FIND_TRACKS_MAX_WORKERS", 8))
 
-    # Verificar caché
-    cache_key = f"find_track_{query.replace(' ', '_')}"
-    cached_track = get_cached(cache_key, ttl_hours=24 * 7)  # 1 semana
-    if cached_track:
-        logger.info(f"[RASTREO-PLAYLIST] Usando caché para: '{query}'")
-        return jsonify(cached_track)
 
-    try:
-        # Configuración regional
-        region = request.args.get("region", "US")
-        language = request.args.get("language", "en")
+def format_duration(seconds):
+    """Duración en segundos con el formato de texto de YouTube Music ("3:25", "1:02:03")"""
+    if not seconds:
+        return ""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
 
-        logger.info(f"[RASTREO-PLAYLIST] Configuración: region={region}, language={language}")
+def find_track_cache_key(query):
+    return f"find_track_{query.replace(' ', '_')}"
 
+
+def resolve_track(query, title="", artist="", language="en"):
+    """
+    Busca en YouTube Music el track que mejor coincide con la consulta.
+    Devuelve (datos, código HTTP) con el mismo formato que /api/find-track.
+    """
+    cache_key = find_track_cache_key(query)
+
+    # Catálogo local: si el track ya pasó por el servicio no hace falta buscarlo
+    local_track = track_catalog.find(query, title, artist)
+    if local_track:
+        track_info = {
+            "id": local_track["video_id"],
+            "title": local_track["title"],
+            "artist": local_track["artist"].split(", ")[0] if local_track["artist"] else artist,
+            "album": local_track["album"] or "",
+            "thumbnail": local_track["thumbnail"] or "",
+            "duration": format_duration(local_track["duration"]),
+            "source": "catalog",
+        }
+        save_to_cache(cache_key, track_info)
+        return track_info, 200
+
+    try:
         start_time = time.time()
-        music = YTMusic(language=language)
+        music = get_ytmusic_for_language(language)
 
         # Buscar con tipo "songs" y límite pequeño
         logger.info(f"[RASTREO-PLAYLIST] Ejecutando búsqueda con params: query='{query}', filter='songs', limit=5")
@@ -1014,6 +833,7 @@ def find_track():
 
             # Guardar en caché solo si tenemos un ID válido
             if track_info["id"]:
+                suggestion_index.add_track(video_id, match_title, match_artist, track_info["thumbnail"])
                 try:
                     logger.info(f"[RASTREO-PLAYLIST] Guardando en caché: {query} -> {video_id}")
                     save_to_cache(cache_key, track_info)
@@ -1021,44 +841,233 @@ def find_track():
                     logger.warning(f"[RASTREO-PLAYLIST] Error al guardar en caché: {str(save_error)}")
 
                 logger.info(f"[RASTREO-PLAYLIST] FIN find_track: ÉXITO para '{query}', id='{video_id}'")
-                return jsonify(track_info)
-            else:
-                logger.warning(f"[RASTREO-PLAYLIST] FIN find_track: SIN RESULTADOS para: '{query}'")
-                # Devolver resultado vacío pero válido
-                fallback_result = {
-                    "id": "",
-                    "title": title,
-                    "artist": artist,
-                    "error": "No se encontraron resultados",
-                }
-                return jsonify(fallback_result)
-        else:
-            # No se encontraron resultados
-            logger.warning(f"[RASTREO-PLAYLIST] FIN find_track: SIN RESULTADOS para: '{query}'")
-            fallback_result = {
-                "id": "",
-                "title": title,
-                "artist": artist,
-                "error": "No se encontraron resultados",
-            }
-            return jsonify(fallback_result)
+                return track_info, 200
+
+        # No se encontraron resultados: devolver resultado vacío pero válido
+        logger.warning(f"[RASTREO-PLAYLIST] FIN find_track: SIN RESULTADOS para: '{query}'")
+        fallback_result = {
+            "id": "",
+            "title": title,
+            "artist": artist,
+            "error": "No se encontraron resultados",
+        }
+        return fallback_result, 200
+    except DeadlineExceeded:
+        logger.warning(f"[RASTREO-PLAYLIST] Deadline agotado buscando '{query}'")
+        return {"id": "", "title": title, "artist": artist, "error": "Deadline agotado"}, 504
     except Exception as e:
         logger.error(f"[RASTREO-PLAYLIST] ERROR CRÍTICO en find_track: {str(e)}")
+        stale_track = get_stale_cached(cache_key)
+        if stale_track:
+            logger.warning(f"[RASTREO-PLAYLIST] Usando caché antiguo para: '{query}'")
+            return stale_track, 200
+
         import traceback
 
         logger.error(f"[RASTREO-PLAYLIST] Traceback: {traceback.format_exc()}")
+        return (
+            {
+                "id": "",
+                "title": title,
+                "artist": artist,
+                "error": f"Error al buscar: {str(e)}",
+            },
+            500,
+        )
+
+
+@app.route("/api/find-track", methods=["GET"])
+def find_track():
+    """Encuentra un track por título y artista"""
+    title = request.args.get("title", "")
+    artist = request.args.get("artist", "")
+    query = request.args.get("query", f"{title} {artist}").strip()
+
+    if not query:
         return (
             jsonify(
                 {
                     "id": "",
-                    "title": title,
-                    "artist": artist,
-                    "error": f"Error al buscar: {str(e)}",
+                    "title": "",
+                    "artist": "",
+                    "error": "Se requiere una consulta",
                 }
             ),
-            500,
+            400,
+        )
+
+    # Verificar caché
+    cached_response = get_cached_response(find_track_cache_key(query), ttl_hours=FIND_TRACK_TTL_HOURS)
+    if cached_response:
+        logger.info(f"[RASTREO-PLAYLIST] Usando caché para: '{query}'")
+        return cached_response
+
+    # Configuración regional
+    region = request.args.get("region", "US")
+    language = request.args.get("language", "en")
+    logger.info(f"[RASTREO-PLAYLIST] Configuración: region={region}, language={language}")
+
+    track_info, status_code = resolve_track(query, title, artist, language)
+    return jsonify(track_info), status_code
+
+
+@app.route("/api/find-tracks", methods=["POST"])
+def find_tracks():
+    """
+    Resuelve muchos tracks en una sola petición (importación de playlists).
+    Body: {"items": [{"title": ..., "artist": ...} | {"query": ...}], "language": "en"}
+    Los duplicados se resuelven una sola vez, los aciertos de caché se leen de una
+    pasada y el resto se busca en paralelo bajo el limitador de YouTube Music.
+    Los resultados se devuelven en el mismo orden de la entrada.
+    """
+    body = request.get_json(silent=True) or {}
+    items = body.get("items")
+    language = body.get("language", request.args.get("language", "en"))
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Se requiere una lista 'items'"}), 400
+    if len(items) > FIND_TRACKS_MAX_ITEMS:
+        return jsonify({"error": f"Máximo {FIND_TRACKS_MAX_ITEMS} items por petición"}), 400
+
+    # Normalizar las consultas y agrupar duplicados
+    queries = []
+    unique = {}
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        title = str(item.get("title", "") or "")
+        artist = str(item.get("artist", "") or "")
+        query = str(item.get("query") or f"{title} {artist}").strip()
+        queries.append(query)
+        if query and query not in unique:
+            unique[query] = (title, artist)
+
+    logger.info(f"[RASTREO-PLAYLIST] find-tracks: {len(items)} items, {len(unique)} consultas únicas")
+
+    # Aciertos de caché en una sola lectura
+    cache_keys = {query: find_track_cache_key(query) for query in unique}
+    cached = get_cached_many(list(cache_keys.values()), ttl_hours=FIND_TRACK_TTL_HOURS)
+    resolved = {}
+    for query, key in cache_keys.items():
+        if key in cached:
+            resolved[query] = {"status": "ok", "cached": True, "track": cached[key]}
+
+    # Los fallos de caché se resuelven en paralelo
+    misses = [query for query in unique if query not in resolved]
+
+    def resolve_miss(query):
+        title, artist = unique[query]
+        upstream_limiter.acquire()
+        track_info, status_code = resolve_track(query, title, artist, language)
+        if status_code == 504:
+            return {"status": "timeout", "cached": False, "error": track_info.get("error", "")}
+        if status_code != 200:
+            return {"status": "error", "cached": False, "error": track_info.get("error", "")}
+        if not track_info.get("id"):
+            return {"status": "not_found", "cached": False, "track": track_info}
+        return {"status": "ok", "cached": False, "track": track_info}
+
+    def make_result(index, query, result):
+        if not query:
+            result = {"status": "invalid", "cached": False, "error": "Se requiere una consulta"}
+        elif result is None:
+            result = {"status": "timeout", "cached": False, "error": "Deadline agotado"}
+        return {"index": index, "query": query, **result}
+
+    results = iter_batch_results(queries, resolved, misses, resolve_miss, FIND_TRACKS_MAX_WORKERS, make_result)
+    summary = {"total": len(items), "unique": len(unique), "cache_hits": len(cache_keys) - len(misses)}
+
+    logger.info(
+        f"[RASTREO-PLAYLIST] find-tracks: {len(cache_keys) - len(misses)} desde caché, {len(misses)} a buscar en YouTube Music"
+    )
+    if wants_ndjson():
+        return ndjson_response(({"type": "result", **result} for result in results), summary)
+    return partial_jsonify({"results": sorted(results, key=lambda result: result["index"]), **summary})
+
+
+SPOTIFY_BATCH_MAX_ITEMS = int(os.environ.get("SPOTIFY_BATCH_MAX_ITEMS", 500))
+
+
+def spotify_match_cache_key(title, artist):
+    """Clave de caché para tracks sin ID de Spotify (hash, sin el texto en bruto)"""
+    digest = hashlib.sha1(f"{normalize_text(title)}|{normalize_text(artist)}".encode("utf-8")).hexdigest()
+    return f"spotify_to_youtube_{digest}"
+
+
+def parse_spotify_duration(value, milliseconds=False):
+    """Convierte la duración recibida (segundos o milisegundos) a segundos enteros"""
+    try:
+        duration = float(value)
+    except (TypeError, ValueError):
+        return None
+    if duration <= 0:
+        return None
+    return int(round(duration / 1000.0 if milliseconds else duration))
+
+
+def mapping_to_result(row, source):
+    return {
+        "youtube_id": row["video_id"],
+        "spotify_id": row["spotify_id"],
+        "title": row.get("title", ""),
+        "artist": row.get("artist", ""),
+        "duration": row.get("duration"),
+        "thumbnail": row.get("thumbnail", ""),
+        "score": row.get("score"),
+        "confident": True,
+        "source": source,
+    }
+
+
+def match_spotify_track(spotify_id, title, artist, duration=None, language="en"):
+    """
+    Busca en YouTube Music el track de Spotify y puntúa los candidatos.
+    Los emparejamientos por encima de MATCH_THRESHOLD se guardan en el mapa persistente.
+    Devuelve (datos, código HTTP).
+    """
+    try:
+        music = get_ytmusic() if language == "en" else get_ytmusic_for_language(language)
+        candidates = music.search(f"{title} {artist}", filter="songs", limit=5)
+        match, score = best_match(candidates, title, artist, duration)
+
+        if match is None:
+            logger.warning(f"[SPOTIFY-MATCH] Sin candidatos para '{title}' - '{artist}'")
+            return {"spotify_id": spotify_id, "title": title, "artist": artist, "error": "No se encontraron resultados"}, 404
+
+        confident = score >= MATCH_THRESHOLD
+        artists = match.get("artists") or []
+        result = {
+            "youtube_id": match["videoId"],
+            "spotify_id": spotify_id,
+            "title": match.get("title", title),
+            "artist": artists[0].get("name", artist) if artists else artist,
+            "duration": match.get("duration_seconds") or duration,
+            "thumbnail": get_best_thumbnail(match.get("thumbnails", [])),
+            "score": round(score, 3),
+            "confident": confident,
+            "source": "search",
+        }
+        logger.info(
+            f"[SPOTIFY-MATCH] '{title}' - '{artist}' -> {result['youtube_id']} (score={score:.2f}, confiable={confident})"
         )
 
+        if confident and spotify_id:
+            spotify_map.put(
+                spotify_id,
+                result["youtube_id"],
+                title=result["title"],
+                artist=result["artist"],
+                duration=result["duration"],
+                thumbnail=result["thumbnail"],
+                score=result["score"],
+                source="match",
+            )
+        return result, 200
+    except DeadlineExceeded:
+        return {"spotify_id": spotify_id, "title": title, "artist": artist, "error": "Deadline agotado"}, 504
+    except Exception as e:
+        logger.error(f"[SPOTIFY-MATCH] Error buscando '{title}' - '{artist}': {str(e)}")
+        return {"spotify_id": spotify_id, "title": title, "artist": artist, "error": str(e)}, 500
+
 
 @app.route("/api/spotify-to-youtube", methods=["GET"])
 def spotify_to_youtube():
@@ -1066,306 +1075,534 @@ def spotify_to_youtube():
     spotify_id = request.args.get("id", "")
     title = request.args.get("title", "")
     artist = request.args.get("artist", "")
+    if request.args.get("duration_ms"):
+        duration = parse_spotify_duration(request.args.get("duration_ms"), milliseconds=True)
+    else:
+        duration = parse_spotify_duration(request.args.get("duration"))
+    language = request.args.get("language", "en")
 
     if not spotify_id and (not title or not artist):
         return jsonify({"error": "Se requiere ID de Spotify o título y artista"}), 400
 
-    # Verificar caché
-    cache_key = f"spotify_to_youtube_{spotify_id}_{title}_{artist}"
-    cached = get_cached(cache_key, ttl_hours=168)  # 1 semana de caché
-    if cached:
-        return jsonify(cached)
+    # Emparejamiento ya aprendido: lectura indexada local
+    if spotify_id:
+        mapping = spotify_map.get(spotify_id)
+        if mapping:
+            return jsonify(mapping_to_result(mapping, "map"))
+        if not title or not artist:
+            return jsonify({"error": "ID de Spotify sin emparejamiento conocido; se requieren título y artista"}), 404
+
+    # Sin ID de Spotify no hay mapa: caché por título y artista
+    cache_key = spotify_match_cache_key(title, artist)
+    if not spotify_id:
+        cached_response = get_cached_response(cache_key, ttl_hours=168)  # 1 semana de caché
+        if cached_response:
+            return cached_response
+
+    result, status_code = match_spotify_track(spotify_id, title, artist, duration, language)
+    if status_code == 200 and not spotify_id and result["confident"]:
+        save_to_cache(cache_key, result)
+    return jsonify(result), status_code
 
-    try:
-        # En producción usaríamos ytmusicapi
-        # ytmusic = YTMusic(AUTH_FILE) if os.path.exists(AUTH_FILE) else YTMusic()
-        # results = ytmusic.search(f"{title} {artist}", filter="songs", limit=5)
 
-        # Simulamos un resultado para desarrollo
-        result = {
-            "youtube_id": "dQw4w9WgXcQ",
-            "spotify_id": spotify_id,
-            "title": title or "Título simulado",
-            "artist": artist or "Artista simulado",
-            "duration": 180,  # 3 minutos en segundos
-            "thumbnail": "https://via.placeholder.com/150",
-        }
+@app.route("/api/spotify-to-youtube/batch", methods=["POST"])
+def spotify_to_youtube_batch():
+    """
+    Convierte muchos tracks de Spotify en una sola petición.
+    Body: {"items": [{"id": ..., "title": ..., "artist": ..., "duration_ms": ...}], "language": "en"}
+    Los IDs ya aprendidos se leen del mapa con una sola consulta indexada; el resto
+    se busca en paralelo bajo el limitador de YouTube Music.
+    """
+    body = request.get_json(silent=True) or {}
+    items = body.get("items")
+    language = body.get("language", request.args.get("language", "en"))
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Se requiere una lista 'items'"}), 400
+    if len(items) > SPOTIFY_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Máximo {SPOTIFY_BATCH_MAX_ITEMS} items por petición"}), 400
+
+    tracks = []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        if item.get("duration_ms") is not None:
+            duration = parse_spotify_duration(item.get("duration_ms"), milliseconds=True)
+        else:
+            duration = parse_spotify_duration(item.get("duration"))
+        tracks.append(
+            (
+                str(item.get("id", "") or ""),
+                str(item.get("title", "") or ""),
+                str(item.get("artist", "") or ""),
+                duration,
+            )
+        )
 
-        save_to_cache(cache_key, result)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    known = spotify_map.get_many({track[0] for track in tracks if track[0]})
+
+    # Clave de cada posición: el ID de Spotify o (título, artista); None si no se puede resolver
+    keys = []
+    to_search = {}
+    for track in tracks:
+        spotify_id, title, artist, _ = track
+        if spotify_id in known:
+            keys.append(spotify_id)
+        elif title and artist:
+            key = spotify_id or (title, artist)
+            keys.append(key)
+            to_search.setdefault(key, track)
+        else:
+            keys.append(None)
+
+    resolved = {spotify_id: (mapping_to_result(row, "map"), 200) for spotify_id, row in known.items()}
+
+    def resolve_miss(key):
+        upstream_limiter.acquire()
+        return match_spotify_track(*to_search[key], language=language)
+
+    def make_result(index, key, outcome):
+        spotify_id = tracks[index][0]
+        if key is None:
+            error = "ID de Spotify sin emparejamiento conocido" if spotify_id else "Se requiere ID de Spotify o título y artista"
+            return {"index": index, "status": "invalid", "spotify_id": spotify_id, "error": error}
+        if outcome is None:
+            return {"index": index, "status": "timeout", "spotify_id": spotify_id, "error": "Deadline agotado"}
+        result, status_code = outcome
+        status = {200: "ok", 404: "not_found", 504: "timeout"}.get(status_code, "error")
+        return {"index": index, "status": status, **result}
+
+    results = iter_batch_results(keys, resolved, list(to_search), resolve_miss, FIND_TRACKS_MAX_WORKERS, make_result)
+    summary = {"total": len(tracks), "from_map": len(known), "searched": len(to_search)}
+
+    logger.info(f"[SPOTIFY-MATCH] batch: {len(tracks)} items, {len(known)} desde el mapa, {len(to_search)} a buscar")
+    if wants_ndjson():
+        return ndjson_response(({"type": "result", **result} for result in results), summary)
+    return partial_jsonify({"results": sorted(results, key=lambda result: result["index"]), **summary})
+
+
+@app.route("/api/spotify-map/export", methods=["GET"])
+def export_spotify_map():
+    """Exporta el mapa Spotify -> YouTube completo"""
+    mappings = spotify_map.export()
+    return jsonify({"mappings": mappings, "total": len(mappings)})
+
+
+MAPPING_TEXT_FIELDS = ("title", "artist", "thumbnail", "source")
+MAPPING_NUMBER_FIELDS = ("duration", "score", "updated_at")
+
+
+def mapping_row_error(row):
+    """Motivo por el que una fila importada no es válida, o None si lo es"""
+    if not isinstance(row, dict):
+        return "La fila debe ser un objeto"
+    for field in ("spotify_id", "video_id"):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"'{field}' debe ser un texto no vacío"
+    for field in MAPPING_TEXT_FIELDS:
+        if row.get(field) is not None and not isinstance(row[field], str):
+            return f"'{field}' debe ser un texto"
+    for field in MAPPING_NUMBER_FIELDS:
+        value = row.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f"'{field}' debe ser un número"
+    return None
 
 
-@app.route("/api/recommendations", methods=["GET"])
-def get_recommendations():
-    """Obtiene recomendaciones variadas"""
-    logger.info("[RASTREO-PLAYLIST] INICIO get_recommendations")
+@app.route("/api/spotify-map/import", methods=["POST"])
+def import_spotify_map():
+    """
+    Importa emparejamientos en bloque (mismo formato que la exportación).
+    Body: {"mappings": [{"spotify_id": ..., "video_id": ..., ...}]}
+    Las filas con tipos incorrectos no se importan y se devuelven en "rejected"
+    con su posición y el motivo.
+    """
+    body = request.get_json(silent=True) or {}
+    mappings = body.get("mappings")
+    if not isinstance(mappings, list):
+        return jsonify({"error": "Se requiere una lista 'mappings'"}), 400
+
+    rows = []
+    rejected = []
+    for index, row in enumerate(mappings):
+        error = mapping_row_error(row)
+        if error:
+            rejected.append({"index": index, "error": error})
+            continue
+        rows.append({key: value for key, value in row.items() if value is not None})
+
+    imported = spotify_map.put_many(rows)
+    logger.info(f"[SPOTIFY-MATCH] Importados {imported} emparejamientos ({len(rejected)} rechazados)")
+    return jsonify(
+        {"imported": imported, "skipped": len(mappings) - imported, "rejected": rejected, "total": spotify_map.count()}
+    )
 
-    # Parámetros
-    limit = int(request.args.get("limit", 50))
-    seed_artist = request.args.get("seed_artist", "")
-    seed_track = request.args.get("seed_track", "")
 
-    logger.info(f"[RASTREO-PLAYLIST] Parámetros: limit={limit}, seed_artist='{seed_artist}', seed_track='{seed_track}'")
+def iter_recommendations(ytm, seed_artist, seed_track, limit):
+    """
+    Genera las recomendaciones por fuente, a medida que cada una termina:
+    ("artist", tracks) con los top tracks del artista semilla, ("similar", tracks)
+    con la watch playlist de la canción semilla y ("mood", tracks) con playlists
+    de mood si aún faltan resultados.
+    """
+    found = 0
+    batch = []
 
-    # Verificar caché
-    cache_key = f"recommendations_{seed_artist}_{seed_track}_{limit}"
+    # Si tenemos una semilla de artista
+    if seed_artist:
+        try:
+            logger.info(f"[RASTREO-PLAYLIST] Buscando artista: '{seed_artist}'")
+            artist_results = ytm.search(seed_artist, filter="artists", limit=1)
 
-    # Intentar obtener datos de caché
-    try:
-        # Menor tiempo para recomendaciones
-        cached = get_cached(cache_key, ttl_hours=6)
-        if cached:
-            logger.info(f"[RASTREO-PLAYLIST] CACHÉ: Usando resultados en caché para recomendaciones")
-            return jsonify(cached)
-    except Exception as cache_error:
-        logger.warning(f"[RASTREO-PLAYLIST] ERROR CACHÉ: {str(cache_error)}")
+            if artist_results and len(artist_results) > 0:
+                artist_id = artist_results[0].get("browseId")
+                logger.info(f"[RASTREO-PLAYLIST] ID de artista encontrado: {artist_id}")
 
-    try:
-        logger.info("[RASTREO-PLAYLIST] Obteniendo YTMusic")
-        ytm = get_ytmusic()
+                if artist_id:
+                    logger.info(f"[RASTREO-PLAYLIST] Obteniendo top tracks del artista: {artist_id}")
+                    try:
+                        start_time = time.time()
+                        artist_songs = ytm.get_artist(artist_id).get("songs", {}).get("results", [])
+                        artist_time = time.time() - start_time
 
-        results = []
+                        logger.info(f"[RASTREO-PLAYLIST] Obtenidos {len(artist_songs)} tracks en {artist_time:.2f}s")
 
-        # Si tenemos una semilla de artista
-        if seed_artist:
-            try:
-                logger.info(f"[RASTREO-PLAYLIST] Buscando artista: '{seed_artist}'")
-                artist_results = ytm.search(seed_artist, filter="artists", limit=1)
+                        for song in artist_songs:
+                            if "videoId" in song:
+                                # Asegurarse de que el artista está
+                                # establecido correctamente
+                                if not song.get("artist") and not song.get("artists"):
+                                    # Si no hay información de artista,
+                                    # usar el artista semilla
+                                    song["artist"] = seed_artist
+
+                                # Usar la función de normalización para
+                                # datos consistentes
+                                track_data = normalize_track_data(song, default_artist=seed_artist, source="artist_track")
+                                if track_data:
+                                    batch.append(track_data)
+                    except Exception as artist_error:
+                        logger.error(f"[RASTREO-PLAYLIST] Error obteniendo tracks del artista: {str(artist_error)}")
+        except Exception as artist_search_error:
+            logger.error(f"[RASTREO-PLAYLIST] Error en búsqueda de artista: {str(artist_search_error)}")
+
+    if batch:
+        found += len(batch)
+        yield "artist", batch
+        batch = []
+
+    # Si tenemos una semilla de canción o si no conseguimos resultados por
+    # artista
+    if (seed_track or (seed_artist and found == 0)) and not deadline_expired():
+        try:
+            query = seed_track if seed_track else seed_artist
+            logger.info(f"[RASTREO-PLAYLIST] Buscando canción similar a: '{query}'")
 
-                if artist_results and len(artist_results) > 0:
-                    artist_id = artist_results[0].get("browseId")
-                    logger.info(f"[RASTREO-PLAYLIST] ID de artista encontrado: {artist_id}")
+            search_results = ytm.search(query, filter="songs", limit=1)
 
-                    if artist_id:
-                        logger.info(f"[RASTREO-PLAYLIST] Obteniendo top tracks del artista: {artist_id}")
-                        try:
-                            start_time = time.time()
-                            artist_songs = ytm.get_artist(artist_id).get("songs", {}).get("results", [])
-                            artist_time = time.time() - start_time
-
-                            logger.info(f"[RASTREO-PLAYLIST] Obtenidos {len(artist_songs)} tracks en {artist_time:.2f}s")
-
-                            for song in artist_songs:
-                                if "videoId" in song:
-                                    # Asegurarse de que el artista está
-                                    # establecido correctamente
-                                    if not song.get("artist") and not song.get("artists"):
-                                        # Si no hay información de artista,
-                                        # usar el artista semilla
-                                        song["artist"] = seed_artist
-
-                                    # Usar la función de normalización para
-                                    # datos consistentes
-                                    track_data = normalize_track_data(song, default_artist=seed_artist)
-                                    if track_data:
-                                        # Añadir fuente específica
-                                        track_data["source"] = "artist_track"
-                                        results.append(track_data)
-                        except Exception as artist_error:
-                            logger.error(f"[RASTREO-PLAYLIST] Error obteniendo tracks del artista: {str(artist_error)}")
-            except Exception as artist_search_error:
-                logger.error(f"[RASTREO-PLAYLIST] Error en búsqueda de artista: {str(artist_search_error)}")
-
-        # Si tenemos una semilla de canción o si no conseguimos resultados por
-        # artista
-        if seed_track or (seed_artist and len(results) == 0):
-            try:
-                query = seed_track if seed_track else seed_artist
-                logger.info(f"[RASTREO-PLAYLIST] Buscando canción similar a: '{query}'")
+            if search_results and len(search_results) > 0:
+                video_id = search_results[0].get("videoId")
 
-                search_results = ytm.search(query, filter="songs", limit=1)
+                if video_id:
+                    logger.info(f"[RASTREO-PLAYLIST] Encontrado video ID: {video_id}, obteniendo recomendaciones")
 
-                if search_results and len(search_results) > 0:
-                    video_id = search_results[0].get("videoId")
+                    try:
+                        start_time = time.time()
+                        watch_playlist = ytm.get_watch_playlist(video_id)
+                        watch_time = time.time() - start_time
+
+                        tracks = watch_playlist.get("tracks", [])
+                        logger.info(f"[RASTREO-PLAYLIST] Obtenidas {len(tracks)} recomendaciones en {watch_time:.2f}s")
+
+                        # Guardar el artista inicial para usarlo como
+                        # fallback
+                        seed_track_artist = ""
+                        if search_results[0].get("artists") and isinstance(search_results[0]["artists"], list):
+                            seed_track_artist = search_results[0]["artists"][0].get("name", "")
+                        elif search_results[0].get("artist"):
+                            seed_track_artist = search_results[0]["artist"]
+
+                        # Log adicional para debugging
+                        logger.info(f"[RASTREO-PLAYLIST] Artista de la semilla: '{seed_track_artist}'")
+
+                        # Registra algunos detalles de track para debugging
+                        if tracks and len(tracks) > 0:
+                            sample_track = tracks[0]
+                            log_item(
+                                "RASTREO-PLAYLIST", "Muestra de estructura de track: Keys disponibles: %s", list(sample_track)
+                            )
 
-                    if video_id:
-                        logger.info(f"[RASTREO-PLAYLIST] Encontrado video ID: {video_id}, obteniendo recomendaciones")
+                        # Obtener información adicional sobre artistas para
+                        # las pistas que no tienen
+                        for track in tracks:
+                            if track.get("videoId") != video_id:  # Excluir la canción original
+                                # Verificar si el track tiene información
+                                # de artista
+                                has_artist_info = (track.get("artists") and len(track["artists"]) > 0) or track.get(
+                                    "artist", ""
+                                ).strip() != ""
+
+                                # Si no hay información de artista,
+                                # intentar buscarla
+                                if not has_artist_info:
+                                    try:
+                                        # Buscar información extra sobre el
+                                        # video
+                                        log_item(
+                                            "RASTREO-PLAYLIST",
+                                            "Buscando información del artista para el video %s",
+                                            track.get("videoId", ""),
+                                        )
+                                        # Obtener información de la canción
+                                        # desde el título si es necesario
+                                        track_title = track.get("title", "")
+
+                                        # Si tiene un formato "Artist -
+                                        # Title", extraerlo
+                                        if " - " in track_title:
+                                            parts = track_title.split(" - ", 1)
+                                            if len(parts) == 2:
+                                                track["artist"] = parts[0].strip()
+                                                log_item("RASTREO-PLAYLIST", "Artista extraído del título: '%s'", track["artist"])
+
+                                        # Si sigue sin artista, intentar
+                                        # buscar la canción
+                                        if not track.get("artist", "").strip() and not deadline_expired():
+                                            try:
+                                                # Hacer una búsqueda rápida
+                                                # por videoId
+                                                song_info = ytm.search(
+                                                    track.get("videoId", ""),
+                                                    filter="songs",
+                                                    limit=1,
+                                                )
+                                                if song_info and len(song_info) > 0:
+                                                    if song_info[0].get("artists") and len(song_info[0]["artists"]) > 0:
+                                                        track["artists"] = song_info[0]["artists"]
+                                                        log_item(
+                                                            "RASTREO-PLAYLIST",
+                                                            "Artista encontrado por búsqueda: '%s'",
+                                                            song_info[0]["artists"][0].get("name", ""),
+                                                        )
+                                                    elif song_info[0].get("artist"):
+                                                        track["artist"] = song_info[0]["artist"]
+                                                        log_item(
+                                                            "RASTREO-PLAYLIST",
+                                                            "Artista encontrado por búsqueda: '%s'",
+                                                            song_info[0]["artist"],
+                                                        )
+                                            except Exception as search_error:
+                                                logger.warning(
+                                                    f"[RASTREO-PLAYLIST] Error buscando información adicional: {str(search_error)}"
+                                                )
+                                    except Exception as info_error:
+                                        logger.warning(
+                                            f"[RASTREO-PLAYLIST] Error obteniendo información adicional: {str(info_error)}"
+                                        )
+
+                                # Usar la función de normalización para
+                                # obtener datos consistentes
+                                track_data = normalize_track_data(track, default_artist="")
+                                if track_data:
+                                    batch.append(track_data)
+                    except Exception as watch_error:
+                        logger.error(f"[RASTREO-PLAYLIST] Error obteniendo playlist de watch: {str(watch_error)}")
+        except Exception as track_search_error:
+            logger.error(f"[RASTREO-PLAYLIST] Error en búsqueda de canción: {str(track_search_error)}")
+
+    if batch:
+        found += len(batch)
+        yield "similar", batch
+        batch = []
+
+    # Si aún no tenemos suficientes resultados, añadir recomendaciones
+    # generales
+    if found < limit and not deadline_expired():
+        logger.info(f"[RASTREO-PLAYLIST] No hay suficientes recomendaciones ({found}), añadiendo generales")
+
+        try:
+            suggestions = ytm.get_mood_categories()
 
+            if suggestions:
+                logger.info(f"[RASTREO-PLAYLIST] Encontradas {len(suggestions)} categorías de mood")
+
+                # Tomar solo las primeras 2 categorías
+                for category in suggestions[:2]:
+                    if deadline_expired():
+                        logger.warning("[RASTREO-PLAYLIST] Deadline agotado, devolviendo recomendaciones parciales")
+                        break
+                    if "params" in category:
                         try:
-                            start_time = time.time()
-                            watch_playlist = ytm.get_watch_playlist(video_id)
-                            watch_time = time.time() - start_time
-
-                            tracks = watch_playlist.get("tracks", [])
-                            logger.info(f"[RASTREO-PLAYLIST] Obtenidas {len(tracks)} recomendaciones en {watch_time:.2f}s")
-
-                            # Guardar el artista inicial para usarlo como
-                            # fallback
-                            seed_track_artist = ""
-                            if search_results[0].get("artists") and isinstance(search_results[0]["artists"], list):
-                                seed_track_artist = search_results[0]["artists"][0].get("name", "")
-                            elif search_results[0].get("artist"):
-                                seed_track_artist = search_results[0]["artist"]
-
-                            # Log adicional para debugging
-                            logger.info(f"[RASTREO-PLAYLIST] Artista de la semilla: '{seed_track_artist}'")
-
-                            # Registra algunos detalles de track para debugging
-                            if tracks and len(tracks) > 0:
-                                sample_track = tracks[0]
+                            mood_playlists = ytm.get_mood_playlists(category["params"])
+
+                            if mood_playlists and "playlists" in mood_playlists:
                                 logger.info(
-                                    f"[RASTREO-PLAYLIST] Muestra de estructura de track: "
-                                    + f"Keys disponibles: {list(sample_track.keys())}"
+                                    f"[RASTREO-PLAYLIST] Categoría '{category.get('title', '')}': {len(mood_playlists['playlists'])} playlists"
                                 )
 
-                            # Obtener información adicional sobre artistas para
-                            # las pistas que no tienen
-                            for track in tracks:
-                                if track.get("videoId") != video_id:  # Excluir la canción original
-                                    # Verificar si el track tiene información
-                                    # de artista
-                                    has_artist_info = (track.get("artists") and len(track["artists"]) > 0) or track.get(
-                                        "artist", ""
-                                    ).strip() != ""
+                                # Tomar la primera playlist de cada
+                                # categoría
+                                if mood_playlists["playlists"]:
+                                    playlist = mood_playlists["playlists"][0]
 
-                                    # Si no hay información de artista,
-                                    # intentar buscarla
-                                    if not has_artist_info:
+                                    if "browseId" in playlist:
                                         try:
-                                            # Buscar información extra sobre el
-                                            # video
-                                            logger.info(
-                                                f"[RASTREO-PLAYLIST] Buscando información del artista para el video {track.get('videoId', '')}"
-                                            )
-                                            # Obtener información de la canción
-                                            # desde el título si es necesario
-                                            track_title = track.get("title", "")
-
-                                            # Si tiene un formato "Artist -
-                                            # Title", extraerlo
-                                            if " - " in track_title:
-                                                parts = track_title.split(" - ", 1)
-                                                if len(parts) == 2:
-                                                    track["artist"] = parts[0].strip()
-                                                    logger.info(
-                                                        f"[RASTREO-PLAYLIST] Artista extraído del título: '{track['artist']}'"
-                                                    )
-
-                                            # Si sigue sin artista, intentar
-                                            # buscar la canción
-                                            if not track.get("artist", "").strip():
-                                                try:
-                                                    # Hacer una búsqueda rápida
-                                                    # por videoId
-                                                    song_info = ytm.search(
-                                                        track.get("videoId", ""),
-                                                        filter="songs",
-                                                        limit=1,
-                                                    )
-                                                    if song_info and len(song_info) > 0:
-                                                        if song_info[0].get("artists") and len(song_info[0]["artists"]) > 0:
-                                                            track["artists"] = song_info[0]["artists"]
-                                                            logger.info(
-                                                                f"[RASTREO-PLAYLIST] Artista encontrado por búsqueda: '{song_info[0]['artists'][0].get('name', '')}'"
-                                                            )
-                                                        elif song_info[0].get("artist"):
-                                                            track["artist"] = song_info[0]["artist"]
-                                                            logger.info(
-                                                                f"[RASTREO-PLAYLIST] Artista encontrado por búsqueda: '{song_info[0]['artist']}'"
-                                                            )
-                                                except Exception as search_error:
-                                                    logger.warning(
-                                                        f"[RASTREO-PLAYLIST] Error buscando información adicional: {str(search_error)}"
-                                                    )
-                                        except Exception as info_error:
-                                            logger.warning(
-                                                f"[RASTREO-PLAYLIST] Error obteniendo información adicional: {str(info_error)}"
+                                            playlist_tracks = ytm.get_playlist(playlist["browseId"], limit=10)
+
+                                            if playlist_tracks and "tracks" in playlist_tracks:
+                                                logger.info(
+                                                    f"[RASTREO-PLAYLIST] Playlist '{playlist.get('title', '')}': {len(playlist_tracks['tracks'])} tracks"
+                                                )
+
+                                                for track in playlist_tracks["tracks"]:
+                                                    if "videoId" in track:
+                                                        # Para playlists de
+                                                        # mood, asegurarnos
+                                                        # de que cada track
+                                                        # tiene artista
+                                                        has_artist_info = (
+                                                            track.get("artists") and len(track["artists"]) > 0
+                                                        ) or track.get("artist", "").strip() != ""
+
+                                                        # Si no hay
+                                                        # información de
+                                                        # artista, intentar
+                                                        # extraerla del
+                                                        # título
+                                                        if not has_artist_info:
+                                                            track_title = track.get("title", "")
+                                                            if " - " in track_title:
+                                                                parts = track_title.split(" - ", 1)
+                                                                if len(parts) == 2:
+                                                                    track["artist"] = parts[0].strip()
+                                                                    log_item(
+                                                                        "RASTREO-PLAYLIST",
+                                                                        "Artista extraído de título: '%s'",
+                                                                        track["artist"],
+                                                                    )
+
+                                                        # Usar la función
+                                                        # de normalización
+                                                        # para datos
+                                                        # consistentes
+                                                        track_data = normalize_track_data(
+                                                            track,
+                                                            default_artist="",
+                                                            source="mood_recommendation",
+                                                        )
+                                                        if track_data:
+                                                            batch.append(track_data)
+                                        except Exception as playlist_error:
+                                            logger.error(
+                                                f"[RASTREO-PLAYLIST] Error obteniendo playlist: {str(playlist_error)}"
                                             )
+                        except Exception as mood_error:
+                            logger.error(f"[RASTREO-PLAYLIST] Error obteniendo mood playlists: {str(mood_error)}")
+        except Exception as mood_error:
+            logger.error(f"[RASTREO-PLAYLIST] Error obteniendo categorías de mood: {str(mood_error)}")
 
-                                    # Usar la función de normalización para
-                                    # obtener datos consistentes
-                                    track_data = normalize_track_data(track, default_artist="")
-                                    if track_data:
-                                        results.append(track_data)
-                        except Exception as watch_error:
-                            logger.error(f"[RASTREO-PLAYLIST] Error obteniendo playlist de watch: {str(watch_error)}")
-            except Exception as track_search_error:
-                logger.error(f"[RASTREO-PLAYLIST] Error en búsqueda de canción: {str(track_search_error)}")
-
-        # Si aún no tenemos suficientes resultados, añadir recomendaciones
-        # generales
-        if len(results) < limit:
-            logger.info(f"[RASTREO-PLAYLIST] No hay suficientes recomendaciones ({len(results)}), añadiendo generales")
+    if batch:
+        yield "mood", batch
 
-            try:
-                suggestions = ytm.get_mood_categories()
 
-                if suggestions:
-                    logger.info(f"[RASTREO-PLAYLIST] Encontradas {len(suggestions)} categorías de mood")
+@timed("transform")
+def finalize_recommendation(track):
+    """Valida un track recomendado y completa el artista; None si los datos están incompletos"""
+    # Verificar que los datos del track son válidos
+    if not track.get("id") or not track.get("title"):
+        log_item("RASTREO-PLAYLIST", "Omitiendo track con datos incompletos: %s", track, level=logging.WARNING)
+        return None
 
-                    # Tomar solo las primeras 2 categorías
-                    for category in suggestions[:2]:
-                        if "params" in category:
-                            try:
-                                mood_playlists = ytm.get_mood_playlists(category["params"])
+    # Para canciones sin artista, intentar un enfoque final
+    if not track.get("artist") or track.get("artist") == "Artista desconocido":
+        # Último intento: extraer artista del título si tiene
+        # formato "Artista - Título"
+        title = track.get("title", "")
+        if " - " in title:
+            parts = title.split(" - ", 1)
+            if len(parts) == 2:
+                track["artist"] = parts[0].strip()
+                log_item("RASTREO-PLAYLIST", "Artista extraído de último intento: '%s'", track["artist"])
+
+    # Añadir información extra de diagnóstico si es necesario
+    log_item(
+        "RASTREO-PLAYLIST",
+        "Track validado: id=%s, title='%s', artist='%s'",
+        track["id"],
+        track["title"],
+        track.get("artist", "Desconocido"),
+        level=logging.DEBUG,
+    )
+    return track
 
-                                if mood_playlists and "playlists" in mood_playlists:
-                                    logger.info(
-                                        f"[RASTREO-PLAYLIST] Categoría '{category.get('title', '')}': {len(mood_playlists['playlists'])} playlists"
-                                    )
 
-                                    # Tomar la primera playlist de cada
-                                    # categoría
-                                    if mood_playlists["playlists"]:
-                                        playlist = mood_playlists["playlists"][0]
+def stream_recommendations(ytm, seed_artist, seed_track, limit, cache_key):
+    """Versión en streaming de /api/recommendations: una línea por fuente terminada"""
+    seen = set()
+    final_results = []
+    for source, tracks in iter_recommendations(ytm, seed_artist, seed_track, limit):
+        items = []
+        for track in tracks:
+            if len(final_results) >= limit:
+                break
+            if not track.get("id") or track["id"] in seen:
+                continue
+            seen.add(track["id"])
+            track = finalize_recommendation(track)
+            if track:
+                items.append(track)
+                final_results.append(track)
+        if items:
+            yield {"type": "tracks", "source": source, "items": items}
+        if len(final_results) >= limit:
+            break
 
-                                        if "browseId" in playlist:
-                                            try:
-                                                playlist_tracks = ytm.get_playlist(playlist["browseId"], limit=10)
-
-                                                if playlist_tracks and "tracks" in playlist_tracks:
-                                                    logger.info(
-                                                        f"[RASTREO-PLAYLIST] Playlist '{playlist.get('title', '')}': {len(playlist_tracks['tracks'])} tracks"
-                                                    )
-
-                                                    for track in playlist_tracks["tracks"]:
-                                                        if "videoId" in track:
-                                                            # Para playlists de
-                                                            # mood, asegurarnos
-                                                            # de que cada track
-                                                            # tiene artista
-                                                            has_artist_info = (
-                                                                track.get("artists") and len(track["artists"]) > 0
-                                                            ) or track.get("artist", "").strip() != ""
-
-                                                            # Si no hay
-                                                            # información de
-                                                            # artista, intentar
-                                                            # extraerla del
-                                                            # título
-                                                            if not has_artist_info:
-                                                                track_title = track.get("title", "")
-                                                                if " - " in track_title:
-                                                                    parts = track_title.split(" - ", 1)
-                                                                    if len(parts) == 2:
-                                                                        track["artist"] = parts[0].strip()
-                                                                        logger.info(
-                                                                            f"[RASTREO-PLAYLIST] Artista extraído de título: '{track['artist']}'"
-                                                                        )
-
-                                                            # Usar la función
-                                                            # de normalización
-                                                            # para datos
-                                                            # consistentes
-                                                            track_data = normalize_track_data(
-                                                                track,
-                                                                default_artist="",
-                                                            )
-                                                            if track_data:
-                                                                # Añadir fuente
-                                                                # específica
-                                                                track_data["source"] = "mood_recommendation"
-                                                                results.append(track_data)
-                                            except Exception as playlist_error:
-                                                logger.error(
-                                                    f"[RASTREO-PLAYLIST] Error obteniendo playlist: {str(playlist_error)}"
-                                                )
-                            except Exception as mood_error:
-                                logger.error(f"[RASTREO-PLAYLIST] Error obteniendo mood playlists: {str(mood_error)}")
-            except Exception as mood_error:
-                logger.error(f"[RASTREO-PLAYLIST] Error obteniendo categorías de mood: {str(mood_error)}")
+    logger.info(f"[RASTREO-PLAYLIST] Streaming de recomendaciones terminado: {len(final_results)} tracks")
+    if final_results and not is_partial():
+        save_to_cache(cache_key, final_results)
+
+
+@app.route("/api/recommendations", methods=["GET"])
+def get_recommendations():
+    """Obtiene recomendaciones variadas"""
+    logger.info("[RASTREO-PLAYLIST] INICIO get_recommendations")
+
+    # Parámetros
+    limit = int(request.args.get("limit", 50))
+    seed_artist = request.args.get("seed_artist", "")
+    seed_track = request.args.get("seed_track", "")
+
+    logger.info(f"[RASTREO-PLAYLIST] Parámetros: limit={limit}, seed_artist='{seed_artist}', seed_track='{seed_track}'")
+
+    # Verificar caché
+    cache_key = f"recommendations_{seed_artist}_{seed_track}_{limit}"
+
+    # Intentar obtener datos de caché
+    try:
+        # Menor tiempo para recomendaciones
+        if wants_ndjson():
+            cached = get_cached(cache_key, ttl_hours=6)
+            if cached:
+                logger.info(f"[RASTREO-PLAYLIST] CACHÉ: Usando resultados en caché para recomendaciones")
+                return ndjson_response([{"type": "tracks", "source": "cache", "items": cached}])
+        else:
+            cached_response = get_cached_response(cache_key, ttl_hours=6)
+            if cached_response:
+                logger.info(f"[RASTREO-PLAYLIST] CACHÉ: Usando resultados en caché para recomendaciones")
+                return cached_response
+    except Exception as cache_error:
+        logger.warning(f"[RASTREO-PLAYLIST] ERROR CACHÉ: {str(cache_error)}")
+
+    try:
+        logger.info("[RASTREO-PLAYLIST] Obteniendo YTMusic")
+        ytm = get_ytmusic()
+
+        if wants_ndjson():
+            return ndjson_response(stream_recommendations(ytm, seed_artist, seed_track, limit, cache_key))
+
+        results = []
+        for _, tracks in iter_recommendations(ytm, seed_artist, seed_track, limit):
+            results.extend(tracks)
 
         # Eliminar duplicados basados en ID
         unique_results = {}
@@ -1380,27 +1617,9 @@ def get_recommendations():
         # Limitar a la cantidad solicitada
         final_results = []
         for track in results[:limit]:
-            # Verificar que los datos del track son válidos
-            if track.get("id") and track.get("title"):
-                # Para canciones sin artista, intentar un enfoque final
-                if not track.get("artist") or track.get("artist") == "Artista desconocido":
-                    # Último intento: extraer artista del título si tiene
-                    # formato "Artista - Título"
-                    title = track.get("title", "")
-                    if " - " in title:
-                        parts = title.split(" - ", 1)
-                        if len(parts) == 2:
-                            track["artist"] = parts[0].strip()
-                            logger.info(f"[RASTREO-PLAYLIST] Artista extraído de último intento: '{track['artist']}'")
-
-                # Añadir información extra de diagnóstico si es necesario
-                logger.debug(
-                    f"[RASTREO-PLAYLIST] Track validado: id={track['id']}, "
-                    f"title='{track['title']}', artist='{track.get('artist', 'Desconocido')}'"
-                )
+            track = finalize_recommendation(track)
+            if track:
                 final_results.append(track)
-            else:
-                logger.warning(f"[RASTREO-PLAYLIST] Omitiendo track con datos incompletos: {track}")
 
         # Log de resultados
         logger.info(f"[RASTREO-PLAYLIST] Total de recomendaciones validadas: {len(final_results)}")
@@ -1416,21 +1635,33 @@ def get_recommendations():
             f"[RASTREO-PLAYLIST] Artistas únicos: {len(unique_artists)}, distribución: {artist_counts}"
         )
 
-        # Guardar en caché
-        try:
-            logger.info(f"[RASTREO-PLAYLIST] Guardando {len(final_results)} recomendaciones en caché")
-            save_to_cache(cache_key, final_results)
-        except Exception as save_error:
-            logger.warning(f"[RASTREO-PLAYLIST] Error guardando en caché: {str(save_error)}")
+        # Si YouTube Music no devolvió nada (p. ej. circuito abierto), usar caché antiguo
+        if not final_results:
+            stale = get_stale_cached(cache_key)
+            if stale:
+                logger.warning("[RASTREO-PLAYLIST] Sin recomendaciones nuevas, usando caché antiguo")
+                return jsonify(stale)
+
+        # Guardar en caché (los resultados parciales por deadline no se cachean)
+        if not is_partial():
+            try:
+                logger.info(f"[RASTREO-PLAYLIST] Guardando {len(final_results)} recomendaciones en caché")
+                save_to_cache(cache_key, final_results)
+            except Exception as save_error:
+                logger.warning(f"[RASTREO-PLAYLIST] Error guardando en caché: {str(save_error)}")
 
         logger.info("[RASTREO-PLAYLIST] FIN get_recommendations: ÉXITO")
-        return jsonify(final_results)
+        return partial_jsonify(final_results)
     except Exception as e:
         logger.error(f"[RASTREO-PLAYLIST] ERROR CRÍTICO en get_recommendations: {str(e)}")
         import traceback
 
         logger.error(f"[RASTREO-PLAYLIST] Traceback: {traceback.format_exc()}")
 
+        stale = get_stale_cached(cache_key)
+        if stale:
+            return jsonify(stale)
+
         # En caso de error, devolver un array vacío con código 200 para que el
         # frontend no falle
         return jsonify([]), 200
@@ -1443,9 +1674,9 @@ def get_top_artists():
 
     # Verificar caché
     cache_key = f"top_artists_{limit}"
-    cached = get_cached(cache_key, ttl_hours=24)  # Caché por 24 horas
-    if cached:
-        return jsonify(cached)
+    cached_response = get_cached_response(cache_key, ttl_hours=24)  # Caché por 24 horas
+    if cached_response:
+        return cached_response
 
     try:
         ytm = get_ytmusic()
@@ -1456,7 +1687,16 @@ def get_top_artists():
 
         # Buscar artistas por género
         for genre in genres[:3]:  # Limitamos a 3 géneros para no hacer muchas llamadas
-            search_results = ytm.search(f"{genre} artist", filter="artists", limit=limit // 3)
+            try:
+                search_results = genre_index.lookup(
+                    genre,
+                    "artist",
+                    limit // 3,
+                    lambda: ytm.search(f"{genre} artist", filter="artists", limit=limit // 3),
+                )
+            except DeadlineExceeded:
+                logger.warning("Deadline agotado buscando artistas populares, devolviendo resultados parciales")
+                break
             logger.info(
                 f"Búsqueda de artistas para género {genre}, resultados: {len(search_results)}"
             )
@@ -1495,10 +1735,15 @@ def get_top_artists():
                 )
 
         result = {"items": formatted_artists[:limit]}
-        save_to_cache(cache_key, result)
-        return jsonify(result)
+        if not is_partial():
+            save_to_cache(cache_key, result)
+        return partial_jsonify(result)
     except Exception as e:
         logger.error(f"Error al obtener artistas populares: {str(e)}")
+        stale = get_stale_cached(cache_key)
+        if stale:
+            return jsonify(stale)
+
         # Devolver datos simulados en caso de error
         result = {
             "items": [
@@ -1521,6 +1766,125 @@ def get_top_artists():
         return jsonify(result)
 
 
+def iter_genre_recommendations(ytm, top_genres, artists_per_genre, playlists_per_genre, tracks_per_genre):
+    """
+    Genera las recomendaciones por género a medida que termina cada búsqueda:
+    (tipo, género, items) con tipo "artists", "playlists" o "tracks".
+    """
+    # Obtener artistas, playlists y tracks para cada género
+    for genre in top_genres:
+        logger.info(f"Procesando género: {genre}")
+
+        # 1. Artistas
+        items = []
+        logger.info(f"Buscando artistas para género: {genre}")
+        artists_results = genre_index.lookup(
+            genre,
+            "artist",
+            artists_per_genre,
+            lambda: ytm.search(f"{genre} artist", filter="artists", limit=artists_per_genre),
+        )
+        if artists_results:
+            # Formatear y agregar artistas al resultado
+            for artist in artists_results:
+                if "browseId" in artist and "thumbnails" in artist:
+                    artist_data = {
+                        "id": artist["browseId"],
+                        "name": artist.get("artist", "Artista Desconocido"),
+                        "images": ([{"url": artist["thumbnails"][-1]["url"]}] if artist["thumbnails"] else []),
+                        # Asignamos el género de búsqueda
+                        "genres": [genre],
+                        "popularity": 80,  # No disponible en YTMusic
+                        "source": "youtube_music",
+                        "sourceGenre": genre,
+                    }
+                    items.append(artist_data)
+
+        yield "artists", genre, items
+
+        # 2. Playlists
+        items = []
+        logger.info(f"Buscando playlists para género: {genre}")
+        playlists_results = genre_index.lookup(
+            genre,
+            "playlist",
+            playlists_per_genre,
+            lambda: ytm.search(f"{genre} music", filter="playlists", limit=playlists_per_genre),
+        )
+        if playlists_results:
+            # Formatear y agregar playlists al resultado
+            for playlist in playlists_results:
+                if "browseId" in playlist:
+                    # ytmusicapi devuelve el autor de las búsquedas como texto
+                    author = playlist.get("author") or {}
+                    playlist_data = {
+                        "id": playlist["browseId"],
+                        "name": playlist.get("title", "Playlist Sin Título"),
+                        "description": playlist.get("description", ""),
+                        "images": (
+                            [{"url": playlist["thumbnails"][-1]["url"]}]
+                            if "thumbnails" in playlist and playlist["thumbnails"]
+                            else []
+                        ),
+                        "tracks_count": playlist.get("itemCount", 0),
+                        "owner": (author.get("name", "YouTube Music") if isinstance(author, dict) else author),
+                        "source": "youtube_music",
+                        "sourceGenre": genre,
+                    }
+                    items.append(playlist_data)
+
+        yield "playlists", genre, items
+
+        # 3. Tracks
+        items = []
+        logger.info(f"Buscando tracks para género: {genre}")
+        tracks_results = genre_index.lookup(
+            genre, "track", tracks_per_genre, lambda: ytm.search(f"{genre}", filter="songs", limit=tracks_per_genre)
+        )
+        if tracks_results:
+            # Formatear y agregar tracks al resultado
+            for track in tracks_results:
+                if "videoId" in track:
+                    track_data = {
+                        "id": track["videoId"],
+                        "title": track.get("title", "Canción sin título"),
+                        "artist": (
+                            track.get("artists", [{}])[0].get("name", "Artista desconocido")
+                            if "artists" in track and track["artists"]
+                            else "Artista desconocido"
+                        ),
+                        "album": (
+                            track.get("album", {}).get("name", "Álbum desconocido")
+                            if "album" in track
+                            else "Álbum desconocido"
+                        ),
+                        "cover": (track["thumbnails"][-1]["url"] if "thumbnails" in track and track["thumbnails"] else ""),
+                        "duration": (track.get("duration_seconds", 0) * 1000 if "duration_seconds" in track else 0),
+                        "source": "youtube",
+                        "youtubeId": track["videoId"],
+                        "sourceGenre": genre,
+                    }
+                    items.append(track_data)
+
+        yield "tracks", genre, items
+
+
+def stream_genre_recommendations(ytm, top_genres, artists_per_genre, playlists_per_genre, tracks_per_genre, cache_key):
+    """Versión en streaming de /api/recommendations-by-genres: una línea por búsqueda terminada"""
+    result = {"artists": [], "playlists": [], "tracks": []}
+    try:
+        for kind, genre, items in iter_genre_recommendations(
+            ytm, top_genres, artists_per_genre, playlists_per_genre, tracks_per_genre
+        ):
+            result[kind].extend(items)
+            if items:
+                yield {"type": kind, "genre": genre, "items": items}
+    except DeadlineExceeded:
+        logger.warning("Deadline agotado en recomendaciones por géneros (streaming)")
+        return
+    save_to_cache(cache_key, result)
+
+
 @app.route("/api/recommendations-by-genres", methods=["GET"])
 def get_recommendations_by_genres():
     """Obtiene recomendaciones basadas en los géneros favoritos del usuario"""
@@ -1540,88 +1904,35 @@ def get_recommendations_by_genres():
 
     # Verificar caché
     cache_key = f"recommendations_by_genres_{'-'.join(top_genres)}_{artists_per_genre}_{playlists_per_genre}_{tracks_per_genre}"
-    cached = get_cached(cache_key, ttl_hours=4)  # 4 horas de caché
-    if cached:
-        logger.info(f"Usando caché para recomendaciones de géneros: {top_genres}")
-        return jsonify(cached)
+    if wants_ndjson():
+        cached = get_cached(cache_key, ttl_hours=4)  # 4 horas de caché
+        if cached:
+            logger.info(f"Usando caché para recomendaciones de géneros: {top_genres}")
+            return ndjson_response(
+                {"type": kind, "genre": None, "items": cached[kind]} for kind in ("artists", "playlists", "tracks")
+            )
+    else:
+        cached_response = get_cached_response(cache_key, ttl_hours=4)
+        if cached_response:
+            logger.info(f"Usando caché para recomendaciones de géneros: {top_genres}")
+            return cached_response
 
+    result = {"artists": [], "playlists": [], "tracks": []}
     try:
         ytm = get_ytmusic()
-        result = {"artists": [], "playlists": [], "tracks": []}
+
+        if wants_ndjson():
+            return ndjson_response(
+                stream_genre_recommendations(
+                    ytm, top_genres, artists_per_genre, playlists_per_genre, tracks_per_genre, cache_key
+                )
+            )
 
         # Obtener artistas, playlists y tracks para cada género
-        for genre in top_genres:
-            logger.info(f"Procesando género: {genre}")
-
-            # 1. Artistas
-            logger.info(f"Buscando artistas para género: {genre}")
-            artists_results = ytm.search(f"{genre} artist", filter="artists", limit=artists_per_genre)
-            if artists_results:
-                # Formatear y agregar artistas al resultado
-                for artist in artists_results:
-                    if "browseId" in artist and "thumbnails" in artist:
-                        artist_data = {
-                            "id": artist["browseId"],
-                            "name": artist.get("artist", "Artista Desconocido"),
-                            "images": ([{"url": artist["thumbnails"][-1]["url"]}] if artist["thumbnails"] else []),
-                            # Asignamos el género de búsqueda
-                            "genres": [genre],
-                            "popularity": 80,  # No disponible en YTMusic
-                            "source": "youtube_music",
-                            "sourceGenre": genre,
-                        }
-                        result["artists"].append(artist_data)
-
-            # 2. Playlists
-            logger.info(f"Buscando playlists para género: {genre}")
-            playlists_results = ytm.search(f"{genre} music", filter="playlists", limit=playlists_per_genre)
-            if playlists_results:
-                # Formatear y agregar playlists al resultado
-                for playlist in playlists_results:
-                    if "browseId" in playlist:
-                        playlist_data = {
-                            "id": playlist["browseId"],
-                            "name": playlist.get("title", "Playlist Sin Título"),
-                            "description": playlist.get("description", ""),
-                            "images": (
-                                [{"url": playlist["thumbnails"][-1]["url"]}]
-                                if "thumbnails" in playlist and playlist["thumbnails"]
-                                else []
-                            ),
-                            "tracks_count": playlist.get("itemCount", 0),
-                            "owner": playlist.get("author", {}).get("name", "YouTube Music"),
-                            "source": "youtube_music",
-                            "sourceGenre": genre,
-                        }
-                        result["playlists"].append(playlist_data)
-
-            # 3. Tracks
-            logger.info(f"Buscando tracks para género: {genre}")
-            tracks_results = ytm.search(f"{genre}", filter="songs", limit=tracks_per_genre)
-            if tracks_results:
-                # Formatear y agregar tracks al resultado
-                for track in tracks_results:
-                    if "videoId" in track:
-                        track_data = {
-                            "id": track["videoId"],
-                            "title": track.get("title", "Canción sin título"),
-                            "artist": (
-                                track.get("artists", [{}])[0].get("name", "Artista desconocido")
-                                if "artists" in track and track["artists"]
-                                else "Artista desconocido"
-                            ),
-                            "album": (
-                                track.get("album", {}).get("name", "Álbum desconocido")
-                                if "album" in track
-                                else "Álbum desconocido"
-                            ),
-                            "cover": (track["thumbnails"][-1]["url"] if "thumbnails" in track and track["thumbnails"] else ""),
-                            "duration": (track.get("duration_seconds", 0) * 1000 if "duration_seconds" in track else 0),
-                            "source": "youtube",
-                            "youtubeId": track["videoId"],
-                            "sourceGenre": genre,
-                        }
-                        result["tracks"].append(track_data)
+        for kind, _, items in iter_genre_recommendations(
+            ytm, top_genres, artists_per_genre, playlists_per_genre, tracks_per_genre
+        ):
+            result[kind].extend(items)
 
         # Guardar en caché
         save_to_cache(cache_key, result)
@@ -1630,8 +1941,19 @@ def get_recommendations_by_genres():
         )
 
         return jsonify(result)
+    except DeadlineExceeded:
+        # Devolver lo obtenido hasta ahora, sin cachearlo
+        logger.warning(
+            f"Deadline agotado en recomendaciones por géneros: {len(result['artists'])} artistas, "
+            f"{len(result['playlists'])} playlists, {len(result['tracks'])} tracks"
+        )
+        return partial_jsonify(result)
     except Exception as e:
         logger.error(f"Error al obtener recomendaciones por géneros: {str(e)}")
+        stale = get_stale_cached(cache_key)
+        if stale:
+            return jsonify(stale)
+
         # Generar datos de fallback en caso de error
         fallback_result = {"artists": [], "playlists": [], "tracks": []}
 
@@ -1685,8 +2007,46 @@ def get_recommendations_by_genres():
         return jsonify(fallback_result)
 
 
+def find_genre_mood_params(ytm, genre):
+    """params de la categoría de mood/género de YouTube Music que corresponde al género, o None"""
+    categories = get_cached("mood_categories", ttl_hours=24)
+    if not categories:
+        categories = ytm.get_mood_categories()
+        save_to_cache("mood_categories", categories)
+    key = normalize_text(genre)
+    for section in (categories or {}).values():
+        for category in section or []:
+            if normalize_text(category.get("title", "")) == key:
+                return category.get("params")
+    return None
+
+
+def refresh_genre_index(genre):
+    """Refresca en segundo plano el índice de un género: búsquedas y playlists de mood"""
+    ytm = get_ytmusic()
+    genre_index.add(genre, "artist", ytm.search(f"{genre} artist", filter="artists", limit=40))
+    genre_index.add(genre, "playlist", ytm.search(f"{genre} music", filter="playlists", limit=20))
+    genre_index.add(genre, "track", ytm.search(f"{genre}", filter="songs", limit=50))
+
+    params = find_genre_mood_params(ytm, genre)
+    if params:
+        playlists = ytm.get_mood_playlists(params) or []
+        # Las playlists de mood traen otros campos; se indexan con la forma de las de búsqueda
+        for playlist in playlists:
+            if "browseId" not in playlist and playlist.get("playlistId"):
+                playlist["browseId"] = "VL" + playlist["playlistId"]
+            if "count" in playlist:
+                playlist["itemCount"] = playlist.pop("count")
+            if isinstance(playlist.get("author"), list):
+                playlist["author"] = ", ".join(author.get("name", "") for author in playlist["author"])
+        genre_index.add(genre, "playlist", playlists, source="mood")
+
+
+genre_index.set_refresher(refresh_genre_index)
+
+
 @app.route("/api/featured-playlists", methods=["GET"])
-@cached("featured_playlists.json")
+@cached("featured_playlists.json", methods=("get_explore",))
 def get_featured_playlists():
     """Endpoint para obtener playlists destacadas"""
     try:
@@ -1699,7 +2059,7 @@ def get_featured_playlists():
         try:
             # Usar YTMusic directamente sin get_ytmusic
             # Configurar YTMusic con la región del usuario
-            ytmusic = YTMusic(language=region)
+            ytmusic = create_ytmusic(language=region)
             explore_data = ytmusic.get_explore()
 
             # Verificar si la respuesta es válida y contiene playlists
@@ -1716,146 +2076,39 @@ def get_featured_playlists():
                 if playlists_section and "playlists" in playlists_section:
                     playlists = playlists_section["playlists"][:limit]
 
-                    # Asegurar que todas las playlists tienen thumbnails
-                    # válidos
-                    valid_playlists = []
-                    for playlist in playlists:
-                        if "thumbnails" in playlist and playlist["thumbnails"]:
-                            # Agregar región a la información de la playlist
-                            playlist["region"] = region
-                            valid_playlists.append(playlist)
-
-                    logger.info(
-                        f"Encontradas {len(valid_playlists)} playlists destacadas para región {region}"
-                    )
-                    return jsonify(valid_playlists)
-        except Exception as e:
-            logger.error(
-                f"Error al obtener playlists destacadas desde la exploración: {str(e)}"
-            )
-
-        # Si no hay datos de explore o hubo un error, usar playlists
-        # predefinidas según la región
-        logger.info(f"Usando playlists predefinidas como fallback para región {region}")
-
-        # Playlists específicas por región
-        region_playlists = {
-            "ES": [
-                {
-                    "title": "Éxitos España",
-                    "playlistId": "ES_top_hits",
-                    "author": "YouTube Music",
-                    "description": "Los éxitos más populares en España",
-                    "trackCount": 50,
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/p7bfOZek9t4/maxresdefault.jpg"}],
-                    "region": "ES",
-                },
-                {
-                    "title": "Flamenco Fusion",
-                    "playlistId": "ES_flamenco",
-                    "author": "YouTube Music",
-                    "description": "Lo mejor del flamenco fusión",
-                    "trackCount": 30,
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/qmbx4_TQbkA/maxresdefault.jpg"}],
-                    "region": "ES",
-                },
-            ],
-            "MX": [
-                {
-                    "title": "Regional Mexicano",
-                    "playlistId": "MX_regional",
-                    "author": "YouTube Music",
-                    "description": "Lo mejor de la música regional mexicana",
-                    "trackCount": 40,
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/NGZ-xIDBiCs/maxresdefault.jpg"}],
-                    "region": "MX",
-                },
-                {
-                    "title": "Pop Latino México",
-                    "playlistId": "MX_pop",
-                    "author": "YouTube Music",
-                    "description": "El pop más escuchado en México",
-                    "trackCount": 45,
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/MBmb5_TTT-w/maxresdefault.jpg"}],
-                    "region": "MX",
-                },
-            ],
-            "AR": [
-                {
-                    "title": "Trap Argentino",
-                    "playlistId": "AR_trap",
-                    "author": "YouTube Music",
-                    "description": "El mejor trap de Argentina",
-                    "trackCount": 40,
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/3V-bu_i-w_o/maxresdefault.jpg"}],
-                    "region": "AR",
-                }
-            ],
-        }
-
-        # Playlists genéricas para todas las regiones
-        generic_playlists = [
-            {
-                "title": "Top Hits Globales",
-                "playlistId": "PL55713C70BA91BD6E",
-                "author": "YouTube Music",
-                "description": "Los éxitos más populares del momento",
-                "trackCount": 50,
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/kJQP7kiw5Fk/maxresdefault.jpg"}],
-                "region": "global",
-            },
-            {
-                "title": "Éxitos Latinos",
-                "playlistId": "PL4fGSI1pDJn6jXS_Tv_N9B8Z0HTRVJE0n",
-                "author": "YouTube Music",
-                "description": "Lo mejor de la música latina",
-                "trackCount": 40,
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/TmKh7lAwnBI/maxresdefault.jpg"}],
-                "region": "global",
-            },
-            {
-                "title": "Acoustic Chill",
-                "playlistId": "PLgzTt0k8mXzEk586ze4BjvDXR7c-TUSnx",
-                "author": "YouTube Music",
-                "description": "Música acústica para relajarte",
-                "trackCount": 35,
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/jTLhQf5KJSc/maxresdefault.jpg"}],
-                "region": "global",
-            },
-            {
-                "title": "Workout Hits",
-                "playlistId": "PL4o29bINVT4EG_y-k5jGoOu3-Am8Nvi10",
-                "author": "YouTube Music",
-                "description": "Música para entrenar",
-                "trackCount": 45,
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/pRpeEdMmmQ0/maxresdefault.jpg"}],
-                "region": "global",
-            },
-            {
-                "title": "Indie Discoveries",
-                "playlistId": "PL4fGSI1pDJn5kI81J1fYWK5eZRl1zJ5kM",
-                "author": "YouTube Music",
-                "description": "Descubre nuevas bandas indie",
-                "trackCount": 30,
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/8SbUC-UaAxE/maxresdefault.jpg"}],
-                "region": "global",
-            },
-        ]
+                    # Asegurar que todas las playlists tienen thumbnails
+                    # válidos
+                    valid_playlists = []
+                    for playlist in playlists:
+                        if "thumbnails" in playlist and playlist["thumbnails"]:
+                            # Agregar región a la información de la playlist
+                            playlist["region"] = region
+                            valid_playlists.append(playlist)
 
-        # Combinar playlists específicas de la región con las genéricas
-        combined_playlists = region_playlists.get(region, []) + generic_playlists
+                    logger.info(
+                        f"Encontradas {len(valid_playlists)} playlists destacadas para región {region}"
+                    )
+                    return jsonify(valid_playlists)
+        except Exception as e:
+            logger.error(
+                f"Error al obtener playlists destacadas desde la exploración: {str(e)}"
+            )
 
-        # Limitar al número solicitado
-        combined_playlists = combined_playlists[:limit]
+        # Si no hay datos de explore o hubo un error, usar playlists
+        # predefinidas según la región
+        logger.info(f"Usando playlists predefinidas como fallback para región {region}")
 
+        skip_response_cache()
+        combined_playlists = fallback_catalog.featured_playlists(region, limit)
         return jsonify(combined_playlists)
     except Exception as e:
         logger.error(f"Error en get_featured_playlists: {str(e)}")
+        skip_response_cache()
         return jsonify([])
 
 
 @app.route("/api/new-releases", methods=["GET"])
-@cached("new_releases.json")
+@cached("new_releases.json", methods=("get_charts", "get_explore"))
 def get_new_releases():
     """Endpoint para obtener nuevos lanzamientos"""
     try:
@@ -1869,7 +2122,7 @@ def get_new_releases():
         try:
             # Usar YTMusic directamente sin get_ytmusic
             # Configurar YTMusic con el idioma/región del usuario
-            ytmusic = YTMusic(language=region)
+            ytmusic = create_ytmusic(language=region)
 
             # Obtener nuevos lanzamientos a través de la API de charts
             # Ya que los charts suelen tener contenido más actualizado
@@ -1985,124 +2238,17 @@ def get_new_releases():
         # Si no hay datos de explore o hubo un error, usar álbumes predefinidos
         logger.info(f"Usando álbumes predefinidos como fallback para región {region}")
 
-        # Personalizar algunos álbumes predefinidos basados en la región
-        region_specific_albums = {
-            "ES": [
-                {
-                    "id": "yt-album-es-1",
-                    "name": "El Madrileño",
-                    "artists": [{"name": "C. Tangana"}],
-                    "images": [{"url": "https://i.ytimg.com/vi/7Z2XmgX-jjE/maxresdefault.jpg"}],
-                    "release_date": "2025",
-                    "type": "album",
-                    "region": "ES",
-                },
-                {
-                    "id": "yt-album-es-2",
-                    "name": "Vibras",
-                    "artists": [{"name": "J Balvin"}],
-                    "images": [{"url": "https://i.ytimg.com/vi/0MpFSsP9rIM/maxresdefault.jpg"}],
-                    "release_date": "2025",
-                    "type": "album",
-                    "region": "ES",
-                },
-            ],
-            "MX": [
-                {
-                    "id": "yt-album-mx-1",
-                    "name": "Un Canto por México",
-                    "artists": [{"name": "Natalia Lafourcade"}],
-                    "images": [{"url": "https://i.ytimg.com/vi/F0IjuWLTuZM/maxresdefault.jpg"}],
-                    "release_date": "2025",
-                    "type": "album",
-                    "region": "MX",
-                },
-                {
-                    "id": "yt-album-mx-2",
-                    "name": "Mañana Será Bonito",
-                    "artists": [{"name": "Karol G"}],
-                    "images": [{"url": "https://i.ytimg.com/vi/sqj6yUQyGmw/maxresdefault.jpg"}],
-                    "release_date": "2025",
-                    "type": "album",
-                    "region": "MX",
-                },
-            ],
-            "AR": [
-                {
-                    "id": "yt-album-ar-1",
-                    "name": "Bzrp Music Sessions",
-                    "artists": [{"name": "Bizarrap"}],
-                    "images": [{"url": "https://i.ytimg.com/vi/3nQNiWdeH2Q/maxresdefault.jpg"}],
-                    "release_date": "2025",
-                    "type": "album",
-                    "region": "AR",
-                }
-            ],
-        }
-
-        # Álbumes predefinidos generales
-        default_albums = [
-            {
-                "id": "yt-album-1",
-                "name": "Future Nostalgia (2025 Edition)",
-                "artists": [{"name": "Dua Lipa"}],
-                "images": [{"url": "https://i.ytimg.com/vi/WHuBW3qKm9g/maxresdefault.jpg"}],
-                "release_date": "2025",
-                "type": "album",
-                "region": "global",
-            },
-            {
-                "id": "yt-album-2",
-                "name": "Un Verano Sin Ti (Deluxe)",
-                "artists": [{"name": "Bad Bunny"}],
-                "images": [{"url": "https://i.ytimg.com/vi/1TCX_Aqzoo4/maxresdefault.jpg"}],
-                "release_date": "2025",
-                "type": "album",
-                "region": "global",
-            },
-            {
-                "id": "yt-album-3",
-                "name": "After Hours (Extended Version)",
-                "artists": [{"name": "The Weeknd"}],
-                "images": [{"url": "https://i.ytimg.com/vi/XXYlFuWEuKI/maxresdefault.jpg"}],
-                "release_date": "2025",
-                "type": "album",
-                "region": "global",
-            },
-            {
-                "id": "yt-album-4",
-                "name": "Harry's House (Expanded Edition)",
-                "artists": [{"name": "Harry Styles"}],
-                "images": [{"url": "https://i.ytimg.com/vi/H5v3kku4y6Q/maxresdefault.jpg"}],
-                "release_date": "2025",
-                "type": "album",
-                "region": "global",
-            },
-            {
-                "id": "yt-album-5",
-                "name": "Midnights (The Complete Collection)",
-                "artists": [{"name": "Taylor Swift"}],
-                "images": [{"url": "https://i.ytimg.com/vi/b1kbLwvqugk/maxresdefault.jpg"}],
-                "release_date": "2025",
-                "type": "album",
-                "region": "global",
-            },
-        ]
-
-        # Combinar álbumes específicos de región con los predeterminados
-        fallback_albums = region_specific_albums.get(region, []) + default_albums
-
-        # Asegurarnos de que no excedemos el límite
-        fallback_albums = fallback_albums[:limit]
-
+        skip_response_cache()
+        fallback_albums = fallback_catalog.new_releases(region, limit)
         return jsonify(fallback_albums)
     except Exception as e:
         logger.error(f"Error en get_new_releases: {str(e)}")
+        skip_response_cache()
         return jsonify([])
 
 
 @app.route("/api/charts", methods=["GET"])
-@cached("charts.json")
+@cached("charts.json", methods=("get_charts",))
 def get_charts():
     """Endpoint para obtener charts/tendencias musicales"""
     try:
@@ -2115,7 +2261,7 @@ def get_charts():
         # Intentar obtener charts directamente
         try:
             # Configurar YTMusic con el idioma/región del usuario
-            ytmusic = YTMusic(language=region)
+            ytmusic = create_ytmusic(language=region)
 
             # Obtener charts para la región especificada
             charts = ytmusic.get_charts(country=region)
@@ -2143,59 +2289,12 @@ def get_charts():
             logger.error(f"Error obteniendo charts de YouTube Music: {str(chart_error)}")
 
         # Si llegamos aquí, ocurrió un error o no hay datos - Devolver datos por defecto
-        # Datos de fallback específicos por región
-        region_specific_tracks = {
-            "US": [
-                {
-                    "videoId": "us_pop_1",
-                    "title": "US Pop Hit 1",
-                    "artists": [{"name": "US Artist 1"}],
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/dQw4w9WgXcQ/maxresdefault.jpg"}],
-                    "type": "track",
-                    "region": "US",
-                }
-            ],
-            "ES": [
-                {
-                    "videoId": "es_pop_1",
-                    "title": "Hit Latino 1",
-                    "artists": [{"name": "Artista Latino 1"}],
-                    "thumbnails": [{"url": "https://i.ytimg.com/vi/kJQP7kiw5Fk/maxresdefault.jpg"}],
-                    "type": "track",
-                    "region": "ES",
-                }
-            ],
-        }
-
-        # Tracks por defecto para todas las regiones
-        default_tracks = [
-            {
-                "videoId": "global_pop_1",
-                "title": "Global Hit 1",
-                "artists": [{"name": "Global Artist 1"}],
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/JGwWNGJdvx8/maxresdefault.jpg"}],
-                "type": "track",
-                "region": "global",
-            },
-            {
-                "videoId": "global_pop_2",
-                "title": "Global Hit 2",
-                "artists": [{"name": "Global Artist 2"}],
-                "thumbnails": [{"url": "https://i.ytimg.com/vi/3tmd-ClpJxA/maxresdefault.jpg"}],
-                "type": "track",
-                "region": "global",
-            },
-        ]
-
-        # Combinar tracks específicos de región con los predeterminados
-        fallback_tracks = region_specific_tracks.get(region, []) + default_tracks
-
-        # Asegurarnos de que no excedemos el límite
-        fallback_tracks = fallback_tracks[:limit]
-
+        skip_response_cache()
+        fallback_tracks = fallback_catalog.chart_singles(region, limit)
         return jsonify({"singles": fallback_tracks})
     except Exception as e:
         logger.error(f"Error en get_charts: {str(e)}")
+        skip_response_cache()
         return jsonify({"singles": []})
 
 
@@ -2248,10 +2347,10 @@ def get_artists_by_genre():
     if use_cache:
         # Verificar caché con la clave correcta que incluye idioma
         cache_key = f"artists_by_genre_{genre}_{limit}_{region}_{language}"
-        cached_results = get_cached_results(cache_key)
-        if cached_results:
+        cached_response = get_cached_response(cache_key, ttl_hours=CACHE_DURATION / 3600)
+        if cached_response:
             logger.info(f"Usando caché para artists_by_genre con género {genre}, región {region}, idioma {language}")
-            return jsonify(cached_results)
+            return cached_response
     else:
         logger.info(f"Omitiendo caché por solicitud explícita")
 
@@ -2263,17 +2362,19 @@ def get_artists_by_genre():
 
         # Intentar buscar artistas con la API, pero envolver en try/except
         try:
-            # Crear una instancia YTMusic con el idioma correcto
-            music = YTMusic(language=language)
-            logger.info(f"[DEBUG] Instancia YTMusic creada con idioma {language}")
-
             # Evitar formar consultas inválidas como "genre:Lucky Jason Mraz"
             # En su lugar, buscar directamente con el género como término de
             # búsqueda
             start_time = time.time()
             logger.info(f"[DEBUG] Iniciando búsqueda con parámetros: género={genre}, idioma={language}")
 
-            search_results = music.search(genre, filter="artists", limit=limit)
+            # El cliente YTMusic del idioma solo se pide si el índice no basta
+            search_results = genre_index.lookup(
+                genre,
+                "artist",
+                limit,
+                lambda: get_ytmusic_for_language(language).search(genre, filter="artists", limit=limit),
+            )
             elapsed_time = time.time() - start_time
 
             logger.info(
@@ -2319,15 +2420,22 @@ def get_artists_by_genre():
                 f"Error al buscar artistas para género '{genre}': {str(search_error)}"
             )
 
+            # Con el circuito abierto no tiene sentido reintentar: usar caché antiguo si existe
+            if isinstance(search_error, CircuitOpenError):
+                stale = get_stale_cached(f"artists_by_genre_{genre}_{limit}_{region}_{language}")
+                if stale:
+                    return jsonify(stale)
+
             # Verificar si el error es por idioma no soportado e intentar con
             # inglés
-            if "Language not supported" in str(search_error) and language != "en":
+            if "Language not supported" in str(search_error) and language != "en" and not deadline_expired():
                 logger.warning(f"Idioma '{language}' no soportado para esta región. Intentando con inglés...")
                 try:
                     # Intentar de nuevo con inglés
-                    music = YTMusic(language="en")
                     logger.info(f"[DEBUG] Reintentando búsqueda con idioma 'en'")
-                    search_results = music.search(genre, filter="artists", limit=limit)
+                    search_results = genre_index.lookup(
+                        genre, "artist", limit, lambda: get_ytmusic().search(genre, filter="artists", limit=limit)
+                    )
 
                     if search_results and len(search_results) > 0:
                         logger.info(
@@ -2372,7 +2480,7 @@ def get_artists_by_genre():
             logger.info(
                 f"No hay suficientes artistas ({len(artists)}). Usando artistas predefinidos para género '{genre}' en región '{region}'"
             )
-            genre_specific_artists = get_predefined_artists_by_genre(genre, limit, region)
+            genre_specific_artists = fallback_catalog.artists_for_genre(genre, limit, region)
 
             # Si ya tenemos algunos artistas, combinarlos con los predefinidos
             if len(artists) > 0:
@@ -2392,7 +2500,7 @@ def get_artists_by_genre():
 
         # Guardar en caché (sólo si hay artistas reales y no todos son
         # fallback)
-        if use_cache and any(artist.get("source", "") == "youtube" for artist in artists):
+        if use_cache and not is_partial() and any(artist.get("source", "") == "youtube" for artist in artists):
             cache_key = f"artists_by_genre_{genre}_{limit}_{region}_{language}"
             save_to_cache(cache_key, artists)
             logger.info(f"[DEBUG] Resultados guardados en caché con clave: {cache_key}")
@@ -2400,267 +2508,18 @@ def get_artists_by_genre():
         logger.info(
             f"[DEBUG] Devolviendo {len(artists)} artistas para el género '{genre}'"
         )
-        return jsonify(artists)
+        return partial_jsonify(artists)
     except Exception as e:
         logger.error(f"Error general en get_artists_by_genre para {genre} en región {region}: {e}")
 
         # En caso de error general, devolver directamente artistas predefinidos
-        predefined_artists = get_predefined_artists_by_genre(genre, limit, region)
+        predefined_artists = fallback_catalog.artists_for_genre(genre, limit, region)
         logger.info(
             f"[DEBUG] Devolviendo {len(predefined_artists)} artistas predefinidos para el género '{genre}' debido a error"
         )
         return jsonify(predefined_artists)
 
 
-def get_region_keyword(region_code):
-    """Devuelve una palabra clave basada en la región para mejorar los resultados de búsqueda"""
-    region_keywords = {
-        "ES": "españa",
-        "MX": "méxico",
-        "AR": "argentina",
-        "CO": "colombia",
-        "CL": "chile",
-        "US": "usa",
-        "GB": "uk",
-        "FR": "francia",
-        "DE": "alemania",
-        "IT": "italia",
-        "BR": "brasil",
-    }
-    return region_keywords.get(region_code, "")
-
-
-def get_predefined_artists_by_genre(genre, count, region="US"):
-    """Devuelve artistas predefinidos según el género solicitado y la región"""
-    # Base de artistas por género
-    genre_artists = {
-        "pop": [
-            {
-                "id": "pop1",
-                "name": "Taylor Swift",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb6a224073987b930f99adc8bc"}],
-            },
-            {
-                "id": "pop2",
-                "name": "Ed Sheeran",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb3bcef85e105dfc42399ef0c2"}],
-            },
-            {
-                "id": "pop3",
-                "name": "Ariana Grande",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebcdce7620dc940db079bf4952"}],
-            },
-            {
-                "id": "pop4",
-                "name": "Justin Bieber",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8ae7f2aaa9817a704a87ea36"}],
-            },
-        ],
-        "rock": [
-            {
-                "id": "rock1",
-                "name": "Foo Fighters",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8b9e05bd676878c8861f7828"}],
-            },
-            {
-                "id": "rock2",
-                "name": "Arctic Monkeys",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb7da39dea0a72f581535fb11f"}],
-            },
-            {
-                "id": "rock3",
-                "name": "Imagine Dragons",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb920dc1f617550de8388f368e"}],
-            },
-            {
-                "id": "rock4",
-                "name": "Twenty One Pilots",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba53ac4a3e0240306c2c33bae"}],
-            },
-        ],
-        "hip hop": [
-            {
-                "id": "hiphop1",
-                "name": "Kendrick Lamar",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb6eb08a5d2495d9f7d429aee9"}],
-            },
-            {
-                "id": "hiphop2",
-                "name": "Drake",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb4293385d324db8558179afd9"}],
-            },
-            {
-                "id": "hiphop3",
-                "name": "J. Cole",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebadd503b411a712e277895c8a"}],
-            },
-            {
-                "id": "hiphop4",
-                "name": "Travis Scott",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba00b11c129b27a88fc72f36b"}],
-            },
-        ],
-        "electronic": [
-            {
-                "id": "edm1",
-                "name": "Calvin Harris",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebc2b305a3560d6708dd8b7de0"}],
-            },
-            {
-                "id": "edm2",
-                "name": "Martin Garrix",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb12a2ef08d00dd7451a6dbed6"}],
-            },
-            {
-                "id": "edm3",
-                "name": "Daft Punk",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb10ca40ea0b0b5082dba0ff75"}],
-            },
-            {
-                "id": "edm4",
-                "name": "Avicii",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebd212fe90e871fa11c232c3a6"}],
-            },
-        ],
-        "indie": [
-            {
-                "id": "indie1",
-                "name": "Tame Impala",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebf87efa01ac7680a3fa7d0987"}],
-            },
-            {
-                "id": "indie2",
-                "name": "The 1975",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb8197fc99bf4768c774d18c55"}],
-            },
-            {
-                "id": "indie3",
-                "name": "Vampire Weekend",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb809b75d71c5e258695cef8c4"}],
-            },
-            {
-                "id": "indie4",
-                "name": "MGMT",
-                "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb68151ade82ce461f9f761a5e"}],
-            },
-        ],
-    }
-
-    # Artistas por región y género (para personalizar aún más los resultados)
-    region_genre_artists = {
-        "ES": {
-            "pop": [
-                {
-                    "id": "es-pop1",
-                    "name": "Rosalía",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb4a5844d12a6633fcce886ce2"}],
-                },
-                {
-                    "id": "es-pop2",
-                    "name": "Aitana",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1af3fabbe3738a589d6f45de"}],
-                },
-                {
-                    "id": "es-pop3",
-                    "name": "Pablo Alborán",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb996e3a6acf0b2bec97b29f34"}],
-                },
-            ],
-            "rock": [
-                {
-                    "id": "es-rock1",
-                    "name": "Leiva",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1f3c2b9c5fafe47fdb6dd2e3"}],
-                },
-                {
-                    "id": "es-rock2",
-                    "name": "Izal",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb32d0c0c92328b225d069534a"}],
-                },
-            ],
-        },
-        "MX": {
-            "pop": [
-                {
-                    "id": "mx-pop1",
-                    "name": "Natalia Lafourcade",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb9c0ac81650538c3a3f5c5536"}],
-                },
-                {
-                    "id": "mx-pop2",
-                    "name": "Reik",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba09a439764e2c2d5eb517de1"}],
-                },
-                {
-                    "id": "mx-pop3",
-                    "name": "Jesse & Joy",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eba8c8f89da7b1c1fcc9e1c92e"}],
-                },
-            ]
-        },
-        "AR": {
-            "pop": [
-                {
-                    "id": "ar-pop1",
-                    "name": "Tini",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5ebb6a2c7d2a2b38be4f4ede430"}],
-                },
-                {
-                    "id": "ar-pop2",
-                    "name": "Lali",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb1e34e6df777e8d4bd0269ed7"}],
-                },
-                {
-                    "id": "ar-pop3",
-                    "name": "Nicki Nicole",
-                    "images": [{"url": "https://i.scdn.co/image/ab6761610000e5eb21128629ebdb8ac427228921"}],
-                },
-            ]
-        },
-    }
-
-    # Normalizar el género para la búsqueda
-    normalized_genre = genre.lower()
-    matched_genre = None
-
-    for key in genre_artists:
-        if key in normalized_genre or normalized_genre in key:
-            matched_genre = key
-            break
-
-    # Intentar primero obtener artistas específicos por región y género
-    region_specific_artists = []
-    if region in region_genre_artists and matched_genre in region_genre_artists[region]:
-        region_specific_artists = region_genre_artists[region][matched_genre]
-        logger.info(
-            f"Usando {len(region_specific_artists)} artistas específicos para región {region} y género {matched_genre}"
-        )
-
-    # Si no encontramos un género específico, usar una mezcla de todos
-    if not matched_genre:
-        all_artists = []
-        for genre_list in genre_artists.values():
-            all_artists.extend(genre_list)
-        # Mezclar la lista para variedad
-        random.shuffle(all_artists)
-        result = region_specific_artists + all_artists[: max(0, count - len(region_specific_artists))]
-    else:
-        # Combinar artistas específicos de la región con artistas generales del
-        # género
-        general_genre_artists = genre_artists[matched_genre][: max(0, count - len(region_specific_artists))]
-        result = region_specific_artists + general_genre_artists
-        result = result[:count]  # Asegurarnos de no exceder el límite
-
-    # Añadir información común a todos los artistas
-    for artist in result:
-        artist["genres"] = [genre]
-        artist["popularity"] = 50
-        artist["source"] = "youtube"
-        artist["region"] = region
-
-    return result
-
-
 @app.route("/status")
 @cross_origin(origins="*")  # Aplicar CORS abierto solo a esta ruta
 def health_check():
@@ -2695,8 +2554,10 @@ def health_check():
                 service_status["last_test_success"] = False
 
         # Construir respuesta de estado
+        circuits = breakers_status()
+        circuit_open = any(breaker["state"] != "closed" for breaker in circuits.values())
         response = {
-            "status": "ok" if ytmusic_available else "degraded",
+            "status": "ok" if ytmusic_available and not circuit_open else "degraded",
             "ytmusic_available": ytmusic_available,
             "timestamp": datetime.now().isoformat(),
             "cache_status": {
@@ -2710,6 +2571,16 @@ def health_check():
                 "last_test_time_ms": service_status.get("last_test_time_ms", None),
                 "python_api_version": "1.1.0",
             },
+            "circuit_breakers": circuits,
+            "retry_policy": retry_status(),
+            "hedging": hedging_status(),
+            "suggestion_index": suggestion_index.status(),
+            "thumbnails": thumbnail_status(),
+            "logging": logging_status(),
+            "track_catalog": track_catalog.status(),
+            "genre_index": genre_index.status(),
+            "compression": compression_status(),
+            "json": json_status(),
         }
 
         return jsonify(response)
@@ -2729,45 +2600,29 @@ def health_check():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat(),
                     "ytmusic_available": False,
+                    "circuit_breakers": breakers_status(),
                 }
             ),
             500,
         )
 
 
-# Ruta para obtener información detallada de un artista
-@app.route("/api/youtube-artist", methods=["GET"])
-def get_youtube_artist():
-    """Obtiene información detallada de un artista en YouTube Music"""
-    artist_id = request.args.get("artistId")
-    use_cache = request.args.get("_t") is None  # Parámetro para bypass del caché
-    language = request.args.get("language", "es")
-
-    if not artist_id:
-        return jsonify({"error": "Se requiere un ID de artista"}), 400
-
-    logger.info(f"[YouTube Artist] Obteniendo información del artista: {artist_id}")
-
-    # Clave de caché
-    cache_key = f"artist_detail_{artist_id}_{language}"
+def artist_cache_key(artist_id, language):
+    return f"artist_detail_{artist_id}_{language}"
 
-    # Verificar caché si está habilitado
-    if use_cache:
-        cached_data = get_cached(cache_key, ttl_hours=24)  # Caché por 24 horas
-        if cached_data:
-            logger.info(f"[YouTube Artist] Devolviendo datos en caché para artista: {artist_id}")
-            return jsonify(cached_data)
 
-    # Configuración de reintentos
-    max_retries = 3
-    retry_delay = 1  # segundos
+def load_youtube_artist(artist_id, language="es", use_cache=True, artist_name=None):
+    """
+    Obtiene de YouTube Music y formatea la información de un artista.
+    Devuelve (datos, código HTTP) con el mismo formato que /api/youtube-artist.
+    """
+    cache_key = artist_cache_key(artist_id, language)
 
-    # Función para obtener datos con reintentos
-    def get_with_retry(attempt=0):
+    def fetch_artist_data():
+        # Los reintentos de errores transitorios los aplica la capa upstream
+        # (retry_policy); aquí solo se tratan los errores que no se reintentan
+        ytm = get_ytmusic()
         try:
-            # Obtener instancia de YTMusic
-            ytm = get_ytmusic()
-
             # Obtener información del artista
             start_time = time.time()
             artist_data = ytm.get_artist(artist_id)
@@ -2798,95 +2653,58 @@ def get_youtube_artist():
 
             return artist_data  # Retorna el artist_data modificado
         except KeyError as ke:
-            # Manejar específicamente el error de musicImmersiveHeaderRenderer
+            # Manejar específicamente el error de musicImmersiveHeaderRenderer.
+            # Es un error de estructura: reintentar no sirve, construir directamente
+            # una respuesta mínima con los datos disponibles
             error_msg = str(ke)
-            if "musicImmersiveHeaderRenderer" in error_msg:
-                logger.error(f"[YouTube Artist] Error en estructura de datos de YouTube Music: {error_msg}")
-
-                # Si tenemos un fallback, intenta reconstruir datos mínimos del artista
-                if attempt < max_retries - 1:
-                    logger.info(f"[YouTube Artist] Reintentando en {retry_delay * (attempt + 1)}s...")
-                    time.sleep(retry_delay * (attempt + 1))
-                    return get_with_retry(attempt + 1)
-                else:
-                    # En el último intento, construir una respuesta mínima con los datos disponibles
-                    logger.warning(f"[YouTube Artist] Creando respuesta mínima para el artista {artist_id}")
+            if "musicImmersiveHeaderRenderer" not in error_msg:
+                logger.error(f"[YouTube Artist] Error de estructura en la respuesta: {error_msg}")
+                raise
 
-                    # Intentar obtener al menos el nombre del artista mediante búsqueda
-                    try:
-                        # Extraer términos de búsqueda potenciales del ID
-                        search_term = None
-                        if artist_id.startswith("UC"):
-                            # Si es un canal de YouTube, buscar por ese ID
-                            search_results = ytm.search(artist_id, filter="artists", limit=1)
-                        else:
-                            # Intentar buscar por nombre si se proporcionó en la URL o en headers
-                            artist_name = request.args.get("artistName")
-                            if artist_name:
-                                search_results = ytm.search(artist_name, filter="artists", limit=1)
-                                search_term = artist_name
-                            else:
-                                # Si no hay nombre, devolver un objeto mínimo
-                                return {
-                                    "id": artist_id,
-                                    "name": "Artista no encontrado",
-                                    "thumbnails": [],
-                                    "error_cause": "musicImmersiveHeaderRenderer_not_found",
-                                    "description": "No se pudo obtener información detallada del artista debido a cambios en la API de YouTube Music",
-                                }
-
-                        if search_results and len(search_results) > 0:
-                            artist_result = search_results[0]
-                            logger.info(
-                                f"[YouTube Artist] Usando datos mínimos de búsqueda: {artist_result.get('name', 'Desconocido')}"
-                            )
+            logger.error(f"[YouTube Artist] Error en estructura de datos de YouTube Music: {error_msg}")
+            logger.warning(f"[YouTube Artist] Creando respuesta mínima para el artista {artist_id}")
 
-                            return {
-                                "id": artist_id,
-                                "name": artist_result.get("name", "Artista desconocido"),
-                                "thumbnails": artist_result.get("thumbnails", []),
-                                "partial_data": True,
-                                "subscribers": "Desconocido",
-                                "warning": "Datos parciales debido a cambios en la API de YouTube Music",
-                            }
-                    except Exception as search_error:
-                        logger.error(f"[YouTube Artist] Error al buscar datos alternativos: {search_error}")
+            # Intentar obtener al menos el nombre del artista mediante búsqueda
+            try:
+                if artist_id.startswith("UC"):
+                    # Si es un canal de YouTube, buscar por ese ID
+                    search_results = ytm.search(artist_id, filter="artists", limit=1)
+                else:
+                    # Intentar buscar por nombre si se proporcionó en la URL o en headers
+                    if artist_name:
+                        search_results = ytm.search(artist_name, filter="artists", limit=1)
+                    else:
+                        search_results = []
+
+                if search_results and len(search_results) > 0:
+                    artist_result = search_results[0]
+                    logger.info(
+                        f"[YouTube Artist] Usando datos mínimos de búsqueda: {artist_result.get('name', 'Desconocido')}"
+                    )
 
-                    # Si todo falla, devolver un objeto mínimo
                     return {
                         "id": artist_id,
-                        "name": "Artista no encontrado",
-                        "thumbnails": [],
-                        "error_cause": "musicImmersiveHeaderRenderer_not_found",
-                        "description": "No se pudo obtener información detallada del artista debido a cambios en la API de YouTube Music",
+                        "name": artist_result.get("name", "Artista desconocido"),
+                        "thumbnails": artist_result.get("thumbnails", []),
+                        "partial_data": True,
+                        "subscribers": "Desconocido",
+                        "warning": "Datos parciales debido a cambios en la API de YouTube Music",
                     }
-            else:
-                # Otros errores de clave
-                logger.error(f"[YouTube Artist] Error en intento {attempt+1}/{max_retries}: {error_msg}")
-
-                if attempt < max_retries - 1:
-                    sleep_time = retry_delay * (attempt + 1)
-                    logger.info(f"[YouTube Artist] Reintentando en {sleep_time}s...")
-                    time.sleep(sleep_time)
-                    return get_with_retry(attempt + 1)
-                else:
-                    raise
-        except Exception as e:
-            logger.error(f"[YouTube Artist] Error en intento {attempt+1}/{max_retries}: {str(e)}")
-
-            # Si aún tenemos reintentos disponibles
-            if attempt < max_retries - 1:
-                sleep_time = retry_delay * (attempt + 1)
-                logger.info(f"[YouTube Artist] Reintentando en {sleep_time}s...")
-                time.sleep(sleep_time)
-                return get_with_retry(attempt + 1)
-            else:
-                # Propagar el error después del último intento
-                raise
+            except Exception as search_error:
+                logger.error(f"[YouTube Artist] Error al buscar datos alternativos: {search_error}")
+
+            # Si todo falla, devolver un objeto mínimo
+            return {
+                "id": artist_id,
+                "name": "Artista no encontrado",
+                "thumbnails": [],
+                "error_cause": "musicImmersiveHeaderRenderer_not_found",
+                "description": "No se pudo obtener información detallada del artista debido a cambios en la API de YouTube Music",
+            }
 
     try:
-        # Obtener datos con reintentos
-        artist_data = get_with_retry()
+        # Obtener datos (con la política de reintentos de la capa upstream)
+        artist_data = fetch_artist_data()
 
         # Formatear y normalizar datos
         formatted_data = {
@@ -2908,40 +2726,246 @@ def get_youtube_artist():
         save_to_cache(cache_key, formatted_data)
 
         logger.info(f"[YouTube Artist] Datos formateados para artista: {artist_id}")
-        return jsonify(formatted_data)
+        return formatted_data, 200
 
     except Exception as e:
         logger.error(f"[YouTube Artist] Error final al obtener información del artista {artist_id}: {str(e)}")
 
         # Verificar si tenemos datos en caché aun con tiempos de vida mayores
-        fallback_cache = get_cached(cache_key, ttl_hours=72)  # Intentar usar caché con TTL extendido
+        fallback_cache = get_stale_cached(cache_key)  # Intentar usar caché con TTL extendido
         if fallback_cache:
             logger.info(f"[YouTube Artist] Usando caché antiguo como fallback para: {artist_id}")
-            return jsonify(
-                {
-                    **fallback_cache,
-                    "warning": "Datos obtenidos de caché antiguo debido a un error en la API",
-                }
-            )
+            return {
+                **fallback_cache,
+                "warning": "Datos obtenidos de caché antiguo debido a un error en la API",
+            }, 200
 
         # Devolver respuesta de error
         return (
-            jsonify(
-                {
-                    "error": f"Error al obtener información del artista: {str(e)}",
-                    "id": artist_id,
-                    "source": "youtube_music",
-                }
-            ),
+            {
+                "error": f"Error al obtener información del artista: {str(e)}",
+                "id": artist_id,
+                "source": "youtube_music",
+            },
             500,
         )
 
 
+# Ruta para obtener información detallada de un artista
+@app.route("/api/youtube-artist", methods=["GET"])
+def get_youtube_artist():
+    """Obtiene información detallada de un artista en YouTube Music"""
+    artist_id = request.args.get("artistId")
+    use_cache = request.args.get("_t") is None  # Parámetro para bypass del caché
+    language = request.args.get("language", "es")
+
+    if not artist_id:
+        return jsonify({"error": "Se requiere un ID de artista"}), 400
+    try:
+        projection = projection_from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger.info(f"[YouTube Artist] Obteniendo información del artista: {artist_id}")
+
+    # Clave de caché
+    cache_key = artist_cache_key(artist_id, language)
+
+    # Verificar caché si está habilitado
+    if use_cache:
+        if projection is None:
+            cached_response = get_cached_response(cache_key, ttl_hours=24)  # Caché por 24 horas
+            if cached_response:
+                logger.info(f"[YouTube Artist] Devolviendo datos en caché para artista: {artist_id}")
+                return cached_response
+        else:
+            cached_data = get_cached(cache_key, ttl_hours=24)
+            if cached_data:
+                logger.info(f"[YouTube Artist] Devolviendo datos en caché para artista: {artist_id}")
+                return jsonify(project(cached_data, projection))
+
+    artist_data, status_code = load_youtube_artist(
+        artist_id, language, use_cache=use_cache, artist_name=request.args.get("artistName")
+    )
+    if status_code == 200:
+        artist_data = project(artist_data, projection)
+    return jsonify(artist_data), status_code
+
+
+ARTIST_SECTIONS = ("songs", "albums", "singles", "videos", "related")
+YOUTUBE_ARTISTS_MAX_ITEMS = int(os.environ.get("YOUTUBE_ARTISTS_MAX_ITEMS", 50))
+YOUTUBE_ARTISTS_MAX_WORKERS = int(os.environ.get("YOUTUBE_ARTISTS_MAX_WORKERS", 6))
+
+
+def select_artist_sections(artist_data, sections):
+    """Deja los campos de cabecera y solo las secciones de contenido pedidas"""
+    if sections is None:
+        return artist_data
+    return {
+        key: value
+        for key, value in artist_data.items()
+        if key not in ARTIST_SECTIONS or key in sections
+    }
+
+
+@app.route("/api/youtube-artists", methods=["POST"])
+def get_youtube_artists():
+    """
+    Obtiene la información de muchos artistas en una sola petición (rejillas de artistas).
+    Body: {"ids": [...], "language": "es", "sections": ["header", "songs", ...]}
+    Los artistas en caché se devuelven de una pasada y el resto se obtiene en paralelo
+    con un pool acotado, hasta agotar el deadline de la petición.
+    Con "sections": ["header"] solo se devuelven los campos de cabecera; fields y
+    thumbnails=best (parámetros de la URL) se aplican a cada artista.
+    """
+    body = request.get_json(silent=True) or {}
+    ids = body.get("ids")
+    language = body.get("language", request.args.get("language", "es"))
+    sections = body.get("sections", request.args.get("sections"))
+
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "Se requiere una lista 'ids'"}), 400
+    try:
+        projection = projection_from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(ids) > YOUTUBE_ARTISTS_MAX_ITEMS:
+        return jsonify({"error": f"Máximo {YOUTUBE_ARTISTS_MAX_ITEMS} artistas por petición"}), 400
+
+    if isinstance(sections, str):
+        sections = [section.strip() for section in sections.split(",") if section.strip()]
+    if sections is not None:
+        if not isinstance(sections, list):
+            return jsonify({"error": "'sections' debe ser una lista"}), 400
+        unknown = [section for section in sections if section != "header" and section not in ARTIST_SECTIONS]
+        if unknown:
+            return jsonify({"error": f"Secciones no válidas: {', '.join(map(str, unknown))}"}), 400
+        sections = set(sections)
+
+    artist_ids = [str(artist_id or "") for artist_id in ids]
+    unique = list(dict.fromkeys(artist_id for artist_id in artist_ids if artist_id))
+
+    # Aciertos de caché en una sola lectura
+    cache_keys = {artist_id: artist_cache_key(artist_id, language) for artist_id in unique}
+    cached = get_cached_many(list(cache_keys.values()), ttl_hours=24)
+    resolved = {}
+    for artist_id, key in cache_keys.items():
+        if key in cached:
+            resolved[artist_id] = {"status": "ok", "cached": True, "artist": cached[key]}
+
+    misses = [artist_id for artist_id in unique if artist_id not in resolved]
+
+    def resolve_miss(artist_id):
+        upstream_limiter.acquire()
+        artist_data, status_code = load_youtube_artist(artist_id, language)
+        if status_code != 200:
+            status = "timeout" if deadline_expired() else "error"
+            return {"status": status, "cached": False, "error": artist_data.get("error", "")}
+        return {"status": "ok", "cached": False, "artist": artist_data}
+
+    def make_result(index, artist_id, result):
+        if not artist_id:
+            result = {"status": "invalid", "cached": False, "error": "Se requiere un ID de artista"}
+        elif result is None:
+            result = {"status": "timeout", "cached": False, "error": "Deadline agotado"}
+        if "artist" in result:
+            result = {**result, "artist": project(select_artist_sections(result["artist"], sections), projection)}
+        return {"index": index, "id": artist_id, **result}
+
+    results = iter_batch_results(artist_ids, resolved, misses, resolve_miss, YOUTUBE_ARTISTS_MAX_WORKERS, make_result)
+    summary = {"total": len(artist_ids), "cache_hits": len(unique) - len(misses)}
+
+    logger.info(
+        f"[YouTube Artist] Multi-get: {len(unique)} artistas, {len(unique) - len(misses)} desde caché, {len(misses)} a obtener"
+    )
+    if wants_ndjson():
+        return ndjson_response(({"type": "result", **result} for result in results), summary)
+    return partial_jsonify({"results": sorted(results, key=lambda result: result["index"]), **summary})
+
+
+def fetch_artist_section_window(params, count):
+    """
+    Los primeros count elementos de una sección de un artista. get_artist solo trae
+    los primeros; el resto se pide a la playlist (songs, videos) o a la lista
+    completa de álbumes/singles de la sección.
+    """
+    artist_id, section, language = params["artistId"], params["section"], params["language"]
+    artist_data = get_cached(artist_cache_key(artist_id, language), ttl_hours=24)
+    if not artist_data:
+        artist_data, status_code = load_youtube_artist(artist_id, language)
+        if status_code != 200:
+            return None
+
+    content = artist_data.get(section) or {}
+    results = content.get("results") or []
+    browse_id = content.get("browseId")
+    if len(results) >= count or not browse_id:
+        return results
+
+    ytm = get_ytmusic()
+    if section in ("albums", "singles"):
+        if not content.get("params"):
+            return results
+        return ytm.get_artist_albums(browse_id, content["params"])
+    return (ytm.get_playlist(browse_id, limit=count) or {}).get("tracks") or results
+
+
+artist_section_pages = PagedSource("artist_section", fetch_artist_section_window, load_page_state(24), save_page_state)
+
+
+@app.route("/api/youtube-artist/section", methods=["GET"])
+def get_youtube_artist_section():
+    """Una página de una sección de un artista (songs, albums, singles, videos, related) con cursor"""
+    try:
+        projection = projection_from_request()
+        paging = page_args(default_page_size=20) or (None, 0, 20)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cursor_params, offset, page_size = paging
+    params = cursor_params or {
+        "artistId": request.args.get("artistId", ""),
+        "section": request.args.get("section", "songs"),
+        "language": request.args.get("language", "es"),
+    }
+    if not params.get("artistId"):
+        return jsonify({"error": "Se requiere un ID de artista"}), 400
+    if params.get("section") not in ARTIST_SECTIONS:
+        return jsonify({"error": f"Sección no válida: {params.get('section')}"}), 400
+
+    try:
+        page = artist_section_pages.page(params, offset, page_size)
+    except Exception as e:
+        logger.error(f"[YouTube Artist] Error paginando {params['section']} de {params['artistId']}: {str(e)}")
+        page = None
+    if page is None:
+        return jsonify({"error": "No se pudo obtener la sección del artista", "items": [], "nextCursor": None}), 502
+    return partial_jsonify({**page, "items": project(page["items"], projection)})
+
+
+def fetch_watch_window(params, count):
+    """Los primeros count tracks de la watch playlist de un vídeo"""
+    playlist_data = get_ytmusic().get_watch_playlist(videoId=params["videoId"], limit=count)
+    return (playlist_data or {}).get("tracks") or []
+
+
+watch_pages = PagedSource("watch", fetch_watch_window, load_page_state(1), save_page_state)
+
+
 @app.route("/api/watch-playlist", methods=["GET"])
 def get_watch_playlist():
     video_id = request.args.get("videoId")
     limit = request.args.get("limit", type=int, default=25)
 
+    try:
+        projection = projection_from_request()
+        # CursorError es un ValueError
+        paging = page_args(default_page_size=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if paging is not None and paging[0] is not None:
+        video_id = str(paging[0].get("videoId", ""))
+
     if not video_id:
         logger.warning("get_watch_playlist: Falta videoId")
         return jsonify({"error": "Se requiere el parámetro videoId"}), 400
@@ -2949,6 +2973,11 @@ def get_watch_playlist():
     logger.info(f"Obteniendo watch playlist para videoId: {video_id}")
 
     try:
+        if paging is not None:
+            _, offset, page_size = paging
+            page = watch_pages.page({"videoId": video_id}, offset, page_size)
+            return partial_jsonify({**page, "items": project(page["items"], projection)})
+
         yt = get_ytmusic()  # Obtener instancia inicializada
         # Limitar la cantidad de resultados para evitar sobrecarga
         playlist_data = yt.get_watch_playlist(videoId=video_id, limit=limit)
@@ -2963,8 +2992,8 @@ def get_watch_playlist():
             )
 
         logger.info(f"Watch playlist obtenida con {len(playlist_data.get('tracks', []))} tracks para videoId: {video_id}")
-        # Devolver directamente la respuesta de ytmusicapi
-        return jsonify(playlist_data)
+        # Devolver la respuesta de ytmusicapi (con los campos pedidos en fields)
+        return jsonify(project(playlist_data, projection))
 
     except Exception as e:
         # Capturar cualquier excepción durante la llamada a ytmusicapi
@@ -3078,6 +3107,9 @@ if __name__ == "__main__":
         print(f"Error configurando SSL: {e}")
         context = None
 
+    # Métricas de ejecuciones anteriores (con gunicorn lo hace gunicorn.conf.py)
+    reset_metrics_dir()
+
     # Iniciar el servidor
     if context:
         app.run(host="0.0.0.0", port=5000, ssl_context=context, debug=True)